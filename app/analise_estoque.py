@@ -0,0 +1,320 @@
+"""
+Análise de estoque vetorizada (NumPy)
+
+As colunas numéricas dos produtos (id, preco_unitario, quantidade_estoque e
+categoria_id) são carregadas direto em arrays NumPy, sem criar objetos Produto,
+e as análises são operações sobre os arrays inteiros: valor do estoque, totais
+por categoria (np.bincount), percentis de preço e de estoque e máscaras de
+estoque baixo.
+
+A atualização é incremental: atualizar() lê somente os produtos incluídos depois
+da última leitura (id maior que o último carregado) e os alterados ou excluídos,
+apontados pelo registro produto_alteracao (migração 0004). Se o registro tiver
+sido descartado além do ponto já lido, ou se o backend mudar, tudo é recarregado.
+
+Os arrays de uma leitura nunca são modificados: cada atualização monta arrays
+novos e os troca de uma só vez, então quem guardou uma referência (ou uma análise
+em andamento em outra thread) continua com um conjunto consistente.
+
+Uso:
+    analise = get_analise_estoque()          # compartilhada e já atualizada
+    analise.valor_total()
+    analise.resumo_por_categoria(limite=10)  # mesmo resultado de ProdutoService.resumo_estoque_por_categoria
+    analise.percentis('preco_unitario', (50, 90, 99))
+    analise.ids[analise.mascara_estoque_baixo(5)]
+"""
+import logging
+import threading
+from typing import Any, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from .dao import DAOFactory
+from .dominio import ResumoEstoqueCategoria
+
+
+# um registro por produto, na ordem das colunas de ProdutoDAO.iterar_colunas_estoque;
+# a quantidade é lida como float para que NULL (None) vire nan
+TIPO_REGISTRO = np.dtype([('id', np.int64), ('preco_unitario', np.float64),
+                          ('quantidade_estoque', np.float64), ('categoria_id', np.int64)])
+
+# colunas aceitas por percentis()
+COLUNAS_PERCENTIL = ('preco_unitario', 'quantidade_estoque', 'valor')
+
+# o registro de alterações é podado quando passa do dobro deste tamanho; uma
+# análise que ficou mais atrasada que isso é recarregada por inteiro
+MAX_ALTERACOES = 100_000
+
+
+class ColunasEstoque(NamedTuple):
+    """Arrays de uma leitura do catálogo, alinhados e ordenados por id"""
+    ids: np.ndarray
+    precos: np.ndarray
+    quantidades: np.ndarray
+    categorias: np.ndarray
+    # quantidade NULL no banco (carregada como 0): não conta como estoque baixo, como no SQL
+    sem_quantidade: np.ndarray
+
+    @classmethod
+    def de_registros(cls, registros: np.ndarray, categorias: Optional[np.ndarray] = None) -> 'ColunasEstoque':
+        """
+        Separa o array estruturado em colunas contíguas (as operações sobre um campo
+        dele seriam com passo). Com categorias, descarta os produtos de categorias
+        inexistentes, como o JOIN das consultas do ProdutoDAO.
+        """
+        if categorias is not None:
+            registros = registros[np.isin(registros['categoria_id'], categorias)]
+        quantidades = registros['quantidade_estoque']
+        sem_quantidade = np.isnan(quantidades)
+        return cls(np.ascontiguousarray(registros['id']),
+                   np.ascontiguousarray(registros['preco_unitario']),
+                   np.where(sem_quantidade, 0, quantidades).astype(np.int64),
+                   np.ascontiguousarray(registros['categoria_id']),
+                   sem_quantidade)
+
+    @classmethod
+    def vazias(cls) -> 'ColunasEstoque':
+        return cls.de_registros(np.empty(0, dtype=TIPO_REGISTRO))
+
+
+def _registros(linhas: Iterable[tuple]) -> np.ndarray:
+    """Converte as tuplas do DAO em um array estruturado, sem lista intermediária"""
+    return np.fromiter(linhas, dtype=TIPO_REGISTRO)
+
+
+class AnaliseEstoque:
+    """
+    Colunas dos produtos em arrays NumPy e as análises sobre elas.
+
+    Args:
+        dao: ProdutoDAO usado nas leituras (padrão: o da DAOFactory no momento de cada leitura)
+    """
+
+    def __init__(self, dao: Any = None):
+        self._dao_fixo = dao
+        self._dao = None
+        self._colunas = ColunasEstoque.vazias()
+        # último seq do registro de alterações e maior id já aplicados (-1: nunca carregada)
+        self._seq = -1
+        self._maior_id = 0
+        self._lock = threading.Lock()
+        self.cargas = 0
+        self.atualizacoes = 0
+
+    @property
+    def colunas(self) -> ColunasEstoque:
+        return self._colunas
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._colunas.ids
+
+    @property
+    def precos(self) -> np.ndarray:
+        return self._colunas.precos
+
+    @property
+    def quantidades(self) -> np.ndarray:
+        return self._colunas.quantidades
+
+    @property
+    def categorias(self) -> np.ndarray:
+        return self._colunas.categorias
+
+    def __len__(self) -> int:
+        return len(self._colunas.ids)
+
+    # ------------------------------------------------------------------
+    # Carga e atualização
+
+    def carregar(self) -> int:
+        """Lê todas as colunas do banco, substituindo os arrays atuais. Retorna o total de produtos"""
+        with self._lock:
+            self._dao = self._dao_fixo or DAOFactory.get_produto_dao()
+            return self._carregar()
+
+    @staticmethod
+    def _ids_categorias() -> np.ndarray:
+        return np.array([categoria.id for categoria in DAOFactory.get_categoria_dao().selecionar_todos()],
+                        dtype=np.int64)
+
+    def _carregar(self) -> int:
+        # o seq é lido antes dos produtos: o que mudar durante a carga é reaplicado na próxima atualização
+        _, self._seq = self._dao.faixa_alteracoes()
+        registros = _registros(self._dao.iterar_colunas_estoque())
+        self._maior_id = int(registros['id'][-1]) if len(registros) else 0
+        self._colunas = ColunasEstoque.de_registros(registros, self._ids_categorias())
+        self.cargas += 1
+        return len(self._colunas.ids)
+
+    def atualizar(self) -> int:
+        """
+        Aplica aos arrays as inclusões, alterações e exclusões feitas desde a última
+        leitura (na primeira chamada, carrega tudo). Retorna quantos produtos incluídos,
+        alterados ou excluídos foram aplicados (ou o total de produtos, se carregou tudo).
+        """
+        with self._lock:
+            dao = self._dao_fixo or DAOFactory.get_produto_dao()
+            if self._seq < 0 or dao is not self._dao:
+                self._dao = dao
+                return self._carregar()
+
+            minimo, maximo = dao.faixa_alteracoes()
+            if maximo < self._seq or minimo > self._seq + 1:
+                # alterações ainda não aplicadas já foram descartadas do registro
+                logging.info("Registro de alterações descartado além da última leitura; recarregando a análise")
+                return self._carregar()
+
+            # os incluídos depois da última leitura já vêm com os valores atuais
+            alterados = [id for id in (dao.produtos_alterados(self._seq, maximo) if maximo > self._seq else [])
+                         if id <= self._maior_id]
+            atuais = _registros(dao.selecionar_colunas_estoque(alterados) if alterados else ())
+            novos = _registros(dao.iterar_colunas_estoque(self._maior_id))
+
+            if alterados or len(novos):
+                categorias = self._ids_categorias()
+                self._colunas = self._aplicar(self._colunas, np.array(alterados, dtype=np.int64),
+                                              ColunasEstoque.de_registros(atuais, categorias),
+                                              ColunasEstoque.de_registros(novos, categorias))
+                if len(novos):
+                    self._maior_id = int(novos['id'][-1])
+                self.atualizacoes += 1
+            self._seq = maximo
+            if maximo - minimo >= 2 * MAX_ALTERACOES:
+                dao.descartar_alteracoes(maximo - MAX_ALTERACOES)
+            return len(alterados) + len(novos)
+
+    @staticmethod
+    def _aplicar(colunas: ColunasEstoque, alterados: np.ndarray, atuais: ColunasEstoque,
+                 novos: ColunasEstoque) -> ColunasEstoque:
+        """Monta os arrays novos: tira os alterados, recoloca os que ainda existem e acrescenta os novos"""
+        if len(alterados):
+            manter = ~np.isin(colunas.ids, alterados, assume_unique=True)
+            colunas = ColunasEstoque(*(coluna[manter] for coluna in colunas))
+        resultado = ColunasEstoque(*(np.concatenate(partes) for partes in zip(colunas, atuais, novos)))
+        if len(atuais.ids):
+            # os alterados voltam no meio da faixa de ids: reordena (os novos já vêm depois de todos)
+            ordem = np.argsort(resultado.ids, kind='stable')
+            resultado = ColunasEstoque(*(coluna[ordem] for coluna in resultado))
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Análises
+
+    def valores(self) -> np.ndarray:
+        """Valor em estoque (preço * quantidade) de cada produto"""
+        colunas = self._colunas
+        return colunas.precos * colunas.quantidades
+
+    def valor_total(self) -> float:
+        """Soma de preço * quantidade de todos os produtos"""
+        colunas = self._colunas
+        return float(np.dot(colunas.precos, colunas.quantidades))
+
+    @staticmethod
+    def _estoque_baixo(colunas: ColunasEstoque, limite: int) -> np.ndarray:
+        mascara = colunas.quantidades < limite
+        mascara &= ~colunas.sem_quantidade
+        return mascara
+
+    def mascara_estoque_baixo(self, limite: int = 10) -> np.ndarray:
+        """Array booleano alinhado a ids: True para os produtos com estoque abaixo do limite"""
+        return self._estoque_baixo(self._colunas, limite)
+
+    def ids_estoque_baixo(self, limite: int = 10) -> np.ndarray:
+        """Ids dos produtos com estoque abaixo do limite, em ordem crescente"""
+        colunas = self._colunas
+        return colunas.ids[self._estoque_baixo(colunas, limite)]
+
+    def totais_por_categoria(self, limite: int = 10) -> dict[str, np.ndarray]:
+        """
+        Totais de cada categoria com produtos, em arrays alinhados e ordenados por
+        categoria_id: categoria_id, quantidade_produtos, quantidade_estoque,
+        valor_total e produtos_estoque_baixo
+        """
+        colunas = self._colunas
+        # os ids de categoria são inteiros pequenos (AUTOINCREMENT): a contagem é feita
+        # direto por id, sem ordenar (np.unique ordenaria o array inteiro)
+        tamanho = int(colunas.categorias.max()) + 1 if len(colunas.categorias) else 0
+        quantidade_produtos = np.bincount(colunas.categorias, minlength=tamanho)
+        categorias = np.flatnonzero(quantidade_produtos)
+
+        def somar(pesos: np.ndarray) -> np.ndarray:
+            return np.bincount(colunas.categorias, weights=pesos, minlength=tamanho)[categorias]
+
+        return {
+            'categoria_id': categorias,
+            'quantidade_produtos': quantidade_produtos[categorias],
+            'quantidade_estoque': somar(colunas.quantidades).astype(np.int64),
+            'valor_total': somar(colunas.precos * colunas.quantidades),
+            'produtos_estoque_baixo': somar(self._estoque_baixo(colunas, limite)).astype(np.int64),
+        }
+
+    def resumo_por_categoria(self, limite: int = 10) -> list[ResumoEstoqueCategoria]:
+        """
+        Os totais de totais_por_categoria no formato de ProdutoService.resumo_estoque_por_categoria
+        (todas as categorias, ordenadas pela descrição; as sem produtos com zeros)
+        """
+        totais = self.totais_por_categoria(limite)
+        linhas = {int(id): i for i, id in enumerate(totais['categoria_id'])}
+        resumo = []
+        for categoria in DAOFactory.get_categoria_dao().selecionar_todos():
+            i = linhas.get(categoria.id)
+            if i is None:
+                resumo.append(ResumoEstoqueCategoria(categoria.id, categoria.descricao, 0, 0, 0.0, 0))
+            else:
+                resumo.append(ResumoEstoqueCategoria(
+                    categoria.id, categoria.descricao, int(totais['quantidade_produtos'][i]),
+                    int(totais['quantidade_estoque'][i]), float(totais['valor_total'][i]),
+                    int(totais['produtos_estoque_baixo'][i])))
+        return resumo
+
+    def percentis(self, coluna: str = 'preco_unitario', q: Iterable[float] = (25, 50, 75, 90, 99),
+                  categoria_id: Optional[int] = None) -> dict[float, float]:
+        """
+        Percentis (0 a 100) de preco_unitario, quantidade_estoque ou valor, de todos
+        os produtos ou de uma categoria (quantidades NULL ficam fora dos percentis de
+        quantidade_estoque e valor). Sem produtos, os valores são nan.
+        """
+        if coluna not in COLUNAS_PERCENTIL:
+            raise ValueError(f"Coluna inválida: {coluna} (use {', '.join(COLUNAS_PERCENTIL)})")
+        q = [float(p) for p in q]
+        if any(p < 0 or p > 100 for p in q):
+            raise ValueError("Os percentis devem estar entre 0 e 100")
+        colunas = self._colunas
+        valores = {'preco_unitario': colunas.precos, 'quantidade_estoque': colunas.quantidades,
+                   'valor': colunas.precos * colunas.quantidades}[coluna]
+        selecao = colunas.categorias == categoria_id if categoria_id is not None else None
+        if coluna != 'preco_unitario' and colunas.sem_quantidade.any():
+            selecao = ~colunas.sem_quantidade if selecao is None else selecao & ~colunas.sem_quantidade
+        if selecao is not None:
+            valores = valores[selecao]
+        if not len(valores) or not q:
+            return {p: float('nan') for p in q}
+        return dict(zip(q, (float(v) for v in np.percentile(valores, q))))
+
+    def stats(self) -> dict[str, Any]:
+        """Informações para diagnóstico"""
+        return {
+            'rows': len(self),
+            'memory_bytes': sum(coluna.nbytes for coluna in self._colunas),
+            'last_seq': self._seq,
+            'max_id': self._maior_id,
+            'loads': self.cargas,
+            'updates': self.atualizacoes,
+        }
+
+
+_analise: Optional[AnaliseEstoque] = None
+_analise_lock = threading.Lock()
+
+
+def get_analise_estoque(atualizar: bool = True) -> AnaliseEstoque:
+    """Retorna a análise compartilhada do processo, atualizada com as últimas alterações"""
+    global _analise
+    with _analise_lock:
+        if _analise is None:
+            _analise = AnaliseEstoque()
+    if atualizar:
+        _analise.atualizar()
+    return _analise
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        from django.conf import settings
+        from .instrumentacao import configurar_monitor
+        from .dao import DAOFactory
+
+        # consultas acima deste tempo vão para o log 'app.consultas_lentas'
+        configurar_monitor(limite_lento_ms=getattr(settings, 'DAO_LIMITE_CONSULTA_LENTA_MS', 100.0))
+
+        # armazenamento dos DAOs (arquivo SQLite, SQLite em memória ou dicionários)
+        # e perfil de desempenho das conexões SQLite (PRAGMAs)
+        config = dict(getattr(settings, 'DAO_BACKEND', None) or {})
+        config.setdefault('PROFILE', getattr(settings, 'DATABASE_PROFILE', None))
+        DAOFactory.configurar(config)
@@ -0,0 +1,169 @@
+"""
+API assíncrona dos DAOs
+
+O sqlite3 só tem chamadas bloqueantes, então as operações no banco rodam em um
+executor dedicado (threads limitadas ao total de conexões dos pools) e o código
+assíncrono apenas aguarda o resultado. Em um servidor ASGI, uma requisição
+esperando o banco não ocupa o loop de eventos nem uma thread própria.
+
+Uso:
+    dao = DAOFactory.get_categoria_dao_assincrono()
+    categorias = await dao.selecionar_todos()
+
+    # várias operações na mesma transação: a unidade de trabalho é da thread,
+    # então a função inteira roda no executor
+    await executar(service.criar_produto, descricao, preco, quantidade, categoria_id)
+"""
+import asyncio
+import functools
+import inspect
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from .pool import get_connection_pool, get_reader_pool
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_threads_executor = 0
+_executor_lock = threading.Lock()
+# por loop de eventos: limita as iterações simultâneas (cada uma ocupa uma thread e uma conexão)
+_semaforos_iteracao: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _total_conexoes() -> int:
+    """Total de conexões dos pools (o de escrita e, se houver, o somente leitura)"""
+    leitura = get_reader_pool()
+    return get_connection_pool().max_size + (leitura.max_size if leitura is not None else 0)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Retorna o executor compartilhado pelas operações assíncronas, criando-o na
+    primeira chamada com uma thread por conexão (mais threads só ficariam
+    esperando uma conexão livre). Com leitura e escrita separadas, conta as
+    conexões dos dois pools: o de escrita tem uma única conexão, e as consultas
+    usam as do pool somente leitura.
+    """
+    global _executor, _threads_executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _threads_executor = _total_conexoes()
+                _executor = ThreadPoolExecutor(max_workers=_threads_executor, thread_name_prefix='dao')
+    return _executor
+
+
+def configurar_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Substitui o executor compartilhado por um novo com max_workers threads.
+    As operações já enviadas ao executor anterior terminam normalmente.
+    """
+    global _executor, _threads_executor
+    if max_workers < 1:
+        raise ValueError("O número de threads do executor deve ser maior que zero")
+    with _executor_lock:
+        anterior = _executor
+        _threads_executor = max_workers
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dao')
+        _semaforos_iteracao.clear()
+    if anterior is not None:
+        anterior.shutdown(wait=False)
+    return _executor
+
+
+def encerrar_executor(wait: bool = True) -> None:
+    """Encerra o executor compartilhado (um novo é criado se for usado de novo)"""
+    global _executor
+    with _executor_lock:
+        anterior, _executor = _executor, None
+        _semaforos_iteracao.clear()
+    if anterior is not None:
+        anterior.shutdown(wait=wait)
+
+
+async def executar(funcao: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa uma função bloqueante (DAO, service...) no executor e aguarda o resultado"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(funcao, *args, **kwargs))
+
+
+_FIM = object()
+
+
+def _semaforo_iteracao() -> asyncio.Semaphore:
+    """
+    Semáforo do loop atual que limita as iterações simultâneas ao mesmo número de
+    threads do executor compartilhado
+    """
+    loop = asyncio.get_running_loop()
+    get_executor()
+    with _executor_lock:
+        semaforo = _semaforos_iteracao.get(loop)
+        if semaforo is None:
+            semaforo = _semaforos_iteracao[loop] = asyncio.Semaphore(_threads_executor)
+    return semaforo
+
+
+async def iterar(funcao: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+    """
+    Percorre sob demanda, em código assíncrono, o gerador bloqueante retornado por
+    funcao(*args, **kwargs) (ex.: uma exportação que lê o DAO em lotes).
+    O gerador é criado e percorrido em uma thread própria, sempre a mesma, pois a
+    conexão fica vinculada a ela; cada item é entregue assim que é produzido.
+    Como cada iteração ocupa essa thread e uma conexão até terminar, no máximo
+    tantas quanto as threads do executor compartilhado rodam ao mesmo tempo; as
+    demais aguardam (sem ocupar threads) até uma terminar.
+    """
+    loop = asyncio.get_running_loop()
+    async with _semaforo_iteracao():
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dao-iterar')
+        gerador = None
+        try:
+            gerador = await loop.run_in_executor(executor, functools.partial(funcao, *args, **kwargs))
+            while True:
+                item = await loop.run_in_executor(executor, next, gerador, _FIM)
+                if item is _FIM:
+                    break
+                yield item
+        finally:
+            # interrompido (ex.: cliente desconectou) ou esgotado: libera a conexão na mesma thread
+            if gerador is not None:
+                await loop.run_in_executor(executor, gerador.close)
+            executor.shutdown(wait=False)
+
+
+def _materializar(funcao: Callable[..., Any], *args, **kwargs) -> Any:
+    resultado = funcao(*args, **kwargs)
+    # um gerador precisa ser consumido na mesma thread (a conexão fica vinculada a ela)
+    if inspect.isgenerator(resultado):
+        return list(resultado)
+    return resultado
+
+
+class DAOAssincrono:
+    """
+    Versão assíncrona de um DAO: cada método do DAO decorado vira uma corrotina
+    executada no executor compartilhado.
+    Os métodos iterar_* retornam a lista completa, pois o gerador precisa ser
+    percorrido na thread que detém a conexão; para processar grandes volumes
+    sob demanda, use iterar() ou percorra o gerador dentro de uma função passada
+    a executar().
+    """
+
+    def __init__(self, dao: Any):
+        self.dao = dao
+
+    def __getattr__(self, nome: str) -> Any:
+        if nome == 'dao':
+            raise AttributeError(nome)
+        metodo = getattr(self.dao, nome)
+        if not callable(metodo):
+            return metodo
+
+        @functools.wraps(metodo)
+        async def corrotina(*args, **kwargs):
+            return await executar(_materializar, metodo, *args, **kwargs)
+
+        return corrotina
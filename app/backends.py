@@ -0,0 +1,225 @@
+"""
+Armazenamentos (backends) disponíveis para os DAOs
+
+O backend é escolhido pela configuração DAO_BACKEND do Django (aplicada por
+AppConfig.ready) ou por DAOFactory.configurar(), com as chaves:
+
+    ENGINE            'sqlite' (padrão), 'sqlite_memoria', 'memoria' ou o caminho
+                      pontilhado de uma subclasse de Backend
+    NAME              arquivo do banco (sqlite) ou nome do banco em memória
+                      (sqlite_memoria); caminhos relativos partem da raiz do projeto
+    OPTIONS           parâmetros do pool: max_connections, timeout, idle_timeout,
+                      cached_statements, journal_mode e read_connections (sqlite: com
+                      um valor > 0 as consultas usam esse número de conexões somente
+                      leitura e as escritas uma única conexão)
+    PROFILE           perfil de desempenho aplicado a cada conexão (app.perfis): 'durable',
+                      'balanced', 'bulk-load' ou um dicionário de PRAGMAs; o AppConfig
+                      usa a configuração DATABASE_PROFILE
+    CACHE_CATEGORIAS  {'max_itens': ..., 'ttl': ...} ou None (sem cache)
+    CACHE_PRODUTOS    idem (padrão: None)
+    FILA_ESCRITA      {'max_operacoes': ..., 'max_espera_ms': ...} para enviar as escritas
+                      à fila com commit em grupo (app.fila_escrita); None (padrão) desativa
+"""
+import importlib
+import logging
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from .dao import DAO, CategoriaDAO, ProdutoDAO
+from .dao_memoria import ArmazemMemoria, CategoriaDAOMemoria, ProdutoDAOMemoria
+from .pool import (BASE_DIR, DEFAULT_DATABASE, configure_connection_pool, configure_reader_pool,
+                   get_connection_pool)
+
+
+class Backend(ABC):
+    """Cria os DAOs de um tipo de armazenamento"""
+
+    # se os DAOs SQL se beneficiam dos caches de leitura e da fila de escrita do DAOFactory
+    usa_cache = True
+    usa_fila_escrita = True
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = dict(config or {})
+
+    def iniciar(self) -> None:
+        """Prepara o armazenamento (pool de conexões, esquema...) antes do primeiro uso"""
+
+    def encerrar(self) -> None:
+        """Libera os recursos do backend quando ele é substituído"""
+
+    @abstractmethod
+    def criar_categoria_dao(self) -> DAO: pass
+
+    @abstractmethod
+    def criar_produto_dao(self) -> DAO: pass
+
+    def descricao(self) -> dict[str, Any]:
+        """Resumo da configuração, para diagnóstico"""
+        return {'engine': type(self).__name__}
+
+
+class BackendSQLite(Backend):
+    """Banco SQLite em arquivo, acessado pelo pool de conexões compartilhado"""
+
+    def __init__(self, config: Optional[dict] = None):
+        super().__init__(config)
+        nome = self.config.get('NAME')
+        self.database = str(BASE_DIR / nome) if nome else DEFAULT_DATABASE
+        self.uri = False
+
+    @property
+    def conexoes_leitura(self) -> int:
+        """Tamanho do pool somente leitura (0: leitura e escrita no mesmo pool)"""
+        return (self.config.get('OPTIONS') or {}).get('read_connections') or 0
+
+    def _parametros_pool(self) -> dict[str, Any]:
+        opcoes = dict(self.config.get('OPTIONS') or {})
+        opcoes.pop('read_connections', None)
+        if 'max_connections' in opcoes:
+            opcoes['max_size'] = opcoes.pop('max_connections')
+        if self.conexoes_leitura:
+            # o SQLite aceita um escritor por vez: mais conexões de escrita só
+            # esperariam pelo lock do banco. A conexão é retirada por bloco (DAOs,
+            # execute_sql, unidades de trabalho, lotes da fila de escrita); somente
+            # get_connection()/DAO.obter_conexao() a vinculam à thread até close_connection()
+            opcoes['max_size'] = 1
+        if self.config.get('PROFILE') is not None:
+            opcoes['profile'] = self.config['PROFILE']
+        return {'database': self.database, 'uri': self.uri, **opcoes}
+
+    def _parametros_leitura(self) -> dict[str, Any]:
+        if not self.conexoes_leitura:
+            return {}
+        escrita = self._parametros_pool()
+        return {'database': self.database, 'uri': self.uri, 'max_size': self.conexoes_leitura,
+                **{chave: escrita[chave] for chave in ('timeout', 'idle_timeout', 'cached_statements', 'profile')
+                   if chave in escrita}}
+
+    def iniciar(self) -> None:
+        pool = get_connection_pool()
+        # sem opções (ou perfil) novas, um pool já apontando para o mesmo banco é
+        # mantido (preserva ajustes feitos com DatabaseConnection.configure())
+        if ((pool.database, pool.uri) != (self.database, self.uri) or self.config.get('OPTIONS')
+                or self.config.get('PROFILE') is not None):
+            pool = configure_connection_pool(**self._parametros_pool())
+            if self.conexoes_leitura:
+                # as conexões somente leitura não criam o arquivo nem mudam o journal_mode
+                with pool.connection():
+                    pass
+            configure_reader_pool(**self._parametros_leitura())
+
+    def criar_categoria_dao(self) -> DAO:
+        return CategoriaDAO()
+
+    def criar_produto_dao(self) -> DAO:
+        return ProdutoDAO()
+
+    def descricao(self) -> dict[str, Any]:
+        return {'engine': type(self).__name__, 'database': self.database,
+                'read_connections': self.conexoes_leitura,
+                'profile': get_connection_pool().stats()['profile']}
+
+
+class BackendSQLiteMemoria(BackendSQLite):
+    """
+    Banco SQLite em memória compartilhado por todas as conexões do pool
+    (URI file:NOME?mode=memory&cache=shared). O esquema é criado pelas migrações
+    em iniciar(), e uma conexão extra fica aberta para que o banco não seja
+    descartado quando o pool fechar as conexões ociosas.
+
+    No modo cache=shared os locks são por tabela: uma escrita concorrente com
+    leituras falha imediatamente com "database table is locked" (o busy_timeout
+    não se aplica), então este backend é indicado para testes, não para produção.
+    Pelo mesmo motivo, read_connections é ignorado (leitura e escrita no mesmo pool).
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        super().__init__(config)
+        nome = self.config.get('NAME') or 'arq_soft'
+        self.database = f"file:{nome}?mode=memory&cache=shared"
+        self.uri = True
+        self._ancora: Optional[sqlite3.Connection] = None
+
+    @property
+    def conexoes_leitura(self) -> int:
+        return 0
+
+    def iniciar(self) -> None:
+        from .migracoes import aplicar_migracoes
+
+        self._ancora = sqlite3.connect(self.database, uri=True, check_same_thread=False)
+        configure_connection_pool(**self._parametros_pool())
+        configure_reader_pool()
+        aplicar_migracoes()
+
+    def encerrar(self) -> None:
+        if self._ancora is not None:
+            self._ancora.close()
+            self._ancora = None
+
+
+class BackendMemoria(Backend):
+    """
+    Dicionários em memória, sem SQLite (ver app.dao_memoria). As leituras e escritas
+    já são feitas na memória, então os caches de leitura e a fila de escrita do
+    DAOFactory não são usados.
+    """
+
+    usa_cache = False
+    usa_fila_escrita = False
+
+    def __init__(self, config: Optional[dict] = None):
+        super().__init__(config)
+        self.armazem = ArmazemMemoria()
+
+    def criar_categoria_dao(self) -> DAO:
+        return CategoriaDAOMemoria(self.armazem)
+
+    def criar_produto_dao(self) -> DAO:
+        return ProdutoDAOMemoria(self.armazem)
+
+    def carregar(self, categoria_dao: DAO, produto_dao: DAO) -> None:
+        """
+        Copia para a memória todas as categorias e produtos de outros DAOs (ex.: os
+        do SQLite), mantendo os ids, para servir leituras sem acessar o banco.
+        """
+        categorias = list(categoria_dao.iterar_todos())
+        produtos = list(produto_dao.iterar_todos())
+        armazem = self.armazem
+        with armazem.lock:
+            armazem.limpar()
+            for categoria in categorias:
+                armazem.categorias[categoria.id] = categoria.descricao
+                armazem.reservar_id('Categoria', categoria.id)
+            for produto in produtos:
+                armazem.produtos[produto.id] = ProdutoDAOMemoria._linha(produto)
+                armazem.reservar_id('Produto', produto.id)
+        logging.info(f"Backend em memória carregado: {len(categorias)} categorias, "
+                     f"{len(produtos)} produtos")
+
+    def descricao(self) -> dict[str, Any]:
+        with self.armazem.lock:
+            return {'engine': type(self).__name__, 'categorias': len(self.armazem.categorias),
+                    'produtos': len(self.armazem.produtos)}
+
+
+BACKENDS: dict[str, type[Backend]] = {
+    'sqlite': BackendSQLite,
+    'sqlite_memoria': BackendSQLiteMemoria,
+    'memoria': BackendMemoria,
+}
+
+
+def criar_backend(config: Optional[dict] = None) -> Backend:
+    """Cria o backend descrito pela configuração (ver a documentação do módulo)"""
+    config = dict(config or {})
+    engine = config.get('ENGINE', 'sqlite')
+    classe = BACKENDS.get(engine)
+    if classe is None:
+        if '.' not in engine:
+            raise ValueError(f"Backend de DAO desconhecido: {engine} "
+                             f"(disponíveis: {', '.join(BACKENDS)})")
+        modulo, nome = engine.rsplit('.', 1)
+        classe = getattr(importlib.import_module(modulo), nome)
+    return classe(config)
@@ -0,0 +1,98 @@
+"""
+Cache em memória usado pela camada DAO
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Hashable
+
+
+class CacheLRU:
+    """
+    Cache em memória com descarte LRU (menos usado recentemente) e expiração por tempo (TTL).
+    Thread-safe; mantém contadores de acertos e falhas.
+
+    Cada invalidação avança a geração do cache. Quem lê do banco após uma falha
+    informa a geração anterior à leitura em guardar(); se houve uma invalidação no
+    meio (uma escrita concorrente), o valor possivelmente antigo é descartado.
+    """
+
+    def __init__(self, max_itens: int = 1000, ttl: Optional[float] = 300.0):
+        if max_itens < 1:
+            raise ValueError("O tamanho máximo do cache deve ser maior que zero")
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # chave -> (valor, instante de expiração)
+        self._itens: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._geracao = 0
+        self._descartados = 0
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        """Retorna o valor guardado para a chave, ou padrao se ausente/expirado"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self._misses += 1
+                return padrao
+            valor, expira_em = item
+            if expira_em is not None and expira_em <= time.monotonic():
+                del self._itens[chave]
+                self._expirations += 1
+                self._misses += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self._hits += 1
+            return valor
+
+    def geracao(self) -> int:
+        """Retorna a geração atual (avançada a cada invalidação)"""
+        with self._lock:
+            return self._geracao
+
+    def guardar(self, chave: Hashable, valor: Any, geracao: Optional[int] = None) -> None:
+        """
+        Guarda o valor, descartando o item menos usado se o cache estiver cheio.
+        Com geracao, não guarda nada se o cache foi invalidado desde então.
+        """
+        expira_em = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if geracao is not None and geracao != self._geracao:
+                self._descartados += 1
+                return
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self._evictions += 1
+
+    def invalidar(self, chave: Optional[Hashable] = None) -> None:
+        """Remove uma chave do cache ou, se nenhuma for informada, todo o conteúdo"""
+        with self._lock:
+            if chave is None:
+                self._itens.clear()
+            else:
+                self._itens.pop(chave, None)
+            self._invalidations += 1
+            self._geracao += 1
+
+    def stats(self) -> dict:
+        """Retorna as estatísticas de uso do cache"""
+        with self._lock:
+            consultas = self._hits + self._misses
+            return {
+                'size': len(self._itens),
+                'max_size': self.max_itens,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / consultas if consultas else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+                'stale_discards': self._descartados,
+            }
@@ -0,0 +1,241 @@
+"""
+Registro central dos comandos SQL usados pelos DAOs
+
+Cada comando tem um nome e um texto SQL fixo. O módulo sqlite3 guarda em cada
+conexão um cache dos comandos já preparados (compilados) indexado pelo texto do
+SQL (cached_statements, configurado pelo pool); como os DAOs sempre enviam
+exatamente o mesmo texto para o mesmo comando, cada comando é preparado uma única
+vez por conexão e as execuções seguintes reaproveitam a versão compilada.
+
+O registro mantém contadores de execuções e uma estimativa de quantas delas
+precisaram preparar o comando (falhas no cache de comandos da conexão).
+"""
+import threading
+from typing import Any, Callable, Dict, NamedTuple
+
+
+class Comando(NamedTuple):
+    """Comando SQL registrado (nome e texto)"""
+    nome: str
+    sql: str
+
+    def __str__(self) -> str:
+        return self.sql
+
+
+class RegistroDeComandos:
+    """
+    Comandos SQL nomeados, compartilhados por todos os DAOs.
+    Thread-safe; as estatísticas são acumuladas por comando.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._comandos: Dict[str, Comando] = {}
+        # nome -> [execuções, preparações]
+        self._contadores: Dict[str, list] = {}
+
+    def registrar(self, nome: str, sql: str) -> Comando:
+        """Registra um comando; registrar de novo o mesmo nome com outro SQL é um erro"""
+        sql = sql.strip()
+        with self._lock:
+            existente = self._comandos.get(nome)
+            if existente is not None:
+                if existente.sql != sql:
+                    raise ValueError(f"Comando SQL '{nome}' já registrado com outro texto")
+                return existente
+            comando = Comando(nome, sql)
+            self._comandos[nome] = comando
+            self._contadores[nome] = [0, 0]
+            return comando
+
+    def derivar(self, base: Comando, variante: str, construir: Callable[[str], str]) -> Comando:
+        """
+        Retorna uma variante de um comando (ex.: a mesma consulta com WHERE/ORDER BY
+        de paginação), montando e registrando o SQL somente na primeira vez.
+        """
+        nome = f"{base.nome}[{variante}]"
+        comando = self._comandos.get(nome)
+        if comando is None:
+            comando = self.registrar(nome, construir(base.sql))
+        return comando
+
+    def __getitem__(self, nome: str) -> Comando:
+        try:
+            return self._comandos[nome]
+        except KeyError:
+            raise KeyError(f"Comando SQL não registrado: {nome}") from None
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self._comandos
+
+    def __len__(self) -> int:
+        return len(self._comandos)
+
+    def registrar_execucao(self, conexao: Any, comando: Comando) -> None:
+        """
+        Contabiliza uma execução do comando na conexão informada.
+        Conexões do pool (PooledConnection) espelham o cache LRU de comandos preparados do
+        sqlite3, o que permite estimar se a execução reaproveitou o comando compilado.
+        """
+        preparados = getattr(conexao, 'comandos_preparados', None)
+        with self._lock:
+            contadores = self._contadores[comando.nome]
+            contadores[0] += 1
+            if preparados is None:
+                return
+            if comando.sql in preparados:
+                preparados.move_to_end(comando.sql)
+                return
+            contadores[1] += 1
+            preparados[comando.sql] = None
+            while len(preparados) > conexao.cached_statements:
+                preparados.popitem(last=False)
+
+    def zerar_estatisticas(self) -> None:
+        with self._lock:
+            for contadores in self._contadores.values():
+                contadores[0] = contadores[1] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna as estatísticas de uso dos comandos e do cache de comandos preparados"""
+        with self._lock:
+            execucoes = sum(c[0] for c in self._contadores.values())
+            preparacoes = sum(c[1] for c in self._contadores.values())
+            return {
+                'statements': len(self._comandos),
+                'executions': execucoes,
+                'prepares': preparacoes,
+                'cache_hits': execucoes - preparacoes,
+                'hit_rate': (execucoes - preparacoes) / execucoes if execucoes else 0.0,
+                'por_comando': {nome: {'executions': c[0], 'prepares': c[1]}
+                                for nome, c in self._contadores.items() if c[0]},
+            }
+
+
+COMANDOS = RegistroDeComandos()
+
+
+# ---------------------------------------------------------------------------
+# Comandos gerais
+
+COMANDOS.registrar('ultimo_id', "SELECT last_insert_rowid()")
+COMANDOS.registrar('tabela_existe', "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?")
+COMANDOS.registrar('gatilho_sql', "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?")
+# gatilhos suspensos na transação atual (migração 0005), usados pelas inclusões em lote
+COMANDOS.registrar('gatilho.suspender', "INSERT INTO gatilho_suspenso(nome) VALUES (?)")
+COMANDOS.registrar('gatilho.reativar', "DELETE FROM gatilho_suspenso WHERE nome = ?")
+
+# ---------------------------------------------------------------------------
+# Categoria
+
+COMANDOS.registrar('categoria.incluir', "INSERT INTO Categoria(descricao) VALUES(?)")
+COMANDOS.registrar('categoria.incluir_retornando_id', "INSERT INTO Categoria(descricao) VALUES(?) RETURNING id")
+# inclusão/alteração condicionadas à descrição única: a verificação e a escrita são um só comando
+COMANDOS.registrar('categoria.incluir_unica', """INSERT INTO Categoria(descricao)
+                 SELECT ? WHERE NOT EXISTS (SELECT 1 FROM Categoria WHERE descricao = ?)
+                 RETURNING id""")
+COMANDOS.registrar('categoria.alterar', "UPDATE Categoria SET descricao = ? WHERE id = ?")
+COMANDOS.registrar('categoria.alterar_unica', """UPDATE Categoria SET descricao = ?
+                 WHERE id = ? AND NOT EXISTS (SELECT 1 FROM Categoria WHERE descricao = ? AND id != ?)""")
+COMANDOS.registrar('categoria.excluir', "DELETE FROM Categoria WHERE id = ?")
+COMANDOS.registrar('categoria.excluir_sem_produtos', """DELETE FROM Categoria
+                 WHERE id = ? AND NOT EXISTS (SELECT 1 FROM Produto WHERE categoria_id = ?)""")
+# por que uma escrita condicionada não afetou nenhuma linha: (categoria existe?, produtos vinculados)
+COMANDOS.registrar('categoria.situacao', """SELECT EXISTS (SELECT 1 FROM Categoria WHERE id = ?),
+                        (SELECT COUNT(*) FROM Produto WHERE categoria_id = ?)""")
+COMANDOS.registrar('categoria.selecionar', "SELECT id, descricao FROM Categoria")
+COMANDOS.registrar('categoria.selecionar_todos', "SELECT id, descricao FROM Categoria ORDER BY descricao")
+COMANDOS.registrar('categoria.selecionar_um', "SELECT id, descricao FROM Categoria WHERE id = ?")
+COMANDOS.registrar('categoria.existe_descricao',
+                   "SELECT EXISTS (SELECT 1 FROM Categoria WHERE descricao = ?)")
+COMANDOS.registrar('categoria.existe_descricao_outra',
+                   "SELECT EXISTS (SELECT 1 FROM Categoria WHERE descricao = ? AND id != ?)")
+
+# ---------------------------------------------------------------------------
+# Produto
+
+# colunas do produto + descrição da categoria, na ordem esperada por ProdutoDAO._criar_produto
+_SELECT_PRODUTO = """SELECT p.id, p.descricao, p.preco_unitario, p.quantidade_estoque,
+                        p.categoria_id, c.descricao as categoria_descricao
+                 FROM Produto p
+                 INNER JOIN Categoria c ON c.id = p.categoria_id"""
+
+COMANDOS.registrar('produto.incluir', """INSERT INTO Produto (descricao, preco_unitario, quantidade_estoque, categoria_id)
+                 VALUES (?, ?, ?, ?)""")
+COMANDOS.registrar('produto.incluir_retornando_id', """INSERT INTO Produto (descricao, preco_unitario, quantidade_estoque, categoria_id)
+                 VALUES (?, ?, ?, ?)
+                 RETURNING id""")
+# indexa na busca textual, de uma vez, os produtos de um bloco recém-incluído (ids consecutivos)
+COMANDOS.registrar('produto.indexar_intervalo', """INSERT INTO produto_busca(rowid, descricao)
+                 SELECT id, descricao FROM Produto WHERE id BETWEEN ? AND ?""")
+COMANDOS.registrar('produto.alterar', """UPDATE Produto
+                 SET descricao = ?, preco_unitario = ?, quantidade_estoque = ?, categoria_id = ?
+                 WHERE id = ?""")
+COMANDOS.registrar('produto.excluir', "DELETE FROM Produto WHERE id = ?")
+COMANDOS.registrar('produto.selecionar', _SELECT_PRODUTO)
+COMANDOS.registrar('produto.selecionar_todos', f"""{_SELECT_PRODUTO}
+                 ORDER BY p.descricao""")
+COMANDOS.registrar('produto.selecionar_um', f"""{_SELECT_PRODUTO}
+                 WHERE p.id = ?""")
+COMANDOS.registrar('produto.selecionar_por_categoria', f"""{_SELECT_PRODUTO}
+                 WHERE p.categoria_id = ?
+                 ORDER BY p.descricao""")
+# "+p.descricao" impede que o SQLite satisfaça o ORDER BY percorrendo todo o
+# idx_produto_descricao: a faixa em idx_produto_quantidade_estoque conduz a consulta
+# e só as poucas linhas com estoque baixo são ordenadas (verificado por app.migracoes.planos)
+COMANDOS.registrar('produto.selecionar_estoque_baixo', f"""{_SELECT_PRODUTO}
+                 WHERE p.quantidade_estoque < ?
+                 ORDER BY +p.descricao""")
+COMANDOS.registrar('produto.buscar_like', f"""{_SELECT_PRODUTO}
+                 WHERE p.descricao LIKE ?
+                 ORDER BY p.descricao
+                 LIMIT ?""")
+COMANDOS.registrar('produto.buscar_textual', """SELECT p.id, p.descricao, p.preco_unitario, p.quantidade_estoque,
+                        p.categoria_id, c.descricao as categoria_descricao
+                 FROM (SELECT rowid, bm25(produto_busca) AS relevancia
+                       FROM produto_busca
+                       WHERE produto_busca MATCH ?
+                       ORDER BY relevancia
+                       LIMIT ?) b
+                 INNER JOIN Produto p ON p.id = b.rowid
+                 INNER JOIN Categoria c ON c.id = p.categoria_id
+                 ORDER BY b.relevancia, p.descricao""")
+# TOTAL() ignora produtos sem quantidade (NULL) e retorna 0.0 para a tabela vazia;
+# o JOIN mantém o mesmo conjunto de produtos das listagens
+COMANDOS.registrar('produto.valor_total_estoque', """SELECT TOTAL(p.preco_unitario * p.quantidade_estoque)
+                 FROM Produto p
+                 INNER JOIN Categoria c ON c.id = p.categoria_id""")
+# agrega a tabela de produtos em uma única passada e só depois junta as categorias
+COMANDOS.registrar('produto.resumo_por_categoria', """SELECT c.id, c.descricao,
+                        COALESCE(t.quantidade_produtos, 0),
+                        COALESCE(t.quantidade_estoque, 0),
+                        COALESCE(t.valor_total, 0.0),
+                        COALESCE(t.estoque_baixo, 0)
+                 FROM Categoria c
+                 LEFT JOIN (SELECT categoria_id,
+                                   COUNT(*) AS quantidade_produtos,
+                                   TOTAL(quantidade_estoque) AS quantidade_estoque,
+                                   TOTAL(preco_unitario * quantidade_estoque) AS valor_total,
+                                   TOTAL(quantidade_estoque < ?) AS estoque_baixo
+                            FROM Produto
+                            GROUP BY categoria_id) t ON t.categoria_id = c.id
+                 ORDER BY c.descricao""")
+# colunas numéricas para a análise de estoque (app.analise_estoque), na ordem do id; sem
+# o JOIN com Categoria (mais lento que a consulta inteira), e quantidade NULL chega como None
+COMANDOS.registrar('produto.colunas_estoque', """SELECT id, preco_unitario, quantidade_estoque, categoria_id
+                 FROM Produto
+                 WHERE id > ?
+                 ORDER BY id""")
+# os ids chegam como um array JSON: um único comando preparado para qualquer quantidade
+COMANDOS.registrar('produto.colunas_estoque_por_ids', """SELECT id, preco_unitario, quantidade_estoque, categoria_id
+                 FROM Produto
+                 WHERE id IN (SELECT value FROM json_each(?))
+                 ORDER BY id""")
+# cada subconsulta é resolvida pela chave primária (MIN e MAX juntos percorreriam a tabela)
+COMANDOS.registrar('produto.faixa_alteracoes', """SELECT (SELECT MIN(seq) FROM produto_alteracao),
+                        (SELECT MAX(seq) FROM produto_alteracao)""")
+COMANDOS.registrar('produto.alterados', """SELECT DISTINCT produto_id
+                 FROM produto_alteracao
+                 WHERE seq > ? AND seq <= ?""")
+COMANDOS.registrar('produto.descartar_alteracoes', "DELETE FROM produto_alteracao WHERE seq <= ?")
@@ -1,16 +1,110 @@
 
 
-from typing import Any, Optional
+from typing import Any, Optional, Iterable, Iterator, Callable, Hashable
+from itertools import chain, islice
+from dataclasses import dataclass, field
 from .dominio import *
+from .singleton import get_database_connection
+from .transacao import unidade_atual
+from .cache import CacheLRU
+from .identidade import MapaDeIdentidade
+from .comandos import COMANDOS, Comando
+from .assincrono import DAOAssincrono
+from .instrumentacao import MONITOR
 from abc import ABC, abstractmethod
 import sqlite3
 import logging
+import base64
+import re
+import json
+import copy
+import time
+import threading
+
+
+@dataclass
+class Pagina:
+    """Página de uma listagem paginada por chave (keyset)"""
+    registros: list = field(default_factory=list)
+    # cursores opacos para a próxima página e para a página anterior (None se não houver)
+    proximo: Optional[str] = None
+    anterior: Optional[str] = None
+
+
+def codificar_cursor(direcao: str, chave: tuple) -> str:
+    """Gera o cursor opaco de paginação a partir da direção e da chave (descricao, id)"""
+    texto = json.dumps([direcao, *chave], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str) -> tuple[str, tuple]:
+    """Recupera a direção e a chave (descricao, id) de um cursor de paginação"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        direcao, descricao, id = json.loads(texto)
+        if direcao not in ('>', '<') or not isinstance(descricao, str) or not isinstance(id, int):
+            raise ValueError
+        return direcao, (descricao, id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginação inválido")
+
+
+def consulta_busca_textual(termo: str) -> str:
+    """
+    Converte o texto digitado pelo usuário em uma consulta FTS5: cada palavra vira
+    um prefixo entre aspas ("note"*), o que também neutraliza a sintaxe do FTS5
+    (AND, OR, NEAR, parênteses, etc.) que venha no texto.
+    """
+    return ' '.join(f'"{palavra}"*' for palavra in re.findall(r'\w+', termo))
+
+
+def mapa_da_unidade() -> Optional[MapaDeIdentidade]:
+    """
+    Retorna o mapa de identidade da unidade de trabalho ativa, se ela tiver sido
+    aberta com mapa_identidade=True (o único que dura além de uma consulta)
+    """
+    unidade = unidade_atual()
+    return unidade.raiz.mapa_identidade if unidade is not None else None
+
+
+def mapa_identidade() -> MapaDeIdentidade:
+    """
+    Retorna o mapa de identidade a usar em uma consulta: o da unidade de trabalho
+    ativa, se ela tiver sido aberta com mapa_identidade=True, ou um novo mapa
+    válido apenas para a consulta.
+    """
+    mapa = mapa_da_unidade()
+    return mapa if mapa is not None else MapaDeIdentidade()
+
+
+def sincronizar_categoria(id: int, descricao: Optional[str]) -> None:
+    """
+    Reflete uma escrita na categoria no mapa de identidade da unidade de trabalho:
+    a alteração muda a descrição do objeto já entregue às consultas da unidade (que
+    continua sendo o único objeto dessa categoria) e a exclusão (descricao None)
+    o retira do mapa. Fora de uma unidade com mapa não há nada a atualizar.
+    """
+    mapa = mapa_da_unidade()
+    if mapa is None:
+        return
+    if descricao is None:
+        mapa.remover(Categoria, id)
+    else:
+        mapa.atualizar_categoria(id, descricao)
 
 
 class DAO(ABC):
 
     _conexao: sqlite3.Connection
 
+    # quantidade padrão de registros enviados por executemany() nas inclusões em lote
+    TAMANHO_LOTE = 1000
+    # quantidade padrão de registros trazidos por fetchmany() nas leituras em fluxo
+    TAMANHO_LOTE_LEITURA = 500
+    # tamanho padrão e máximo das páginas nas listagens paginadas
+    TAMANHO_PAGINA = 20
+    TAMANHO_PAGINA_MAXIMO = 100
+
     @abstractmethod
     def incluir(self, obj: Any): pass
 
@@ -27,87 +121,316 @@ class DAO(ABC):
     def selecionar_um(self, id: int) -> Optional[Any]: pass
 
     def obter_conexao(self) -> sqlite3.Connection:
-        """Obtém uma conexão com o banco de dados SQLite"""
+        """
+        Obtém a conexão da thread atual com o banco de dados SQLite. A conexão fica
+        vinculada à thread até fechar_conexao(); com leitura e escrita separadas ela é
+        a única de escrita, então prefira get_database_connection().conexao() (devolvida
+        ao final do bloco) e libere esta logo após o uso.
+        """
         try:
-            self._conexao = sqlite3.connect('arq_soft.sqlite3')
-            # Habilita verificação de chaves estrangeiras
-            self._conexao.execute("PRAGMA foreign_keys = ON")
+            # a conexão vem do Singleton, já configurada (PRAGMAs) pelo pool
+            self._conexao = get_database_connection().get_connection()
             return self._conexao
         except sqlite3.Error as e:
             logging.error(f"Erro ao conectar com o banco de dados: {e}")
             raise
 
     def fechar_conexao(self):
-        """Fecha a conexão com o banco de dados"""
+        """Libera a conexão da thread atual, devolvendo-a ao pool"""
         try:
             if hasattr(self, '_conexao') and self._conexao is not None:
-                self._conexao.close()
+                get_database_connection().close_connection()
+                self._conexao = None
         except sqlite3.Error as e:
             logging.error(f"Erro ao fechar conexão: {e}")
 
-    def executar_sql(self, sql: str, parametros: tuple = (), commit: bool = True) -> Any:
+    @staticmethod
+    def _texto_sql(conexao: sqlite3.Connection, sql: 'str | Comando') -> str:
+        """Retorna o texto do SQL, contabilizando a execução se for um comando registrado"""
+        if isinstance(sql, Comando):
+            COMANDOS.registrar_execucao(conexao, sql)
+            return sql.sql
+        return sql
+
+    def executar_sql(self, sql: 'str | Comando', parametros: tuple = (), commit: bool = True) -> Any:
         """Executa um comando SQL no BD (geralmente um INSERT, UPDATE ou DELETE)"""
-        conexao = None
-        try:
-            # obtém conexão
-            conexao = self.obter_conexao()
-            # cria um cursor() e executa o SQL informado
-            cursor = conexao.cursor()
-            ret = cursor.execute(sql, parametros)
-            # verifica se é para efetivar as modificações no BD
-            if commit:
-                conexao.commit()
-            # retorna o resultado do método execute()
-            return ret 
-        except sqlite3.Error as e:
-            if conexao and commit:
-                conexao.rollback()
-            logging.error(f"Erro ao executar SQL: {sql} - Erro: {e}")
-            raise
-        finally:
-            if conexao:
-                conexao.close()
+        # dentro de uma unidade de trabalho, o commit é feito pela própria unidade
+        commit = commit and unidade_atual() is None
+        # obtém a conexão da thread atual (devolvida ao pool ao final do bloco)
+        with get_database_connection().conexao() as conexao:
+            try:
+                # cria um cursor() e executa o SQL informado
+                cursor = conexao.cursor()
+                with MONITOR.medir(sql, parametros) as medicao:
+                    ret = cursor.execute(self._texto_sql(conexao, sql), parametros)
+                    # verifica se é para efetivar as modificações no BD
+                    if commit:
+                        conexao.commit()
+                    medicao.linhas = ret.rowcount
+                # retorna o resultado do método execute()
+                return ret 
+            except sqlite3.Error as e:
+                if commit:
+                    conexao.rollback()
+                logging.error(f"Erro ao executar SQL: {sql} - Erro: {e}")
+                raise
+
+    def executar_retornando(self, sql: 'str | Comando', parametros: tuple = ()) -> list[Any]:
+        """
+        Executa um comando com RETURNING (INSERT/UPDATE/DELETE) e retorna os registros
+        produzidos por ele. Os registros são lidos antes do commit.
+        """
+        # dentro de uma unidade de trabalho, o commit é feito pela própria unidade
+        commit = unidade_atual() is None
+        with get_database_connection().conexao() as conexao:
+            try:
+                cursor = conexao.cursor()
+                with MONITOR.medir(sql, parametros) as medicao:
+                    ret = cursor.execute(self._texto_sql(conexao, sql), parametros).fetchall()
+                    if commit:
+                        conexao.commit()
+                    medicao.linhas = len(ret)
+                return ret
+            except sqlite3.Error as e:
+                if commit:
+                    conexao.rollback()
+                logging.error(f"Erro ao executar SQL: {sql} - Erro: {e}")
+                raise
 
-    def executar_select(self, sql: str, parametros: tuple = ()) -> list[Any]:
+    def executar_select(self, sql: 'str | Comando', parametros: tuple = ()) -> list[Any]:
         """Executa um comando SELECT no BD e retorna os registros"""
-        conexao = None
-        try:
-            # obtém conexão
-            conexao = self.obter_conexao()
-            # cria um cursor(), executa o SELECT informado e traz todos os registros
+        # obtém uma conexão de leitura (devolvida ao pool ao final do bloco)
+        with get_database_connection().conexao_leitura() as conexao:
+            try:
+                # cria um cursor(), executa o SELECT informado e traz todos os registros
+                cursor = conexao.cursor()
+                with MONITOR.medir(sql, parametros) as medicao:
+                    ret = cursor.execute(self._texto_sql(conexao, sql), parametros).fetchall()
+                    medicao.linhas = len(ret)
+                # retorna os registros do BD
+                return ret 
+            except sqlite3.Error as e:
+                logging.error(f"Erro ao executar SELECT: {sql} - Erro: {e}")
+                raise
+
+    def iterar_select(self, sql: 'str | Comando', parametros: tuple = (),
+                      tamanho_lote: Optional[int] = None) -> Iterator[Any]:
+        """
+        Executa um comando SELECT no BD e retorna os registros sob demanda (gerador),
+        buscando-os em blocos de tamanho_lote com fetchmany().
+        A conexão fica em uso até o gerador ser esgotado ou fechado.
+        """
+        tamanho_lote = tamanho_lote or self.TAMANHO_LOTE_LEITURA
+        # mede somente o tempo gasto no banco (execute/fetchmany), não o do consumidor
+        duracao = 0.0
+        linhas = 0
+        erro = False
+        with get_database_connection().conexao_leitura() as conexao:
             cursor = conexao.cursor()
-            ret = cursor.execute(sql, parametros).fetchall()
-            # retorna os registros do BD
-            return ret 
-        except sqlite3.Error as e:
-            logging.error(f"Erro ao executar SELECT: {sql} - Erro: {e}")
-            raise
-        finally:
-            if conexao:
-                conexao.close()
+            try:
+                inicio = time.perf_counter()
+                cursor.execute(self._texto_sql(conexao, sql), parametros)
+                while True:
+                    registros = cursor.fetchmany(tamanho_lote)
+                    duracao += time.perf_counter() - inicio
+                    if not registros:
+                        break
+                    linhas += len(registros)
+                    yield from registros
+                    inicio = time.perf_counter()
+            except sqlite3.Error as e:
+                erro = True
+                logging.error(f"Erro ao executar SELECT: {sql} - Erro: {e}")
+                raise
+            finally:
+                cursor.close()
+                if MONITOR.ativo:
+                    MONITOR.registrar(sql, parametros, duracao * 1000, linhas, erro)
+
+    def executar_pagina(self, sql: Comando, colunas_chave: tuple[str, str], cursor: Optional[str] = None,
+                        tamanho: Optional[int] = None) -> Pagina:
+        """
+        Executa um SELECT paginado por chave (keyset), ordenado por colunas_chave
+        (descricao, id). O comando não deve ter WHERE nem ORDER BY, e as duas primeiras
+        colunas selecionadas devem ser id e descricao.
+        Em vez de OFFSET, cada página continua a partir da chave do último (ou
+        primeiro) registro da página anterior, então o custo não cresce com o
+        número da página.
+        """
+        tamanho = min(max(tamanho or self.TAMANHO_PAGINA, 1), self.TAMANHO_PAGINA_MAXIMO)
+        col_descricao, col_id = colunas_chave
+        parametros: tuple = ()
+        direcao = '>'
+        if cursor:
+            direcao, chave = decodificar_cursor(cursor)
+            parametros = chave
+
+        def montar(texto: str) -> str:
+            if cursor:
+                texto += f" WHERE ({col_descricao}, {col_id}) {direcao} (?, ?)"
+            ordem = "ASC" if direcao == '>' else "DESC"
+            return texto + f" ORDER BY {col_descricao} {ordem}, {col_id} {ordem} LIMIT ?"
+
+        # cada variante (primeira página, avançar, voltar) vira um comando registrado
+        sql = COMANDOS.derivar(sql, direcao if cursor else 'inicio', montar)
+        # busca um registro a mais para saber se existe outra página nessa direção
+        registros = self.executar_select(sql, parametros + (tamanho + 1,))
+        ha_mais = len(registros) > tamanho
+        registros = registros[:tamanho]
+        if direcao == '<':
+            registros.reverse()
+
+        pagina = Pagina(registros=registros)
+        if registros:
+            primeiro, ultimo = registros[0], registros[-1]
+            if (direcao == '>' and ha_mais) or direcao == '<':
+                pagina.proximo = codificar_cursor('>', (ultimo[1], ultimo[0]))
+            if (direcao == '<' and ha_mais) or (direcao == '>' and cursor):
+                pagina.anterior = codificar_cursor('<', (primeiro[1], primeiro[0]))
+        return pagina
+
+    def executar_lote(self, sql: 'str | Comando', objetos: Iterable[Any], parametros: Callable[[Any], tuple],
+                      tamanho_lote: Optional[int] = None, suspender_gatilhos: tuple[str, ...] = (),
+                      apos_bloco: Optional[Callable[[sqlite3.Cursor, int, int], None]] = None) -> list[int]:
+        """
+        Executa um INSERT para cada objeto informado em uma única transação.
+        Os objetos são consumidos em blocos de tamanho_lote (aceita geradores sem
+        carregar tudo na memória) e cada bloco é enviado com executemany().
+        Preenche o id de cada objeto e retorna a lista de ids gerados. Se um bloco
+        falhar, a transação inteira é desfeita (fora de uma unidade de trabalho) e os
+        ids já preenchidos nos objetos dos blocos anteriores deixam de valer.
+
+        Os gatilhos em suspender_gatilhos não disparam durante a inclusão: ficam
+        marcados na tabela gatilho_suspenso (migração 0005) dentro da mesma transação,
+        e a marcação é removida antes do commit (nenhuma outra conexão a vê, e um
+        rollback a desfaz). apos_bloco(cursor, primeiro_id, ultimo_id) faz, por bloco,
+        o trabalho deles.
+        """
+        tamanho_lote = tamanho_lote or self.TAMANHO_LOTE
+        if tamanho_lote < 1:
+            raise ValueError("O tamanho do lote deve ser maior que zero")
+        ids = []
+        iterador = iter(objetos)
+        # dentro de uma unidade de trabalho, o commit é feito pela própria unidade
+        commit = unidade_atual() is None
+        with get_database_connection().conexao() as conexao:
+            suspensos = False
+            try:
+                cursor = conexao.cursor()
+                if suspender_gatilhos:
+                    cursor.executemany(self._texto_sql(conexao, COMANDOS['gatilho.suspender']),
+                                       [(nome,) for nome in suspender_gatilhos])
+                    suspensos = True
+                while True:
+                    bloco = list(islice(iterador, tamanho_lote))
+                    if not bloco:
+                        break
+                    with MONITOR.medir(sql) as medicao:
+                        cursor.executemany(self._texto_sql(conexao, sql), [parametros(obj) for obj in bloco])
+                        medicao.linhas = len(bloco)
+                    # as tabelas usam AUTOINCREMENT e a transação mantém o lock de escrita,
+                    # então os ids do bloco são sequenciais e terminam em last_insert_rowid()
+                    ultimo = cursor.execute(self._texto_sql(conexao, COMANDOS['ultimo_id'])).fetchone()[0]
+                    for id, obj in zip(range(ultimo - len(bloco) + 1, ultimo + 1), bloco):
+                        obj.id = id
+                        ids.append(id)
+                    if apos_bloco is not None:
+                        apos_bloco(cursor, ultimo - len(bloco) + 1, ultimo)
+                if suspensos:
+                    self._reativar_gatilhos(cursor, suspender_gatilhos)
+                    suspensos = False
+                # efetiva todos os blocos de uma só vez
+                if commit:
+                    conexao.commit()
+                return ids
+            except sqlite3.Error as e:
+                if commit:
+                    conexao.rollback()
+                logging.error(f"Erro ao executar SQL em lote: {sql} - Erro: {e}")
+                raise
+            finally:
+                # dentro de uma unidade de trabalho a transação continua após o erro
+                if suspensos and conexao.in_transaction:
+                    self._reativar_gatilhos(conexao.cursor(), suspender_gatilhos)
+
+    def _reativar_gatilhos(self, cursor: sqlite3.Cursor, nomes: tuple[str, ...]) -> None:
+        """Remove a marcação de suspensão dos gatilhos informados (transação atual)"""
+        cursor.executemany(self._texto_sql(cursor.connection, COMANDOS['gatilho.reativar']),
+                           [(nome,) for nome in nomes])
     
 
 class CategoriaDAO(DAO):
     """DAO para operações com a entidade Categoria"""
     
     def incluir(self, obj: Categoria) -> None:
-        """Inclui uma nova categoria no banco de dados"""
-        sql = "INSERT INTO Categoria(descricao) VALUES(?)"
-        self.executar_sql(sql, (obj.descricao,))
+        """Inclui uma nova categoria no banco de dados e preenche o id gerado"""
+        sql = COMANDOS['categoria.incluir_retornando_id']
+        obj.id = self.executar_retornando(sql, (obj.descricao,))[0][0]
+
+    def incluir_unica(self, obj: Categoria) -> bool:
+        """
+        Inclui a categoria somente se não existir outra com a mesma descrição
+        (verificação e inclusão em um único comando). Retorna se a categoria foi incluída.
+        """
+        sql = COMANDOS['categoria.incluir_unica']
+        registros = self.executar_retornando(sql, (obj.descricao, obj.descricao))
+        if not registros:
+            return False
+        obj.id = registros[0][0]
+        return True
+
+    def incluir_lote(self, objs: Iterable[Categoria], tamanho_lote: Optional[int] = None) -> list[int]:
+        """Inclui várias categorias em uma única transação e retorna os ids gerados"""
+        sql = COMANDOS['categoria.incluir']
+        return self.executar_lote(sql, objs, lambda obj: (obj.descricao,), tamanho_lote)
 
-    def alterar(self, obj: Categoria) -> None:
-        """Altera uma categoria existente no banco de dados"""
-        sql = "UPDATE Categoria SET descricao = ? WHERE id = ?"
-        self.executar_sql(sql, (obj.descricao, obj.id))
+    def alterar(self, obj: Categoria) -> bool:
+        """Altera uma categoria existente no banco de dados. Retorna se ela foi encontrada"""
+        sql = COMANDOS['categoria.alterar']
+        alterada = self.executar_sql(sql, (obj.descricao, obj.id)).rowcount > 0
+        if alterada:
+            sincronizar_categoria(obj.id, obj.descricao)
+        return alterada
 
-    def excluir(self, obj: Categoria) -> None:
-        """Exclui uma categoria do banco de dados"""
-        sql = "DELETE FROM Categoria WHERE id = ?"
-        self.executar_sql(sql, (obj.id,))
+    def alterar_unica(self, obj: Categoria) -> bool:
+        """
+        Altera a categoria somente se nenhuma outra tiver a nova descrição.
+        Retorna False se a categoria não existe ou se a descrição já está em uso
+        (use situacao() para saber qual dos dois).
+        """
+        sql = COMANDOS['categoria.alterar_unica']
+        alterada = self.executar_sql(sql, (obj.descricao, obj.id, obj.descricao, obj.id)).rowcount > 0
+        if alterada:
+            sincronizar_categoria(obj.id, obj.descricao)
+        return alterada
+
+    def excluir(self, obj: Categoria) -> bool:
+        """Exclui uma categoria do banco de dados. Retorna se ela foi encontrada"""
+        sql = COMANDOS['categoria.excluir']
+        excluida = self.executar_sql(sql, (obj.id,)).rowcount > 0
+        if excluida:
+            sincronizar_categoria(obj.id, None)
+        return excluida
+
+    def excluir_sem_produtos(self, id: int) -> bool:
+        """
+        Exclui a categoria somente se ela não tiver produtos vinculados.
+        Retorna False se a categoria não existe ou se tem produtos (ver situacao()).
+        """
+        sql = COMANDOS['categoria.excluir_sem_produtos']
+        excluida = self.executar_sql(sql, (id, id)).rowcount > 0
+        if excluida:
+            sincronizar_categoria(id, None)
+        return excluida
+
+    def situacao(self, id: int) -> tuple[bool, int]:
+        """Retorna se a categoria existe e quantos produtos estão vinculados a ela"""
+        existe, produtos = self.executar_select(COMANDOS['categoria.situacao'], (id, id))[0]
+        return bool(existe), produtos
 
     def selecionar_todos(self) -> list[Categoria]: 
         """Seleciona todas as categorias do banco de dados"""
-        sql = "SELECT id, descricao FROM Categoria ORDER BY descricao"
+        sql = COMANDOS['categoria.selecionar_todos']
         registros = self.executar_select(sql)
         # converte os registros para objetos e adiciona na lista
         dados = []
@@ -115,9 +438,22 @@ class CategoriaDAO(DAO):
             dados.append(Categoria(id=reg[0], descricao=reg[1]))
         return dados
 
+    def selecionar_pagina(self, cursor: Optional[str] = None, tamanho: Optional[int] = None) -> Pagina:
+        """Seleciona uma página de categorias ordenadas por descrição (paginação por chave)"""
+        sql = COMANDOS['categoria.selecionar']
+        pagina = self.executar_pagina(sql, ('descricao', 'id'), cursor, tamanho)
+        pagina.registros = [Categoria(id=reg[0], descricao=reg[1]) for reg in pagina.registros]
+        return pagina
+
+    def iterar_todos(self, tamanho_lote: Optional[int] = None) -> Iterator[Categoria]:
+        """Percorre todas as categorias sob demanda, sem carregar a tabela inteira na memória"""
+        sql = COMANDOS['categoria.selecionar_todos']
+        for reg in self.iterar_select(sql, tamanho_lote=tamanho_lote):
+            yield Categoria(id=reg[0], descricao=reg[1])
+
     def selecionar_um(self, id: int) -> Optional[Categoria]: 
         """Seleciona uma categoria específica pelo ID"""
-        sql = "SELECT id, descricao FROM Categoria WHERE id = ?"
+        sql = COMANDOS['categoria.selecionar_um']
         registros = self.executar_select(sql, (id,))
         if registros:
             reg = registros[0]
@@ -127,132 +463,501 @@ class CategoriaDAO(DAO):
     def existe_categoria(self, descricao: str, id_excluir: int = None) -> bool:
         """Verifica se já existe uma categoria com a mesma descrição"""
         if id_excluir:
-            sql = "SELECT COUNT(*) FROM Categoria WHERE descricao = ? AND id != ?"
+            sql = COMANDOS['categoria.existe_descricao_outra']
             registros = self.executar_select(sql, (descricao, id_excluir))
         else:
-            sql = "SELECT COUNT(*) FROM Categoria WHERE descricao = ?"
+            sql = COMANDOS['categoria.existe_descricao']
             registros = self.executar_select(sql, (descricao,))
-        return registros[0][0] > 0
+        return bool(registros[0][0])
 
 
 class ProdutoDAO(DAO):
     """DAO para operações com a entidade Produto"""
+
+    # se a tabela FTS5 produto_busca já existe (criada pela migração 0003);
+    # por instância, pois cada backend configurado tem o seu ProdutoDAO
+    _busca_textual_criada = False
+
+    # a partir deste tamanho, incluir_lote indexa a busca textual por bloco, e não linha a linha
+    MIN_LOTE_INDEXACAO = 1000
+    # se o gatilho da busca textual pode ser suspenso (tabela gatilho_suspenso, migração 0005)
+    _suspensao_gatilhos_criada = False
+
+    @staticmethod
+    def _criar_produto(reg: tuple, mapa: MapaDeIdentidade) -> Produto:
+        """
+        Converte um registro (produto + descrição da categoria) em objeto Produto.
+        A categoria vem do mapa de identidade, compartilhada entre os produtos.
+        """
+        return Produto(
+            id=reg[0],
+            descricao=reg[1],
+            preco_unitario=reg[2],
+            quantidade_estoque=reg[3],
+            categoria=mapa.categoria(reg[4], reg[5])
+        )
     
     def incluir(self, obj: Produto) -> None:
-        """Inclui um novo produto no banco de dados"""
-        sql = """INSERT INTO Produto (descricao, preco_unitario, quantidade_estoque, categoria_id) 
-                 VALUES (?, ?, ?, ?)"""
-        self.executar_sql(sql, (obj.descricao, obj.preco_unitario, 
-                               obj.quantidade_estoque, obj.categoria.id))
-
-    def alterar(self, obj: Produto) -> None:
-        """Altera um produto existente no banco de dados"""
-        sql = """UPDATE Produto 
-                 SET descricao = ?, preco_unitario = ?, quantidade_estoque = ?, categoria_id = ? 
-                 WHERE id = ?"""
-        self.executar_sql(sql, (obj.descricao, obj.preco_unitario, 
-                               obj.quantidade_estoque, obj.categoria.id, obj.id))
-
-    def excluir(self, obj: Produto) -> None:
-        """Exclui um produto do banco de dados"""
-        sql = "DELETE FROM Produto WHERE id = ?"
-        self.executar_sql(sql, (obj.id,))
+        """
+        Inclui um novo produto no banco de dados e preenche o id gerado.
+        Uma categoria inexistente é rejeitada pela chave estrangeira (sqlite3.IntegrityError).
+        """
+        sql = COMANDOS['produto.incluir_retornando_id']
+        obj.id = self.executar_retornando(sql, (obj.descricao, obj.preco_unitario,
+                                                obj.quantidade_estoque, obj.categoria.id))[0][0]
+
+    def incluir_lote(self, objs: Iterable[Produto], tamanho_lote: Optional[int] = None) -> list[int]:
+        """
+        Inclui vários produtos em uma única transação e retorna os ids gerados.
+        Em lotes grandes (MIN_LOTE_INDEXACAO produtos ou mais, contados ao consumir
+        objs, que pode ser um gerador), o gatilho produto_busca_ai fica suspenso e
+        cada bloco é indexado na busca textual com um único INSERT ... SELECT (cerca
+        de 4x mais rápido que o gatilho disparado produto a produto).
+        """
+        sql = COMANDOS['produto.incluir']
+        parametros = lambda obj: (obj.descricao, obj.preco_unitario, obj.quantidade_estoque, obj.categoria.id)
+        iterador = iter(objs)
+        inicio = list(islice(iterador, self.MIN_LOTE_INDEXACAO))
+        if len(inicio) < self.MIN_LOTE_INDEXACAO or not self._suspensao_gatilhos_disponivel():
+            return self.executar_lote(sql, chain(inicio, iterador), parametros, tamanho_lote)
+        return self.executar_lote(sql, chain(inicio, iterador), parametros, tamanho_lote,
+                                  suspender_gatilhos=('produto_busca_ai',), apos_bloco=self._indexar_bloco)
+
+    def _suspensao_gatilhos_disponivel(self) -> bool:
+        """Verifica se a migração 0005 (gatilhos que podem ser suspensos) já foi aplicada"""
+        if not self._suspensao_gatilhos_criada:
+            self._suspensao_gatilhos_criada = bool(
+                self.executar_select(COMANDOS['tabela_existe'], ('gatilho_suspenso',)))
+        return self._suspensao_gatilhos_criada
+
+    def _indexar_bloco(self, cursor: sqlite3.Cursor, primeiro_id: int, ultimo_id: int) -> None:
+        sql = COMANDOS['produto.indexar_intervalo']
+        cursor.execute(self._texto_sql(cursor.connection, sql), (primeiro_id, ultimo_id))
+
+    def alterar(self, obj: Produto) -> bool:
+        """
+        Altera um produto existente no banco de dados. Retorna se ele foi encontrado.
+        Uma categoria inexistente é rejeitada pela chave estrangeira (sqlite3.IntegrityError).
+        """
+        sql = COMANDOS['produto.alterar']
+        return self.executar_sql(sql, (obj.descricao, obj.preco_unitario,
+                                       obj.quantidade_estoque, obj.categoria.id, obj.id)).rowcount > 0
+
+    def excluir(self, obj: Produto) -> bool:
+        """Exclui um produto do banco de dados. Retorna se ele foi encontrado"""
+        return self.excluir_por_id(obj.id)
+
+    def excluir_por_id(self, id: int) -> bool:
+        """Exclui o produto com o ID informado. Retorna se ele foi encontrado"""
+        sql = COMANDOS['produto.excluir']
+        return self.executar_sql(sql, (id,)).rowcount > 0
 
     def selecionar_todos(self) -> list[Produto]:
         """Seleciona todos os produtos do banco de dados com suas categorias"""
-        sql = """SELECT p.id, p.descricao, p.preco_unitario, p.quantidade_estoque,
-                        p.categoria_id, c.descricao as categoria_descricao
-                 FROM Produto p
-                 INNER JOIN Categoria c ON c.id = p.categoria_id
-                 ORDER BY p.descricao"""
+        sql = COMANDOS['produto.selecionar_todos']
         registros = self.executar_select(sql)
-        produtos = []
-        for reg in registros:
-            categoria = Categoria(id=reg[4], descricao=reg[5])
-            produto = Produto(
-                id=reg[0],
-                descricao=reg[1], 
-                preco_unitario=reg[2],
-                quantidade_estoque=reg[3],
-                categoria=categoria
-            )
-            produtos.append(produto)
-        return produtos
+        mapa = mapa_identidade()
+        return [self._criar_produto(reg, mapa) for reg in registros]
+
+    @staticmethod
+    def _criar_linha(reg: tuple, mapa: MapaDeIdentidade) -> ProdutoLinha:
+        """Converte um registro em ProdutoLinha (visão somente leitura, em forma de tupla)"""
+        return ProdutoLinha(reg[0], reg[1], reg[2], reg[3], mapa.categoria(reg[4], reg[5]))
+
+    def selecionar_pagina(self, cursor: Optional[str] = None, tamanho: Optional[int] = None) -> Pagina:
+        """
+        Seleciona uma página de produtos ordenados por descrição (paginação por chave).
+        Os registros da página são ProdutoLinha (somente leitura).
+        """
+        sql = COMANDOS['produto.selecionar']
+        pagina = self.executar_pagina(sql, ('p.descricao', 'p.id'), cursor, tamanho)
+        mapa = mapa_identidade()
+        pagina.registros = [self._criar_linha(reg, mapa) for reg in pagina.registros]
+        return pagina
+
+    def iterar_todos(self, tamanho_lote: Optional[int] = None) -> Iterator[Produto]:
+        """Percorre todos os produtos sob demanda, sem carregar a tabela inteira na memória"""
+        sql = COMANDOS['produto.selecionar_todos']
+        mapa = mapa_identidade()
+        for reg in self.iterar_select(sql, tamanho_lote=tamanho_lote):
+            yield self._criar_produto(reg, mapa)
+
+    def iterar_linhas(self, tamanho_lote: Optional[int] = None) -> Iterator[ProdutoLinha]:
+        """
+        Percorre todos os produtos sob demanda como ProdutoLinha (tuplas somente
+        leitura), para relatórios e exportações que não alteram os dados.
+        """
+        sql = COMANDOS['produto.selecionar_todos']
+        mapa = mapa_identidade()
+        for reg in self.iterar_select(sql, tamanho_lote=tamanho_lote):
+            yield self._criar_linha(reg, mapa)
 
     def selecionar_um(self, id: int) -> Optional[Produto]:
         """Seleciona um produto específico pelo ID"""
-        sql = """SELECT p.id, p.descricao, p.preco_unitario, p.quantidade_estoque,
-                        p.categoria_id, c.descricao as categoria_descricao
-                 FROM Produto p
-                 INNER JOIN Categoria c ON c.id = p.categoria_id
-                 WHERE p.id = ?"""
+        sql = COMANDOS['produto.selecionar_um']
         registros = self.executar_select(sql, (id,))
         if registros:
-            reg = registros[0]
-            categoria = Categoria(id=reg[4], descricao=reg[5])
-            return Produto(
-                id=reg[0],
-                descricao=reg[1],
-                preco_unitario=reg[2],
-                quantidade_estoque=reg[3],
-                categoria=categoria
-            )
+            return self._criar_produto(registros[0], mapa_identidade())
         return None
 
     def selecionar_por_categoria(self, categoria_id: int) -> list[Produto]:
         """Seleciona todos os produtos de uma categoria específica"""
-        sql = """SELECT p.id, p.descricao, p.preco_unitario, p.quantidade_estoque,
-                        p.categoria_id, c.descricao as categoria_descricao
-                 FROM Produto p
-                 INNER JOIN Categoria c ON c.id = p.categoria_id
-                 WHERE p.categoria_id = ?
-                 ORDER BY p.descricao"""
+        sql = COMANDOS['produto.selecionar_por_categoria']
         registros = self.executar_select(sql, (categoria_id,))
-        produtos = []
-        for reg in registros:
-            categoria = Categoria(id=reg[4], descricao=reg[5])
-            produto = Produto(
-                id=reg[0],
-                descricao=reg[1],
-                preco_unitario=reg[2],
-                quantidade_estoque=reg[3],
-                categoria=categoria
-            )
-            produtos.append(produto)
-        return produtos
-
-    def buscar_por_descricao(self, termo: str) -> list[Produto]:
-        """Busca produtos pela descrição (busca parcial)"""
-        sql = """SELECT p.id, p.descricao, p.preco_unitario, p.quantidade_estoque,
-                        p.categoria_id, c.descricao as categoria_descricao
-                 FROM Produto p
-                 INNER JOIN Categoria c ON c.id = p.categoria_id
-                 WHERE p.descricao LIKE ?
-                 ORDER BY p.descricao"""
-        registros = self.executar_select(sql, (f"%{termo}%",))
-        produtos = []
-        for reg in registros:
-            categoria = Categoria(id=reg[4], descricao=reg[5])
-            produto = Produto(
-                id=reg[0],
-                descricao=reg[1],
-                preco_unitario=reg[2],
-                quantidade_estoque=reg[3],
-                categoria=categoria
-            )
-            produtos.append(produto)
-        return produtos
+        mapa = mapa_identidade()
+        return [self._criar_produto(reg, mapa) for reg in registros]
+
+    def iterar_por_categoria(self, categoria_id: int, tamanho_lote: Optional[int] = None) -> Iterator[Produto]:
+        """Percorre os produtos de uma categoria sob demanda"""
+        sql = COMANDOS['produto.selecionar_por_categoria']
+        mapa = mapa_identidade()
+        for reg in self.iterar_select(sql, (categoria_id,), tamanho_lote):
+            yield self._criar_produto(reg, mapa)
+
+    def buscar_por_descricao(self, termo: str, limite: Optional[int] = None) -> list[Produto]:
+        """
+        Busca produtos pela descrição, ordenados pela relevância (bm25).
+        Cada palavra do termo é buscada como prefixo ("note" encontra "Notebook") e
+        sem diferenciar acentos; todas as palavras precisam estar na descrição.
+        """
+        consulta = consulta_busca_textual(termo)
+        if not consulta:
+            return []
+        if not self._busca_textual_disponivel():
+            return self._buscar_por_descricao_like(termo, limite)
+        sql = COMANDOS['produto.buscar_textual']
+        registros = self.executar_select(sql, (consulta, -1 if limite is None else limite))
+        mapa = mapa_identidade()
+        return [self._criar_produto(reg, mapa) for reg in registros]
+
+    def _busca_textual_disponivel(self) -> bool:
+        """Verifica se a migração da busca textual (produto_busca) já foi aplicada"""
+        if not self._busca_textual_criada:
+            registros = self.executar_select(COMANDOS['tabela_existe'], ('produto_busca',))
+            if not registros:
+                logging.warning("Tabela produto_busca ausente (aplique as migrações); "
+                                "usando busca com LIKE")
+                return False
+            self._busca_textual_criada = True
+        return True
+
+    def _buscar_por_descricao_like(self, termo: str, limite: Optional[int]) -> list[Produto]:
+        """Busca parcial com LIKE (percorre a tabela inteira), usada antes das migrações"""
+        sql = COMANDOS['produto.buscar_like']
+        registros = self.executar_select(sql, (f"%{termo}%", -1 if limite is None else limite))
+        mapa = mapa_identidade()
+        return [self._criar_produto(reg, mapa) for reg in registros]
+
+    def selecionar_estoque_baixo(self, limite: int) -> list[Produto]:
+        """Seleciona os produtos com estoque abaixo do limite (filtro feito pelo banco)"""
+        sql = COMANDOS['produto.selecionar_estoque_baixo']
+        registros = self.executar_select(sql, (limite,))
+        mapa = mapa_identidade()
+        return [self._criar_produto(reg, mapa) for reg in registros]
+
+    def calcular_valor_total_estoque(self) -> float:
+        """Calcula a soma de preço * quantidade de todos os produtos (feita pelo banco)"""
+        sql = COMANDOS['produto.valor_total_estoque']
+        return self.executar_select(sql)[0][0]
+
+    def resumo_estoque_por_categoria(self, limite: int) -> list[ResumoEstoqueCategoria]:
+        """
+        Calcula, para cada categoria, a quantidade de produtos, o estoque total, o valor
+        total do estoque e quantos produtos estão com estoque abaixo do limite.
+        """
+        sql = COMANDOS['produto.resumo_por_categoria']
+        registros = self.executar_select(sql, (limite,))
+        return [ResumoEstoqueCategoria(reg[0], reg[1], reg[2], int(reg[3]), reg[4], int(reg[5]))
+                for reg in registros]
+
+    def iterar_colunas_estoque(self, apos_id: int = 0, tamanho_lote: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Percorre (id, preco_unitario, quantidade_estoque, categoria_id) dos produtos
+        com id maior que apos_id, em ordem de id, sem criar objetos de domínio (carga
+        dos arrays da análise de estoque). Produtos de categorias inexistentes não são
+        filtrados aqui.
+        """
+        return self.iterar_select(COMANDOS['produto.colunas_estoque'], (apos_id,), tamanho_lote)
+
+    def selecionar_colunas_estoque(self, ids: Iterable[int]) -> list[tuple]:
+        """As mesmas colunas de iterar_colunas_estoque, dos produtos informados que ainda existem"""
+        sql = COMANDOS['produto.colunas_estoque_por_ids']
+        return self.executar_select(sql, (json.dumps([int(id) for id in ids]),))
+
+    def faixa_alteracoes(self) -> tuple[int, int]:
+        """Menor e maior seq do registro de alterações de produtos ((0, 0) se estiver vazio)"""
+        minimo, maximo = self.executar_select(COMANDOS['produto.faixa_alteracoes'])[0]
+        return minimo or 0, maximo or 0
+
+    def produtos_alterados(self, apos_seq: int, ate_seq: int) -> list[int]:
+        """Ids dos produtos alterados ou excluídos com apos_seq < seq <= ate_seq"""
+        registros = self.executar_select(COMANDOS['produto.alterados'], (apos_seq, ate_seq))
+        return [reg[0] for reg in registros]
+
+    def descartar_alteracoes(self, ate_seq: int) -> int:
+        """Remove do registro as alterações com seq <= ate_seq e retorna quantas foram removidas"""
+        return self.executar_sql(COMANDOS['produto.descartar_alteracoes'], (ate_seq,)).rowcount
+
+_AUSENTE = object()
+
+
+def _copiar(valor: Any) -> Any:
+    """
+    Cópia dos objetos de domínio, para que alterações do chamador não afetem o cache.
+    A categoria de cada produto também é copiada, uma única vez por categoria: os
+    produtos da cópia continuam compartilhando a mesma Categoria, como no mapa de
+    identidade.
+    """
+    categorias: dict[int, Categoria] = {}
+
+    def copiar(obj: Any) -> Any:
+        if isinstance(obj, Produto):
+            return Produto(obj.id, obj.descricao, obj.preco_unitario, obj.quantidade_estoque,
+                           copiar(obj.categoria))
+        if isinstance(obj, Categoria):
+            copia = categorias.get(id(obj))
+            if copia is None:
+                copia = categorias[id(obj)] = Categoria(obj.id, obj.descricao)
+            return copia
+        return copy.copy(obj)
+
+    if isinstance(valor, list):
+        return [copiar(obj) for obj in valor]
+    return copiar(valor)
+
+
+class DAOComCache(DAO):
+    """
+    Decorator que adiciona cache de leitura a um DAO.
+    selecionar_um e selecionar_todos são atendidos pelo cache; os métodos de
+    escrita (incluir, alterar, excluir, incluir_lote, incluir_unica...)
+    invalidam o cache do DAO e os caches dependentes
+    (ex.: produtos guardam a descrição da categoria). Os demais métodos são
+    repassados diretamente ao DAO decorado.
+
+    Depois de uma escrita dentro de uma unidade de trabalho, as leituras dessa
+    unidade deixam de usar o cache (enxergam dados ainda não efetivados) e a
+    invalidação é repetida ao final da unidade.
+    """
+
+    def __init__(self, dao: DAO, cache: CacheLRU, dependentes: Iterable[CacheLRU] = ()):
+        self.dao = dao
+        self.cache = cache
+        self.dependentes = list(dependentes)
+
+    def __getattr__(self, nome: str) -> Any:
+        # repassa ao DAO decorado os métodos específicos (existe_categoria, iterar_todos...)
+        if nome == 'dao':
+            raise AttributeError(nome)
+        return getattr(self.dao, nome)
+
+    def _ler(self, chave: Hashable, consulta: Callable[[], Any]) -> Any:
+        unidade = unidade_atual()
+        if unidade is not None and self.cache in unidade.raiz.alterados:
+            return consulta()
+        # uma escrita de outra thread entre a consulta e o guardar() invalida o cache;
+        # a geração lida antes da consulta impede que o valor antigo seja recolocado
+        geracao = self.cache.geracao()
+        valor = self.cache.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = consulta()
+            self.cache.guardar(chave, _copiar(valor), geracao)
+            return valor
+        return _copiar(valor)
+
+    def invalidar(self) -> None:
+        """Descarta o conteúdo do cache deste DAO e dos caches dependentes"""
+        self.cache.invalidar()
+        for cache in self.dependentes:
+            cache.invalidar()
+
+    def _apos_escrita(self) -> None:
+        self.invalidar()
+        unidade = unidade_atual()
+        if unidade is not None:
+            unidade.raiz.alterados.update([self.cache, *self.dependentes])
+            # outra thread pode ter recolocado no cache o valor antigo antes do commit
+            unidade.ao_finalizar(self.invalidar)
+
+    def incluir(self, obj: Any):
+        try:
+            return self.dao.incluir(obj)
+        finally:
+            self._apos_escrita()
+
+    def alterar(self, obj: Any):
+        try:
+            return self.dao.alterar(obj)
+        finally:
+            self._apos_escrita()
+
+    def excluir(self, obj: Any):
+        try:
+            return self.dao.excluir(obj)
+        finally:
+            self._apos_escrita()
+
+    def incluir_lote(self, objs, tamanho_lote: Optional[int] = None) -> list[int]:
+        try:
+            return self.dao.incluir_lote(objs, tamanho_lote)
+        finally:
+            self._apos_escrita()
+
+    def _escrever(self, nome: str, *args) -> Any:
+        # escritas específicas de cada DAO (incluir_unica, excluir_por_id...)
+        try:
+            return getattr(self.dao, nome)(*args)
+        finally:
+            self._apos_escrita()
+
+    def incluir_unica(self, obj: Any) -> bool:
+        return self._escrever('incluir_unica', obj)
+
+    def alterar_unica(self, obj: Any) -> bool:
+        return self._escrever('alterar_unica', obj)
+
+    def excluir_sem_produtos(self, id: int) -> bool:
+        return self._escrever('excluir_sem_produtos', id)
+
+    def excluir_por_id(self, id: int) -> bool:
+        return self._escrever('excluir_por_id', id)
+
+    def selecionar_todos(self) -> list[Any]:
+        return self._ler(('todos',), self.dao.selecionar_todos)
+
+    def selecionar_um(self, id: int) -> Optional[Any]:
+        return self._ler(('um', id), lambda: self.dao.selecionar_um(id))
+
+
+_CACHE_CATEGORIAS_PADRAO = {'max_itens': 1000, 'ttl': 300.0}
+
+
+def _criar_cache(config: Optional[dict]) -> Optional[CacheLRU]:
+    return CacheLRU(**config) if config is not None else None
 
 
 class DAOFactory:
-    """Factory para criar instâncias dos DAOs"""
-    
-    @staticmethod
-    def get_categoria_dao() -> CategoriaDAO:
-        """Retorna uma instância do CategoriaDAO"""
-        return CategoriaDAO()
-    
-    @staticmethod
-    def get_produto_dao() -> ProdutoDAO:
-        """Retorna uma instância do ProdutoDAO"""
-        return ProdutoDAO()
+    """
+    Registro dos DAOs da aplicação.
+
+    O armazenamento (backend) vem da configuração DAO_BACKEND do Django, aplicada
+    por AppConfig.ready, ou de DAOFactory.configurar(); sem configuração é usado o
+    SQLite em arquivo (ver app.backends). Cada DAO é criado uma única vez por
+    configuração e compartilhado por todas as threads: os DAOs não guardam estado
+    por chamada (a conexão vem da thread atual) e os caches são thread-safe.
+    """
+
+    # Caches de leitura compartilhados pelos DAOs criados pela factory (None desativa).
+    # Categorias quase não mudam; produtos ficam sem cache por padrão. Produtos
+    # guardam a descrição da categoria, então alterar categorias invalida os dois.
+    cache_categorias: Optional[CacheLRU] = _criar_cache(_CACHE_CATEGORIAS_PADRAO)
+    cache_produtos: Optional[CacheLRU] = None
+    # se as escritas dos DAOs passam pela fila de escrita com commit em grupo (app.fila_escrita)
+    usar_fila_escrita = False
+
+    _backend = None
+    _instancias: dict[str, DAO] = {}
+    # reentrante: as versões assíncronas obtêm o DAO síncrono com o lock obtido
+    _lock = threading.RLock()
+
+    @classmethod
+    def configurar(cls, config: Optional[dict] = None):
+        """
+        Troca o backend e os caches conforme a configuração (mesmo formato de
+        settings.DAO_BACKEND) e descarta os DAOs criados até aqui.
+        Retorna o backend criado.
+        """
+        from .backends import criar_backend
+        from .fila_escrita import configurar_fila_escrita, encerrar_fila_escrita
+
+        config = dict(config or {})
+        backend = criar_backend(config)
+        with cls._lock:
+            # as escritas ainda na fila vão para o banco atual, antes da troca
+            encerrar_fila_escrita()
+            backend.iniciar()
+            anterior, cls._backend = cls._backend, backend
+            cls._instancias = {}
+            cls.cache_categorias = _criar_cache(config.get('CACHE_CATEGORIAS', _CACHE_CATEGORIAS_PADRAO))
+            cls.cache_produtos = _criar_cache(config.get('CACHE_PRODUTOS'))
+            fila = config.get('FILA_ESCRITA')
+            cls.usar_fila_escrita = fila is not None and backend.usa_fila_escrita
+            if cls.usar_fila_escrita:
+                configurar_fila_escrita(**fila)
+        if anterior is not None:
+            anterior.encerrar()
+        return backend
+
+    @classmethod
+    def get_backend(cls):
+        """Retorna o backend em uso, criando o padrão (SQLite em arquivo) se nenhum foi configurado"""
+        if cls._backend is None:
+            from .backends import BackendSQLite
+
+            with cls._lock:
+                if cls._backend is None:
+                    backend = BackendSQLite()
+                    backend.iniciar()
+                    cls._backend = backend
+        return cls._backend
+
+    @classmethod
+    def _obter(cls, nome: str, criar: Callable[[Any], DAO]) -> DAO:
+        dao = cls._instancias.get(nome)
+        if dao is None:
+            backend = cls.get_backend()
+            with cls._lock:
+                dao = cls._instancias.get(nome)
+                if dao is None:
+                    dao = cls._instancias[nome] = criar(backend)
+        return dao
+
+    @classmethod
+    def _com_fila_escrita(cls, dao: DAO) -> DAO:
+        if cls.usar_fila_escrita:
+            from .fila_escrita import DAOComFilaDeEscrita
+            return DAOComFilaDeEscrita(dao)
+        return dao
+
+    @classmethod
+    def _criar_categoria_dao(cls, backend) -> DAO:
+        dao = backend.criar_categoria_dao()
+        if cls.cache_categorias is not None and backend.usa_cache:
+            dependentes = [cls.cache_produtos] if cls.cache_produtos else []
+            dao = DAOComCache(dao, cls.cache_categorias, dependentes)
+        return cls._com_fila_escrita(dao)
+
+    @classmethod
+    def _criar_produto_dao(cls, backend) -> DAO:
+        dao = backend.criar_produto_dao()
+        if cls.cache_produtos is not None and backend.usa_cache:
+            dao = DAOComCache(dao, cls.cache_produtos)
+        return cls._com_fila_escrita(dao)
+
+    @classmethod
+    def get_categoria_dao(cls) -> DAO:
+        """
+        Retorna o DAO de categorias compartilhado do backend configurado: um
+        CategoriaDAO ou CategoriaDAOMemoria, decorado por DAOComCache e/ou
+        DAOComFilaDeEscrita conforme a configuração (todos com os métodos do CategoriaDAO)
+        """
+        return cls._obter('categoria', cls._criar_categoria_dao)
+
+    @classmethod
+    def get_produto_dao(cls) -> DAO:
+        """
+        Retorna o DAO de produtos compartilhado do backend configurado: um
+        ProdutoDAO ou ProdutoDAOMemoria, decorado por DAOComCache e/ou
+        DAOComFilaDeEscrita conforme a configuração (todos com os métodos do ProdutoDAO)
+        """
+        return cls._obter('produto', cls._criar_produto_dao)
+
+    @classmethod
+    def get_categoria_dao_assincrono(cls) -> DAOAssincrono:
+        """Retorna o CategoriaDAO com API assíncrona (await dao.selecionar_todos())"""
+        return cls._obter('categoria_assincrono', lambda _: DAOAssincrono(cls.get_categoria_dao()))
+
+    @classmethod
+    def get_produto_dao_assincrono(cls) -> DAOAssincrono:
+        """Retorna o ProdutoDAO com API assíncrona (await dao.selecionar_todos())"""
+        return cls._obter('produto_assincrono', lambda _: DAOAssincrono(cls.get_produto_dao()))
@@ -0,0 +1,396 @@
+"""
+DAOs em memória (sem SQL)
+
+Implementam a mesma interface do CategoriaDAO/ProdutoDAO sobre dicionários
+Python, compartilhados pelos dois DAOs de um mesmo ArmazemMemoria. Servem para
+testes rápidos (sem arquivo nem migrações) e como cache de leitura de dados
+que quase não mudam.
+
+Diferenças em relação aos DAOs SQLite:
+- as escritas valem imediatamente: a unidade de trabalho não as desfaz;
+- a busca por descrição compara prefixos das palavras sem acentos, mas ordena
+  pela descrição (não há bm25);
+- as restrições do banco (chave estrangeira de Produto.categoria_id) são
+  reproduzidas com as mesmas exceções do sqlite3.
+"""
+import bisect
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .dao import (DAO, Pagina, ProdutoDAO, codificar_cursor, decodificar_cursor, mapa_identidade,
+                  sincronizar_categoria)
+from .dominio import Categoria, Produto, ProdutoLinha, ResumoEstoqueCategoria
+
+
+def _sem_acentos(texto: str) -> str:
+    """Texto em minúsculas e sem acentos (equivalente ao remove_diacritics do FTS5)"""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def paginar(itens: list, chave: Callable[[Any], tuple], cursor: Optional[str],
+            tamanho: int) -> Pagina:
+    """
+    Paginação por chave sobre uma lista já ordenada por chave(item) = (descricao, id),
+    com os mesmos cursores de DAO.executar_pagina.
+    """
+    if not cursor:
+        registros = itens[:tamanho]
+        pagina = Pagina(registros=registros)
+        if registros and len(itens) > tamanho:
+            pagina.proximo = codificar_cursor('>', chave(registros[-1]))
+        return pagina
+
+    direcao, referencia = decodificar_cursor(cursor)
+    if direcao == '>':
+        inicio = bisect.bisect_right(itens, referencia, key=chave)
+        registros = itens[inicio:inicio + tamanho]
+        ha_mais = len(itens) > inicio + tamanho
+    else:
+        fim = bisect.bisect_left(itens, referencia, key=chave)
+        registros = itens[max(fim - tamanho, 0):fim]
+        ha_mais = fim > tamanho
+
+    pagina = Pagina(registros=registros)
+    if registros:
+        if (direcao == '>' and ha_mais) or direcao == '<':
+            pagina.proximo = codificar_cursor('>', chave(registros[-1]))
+        if (direcao == '<' and ha_mais) or direcao == '>':
+            pagina.anterior = codificar_cursor('<', chave(registros[0]))
+    return pagina
+
+
+class ArmazemMemoria:
+    """
+    Tabelas em memória compartilhadas pelos DAOs de um backend 'memoria'.
+    Categorias: {id: descricao}; produtos: {id: (id, descricao, preco, quantidade, categoria_id)}.
+    Todo acesso deve ser feito com o lock obtido.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.categorias: dict[int, str] = {}
+        self.produtos: dict[int, tuple] = {}
+        # registro de alterações e exclusões de produtos: [(seq, produto_id)] (ver migração 0004)
+        self.alteracoes: list[tuple[int, int]] = []
+        # último id gerado por tabela (como o AUTOINCREMENT, ids excluídos não são reutilizados)
+        self._ultimo_id = {'Categoria': 0, 'Produto': 0, 'produto_alteracao': 0}
+
+    def proximo_id(self, tabela: str) -> int:
+        self._ultimo_id[tabela] += 1
+        return self._ultimo_id[tabela]
+
+    def reservar_id(self, tabela: str, id: int) -> None:
+        """Registra um id informado pelo chamador (carga de dados existentes)"""
+        self._ultimo_id[tabela] = max(self._ultimo_id[tabela], id)
+
+    def registro_produto(self, linha: tuple) -> tuple:
+        """Registro no formato das consultas SQL: colunas do produto + descrição da categoria"""
+        return (*linha, self.categorias[linha[4]])
+
+    def produtos_ordenados(self, filtro: Optional[Callable[[tuple], bool]] = None) -> list[tuple]:
+        """Registros dos produtos (com a descrição da categoria), ordenados por (descricao, id)"""
+        linhas = self.produtos.values() if filtro is None else filter(filtro, self.produtos.values())
+        return [self.registro_produto(linha) for linha in sorted(linhas, key=lambda l: (l[1], l[0]))]
+
+    def registrar_alteracao(self, produto_id: int) -> None:
+        """Reproduz os gatilhos produto_alteracao_au / produto_alteracao_ad"""
+        self.alteracoes.append((self.proximo_id('produto_alteracao'), produto_id))
+
+    def verificar_categoria(self, categoria_id: int) -> None:
+        """Reproduz a chave estrangeira Produto.categoria_id"""
+        if categoria_id not in self.categorias:
+            raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+
+    def limpar(self) -> None:
+        with self.lock:
+            self.categorias.clear()
+            self.produtos.clear()
+            self.alteracoes.clear()
+            self._ultimo_id = {'Categoria': 0, 'Produto': 0, 'produto_alteracao': 0}
+
+
+class CategoriaDAOMemoria(DAO):
+    """CategoriaDAO sobre um ArmazemMemoria"""
+
+    def __init__(self, armazem: ArmazemMemoria):
+        self.armazem = armazem
+
+    def _ordenadas(self) -> list[tuple[str, int]]:
+        """(descricao, id) de todas as categorias, na ordem das listagens"""
+        return sorted((descricao, id) for id, descricao in self.armazem.categorias.items())
+
+    def incluir(self, obj: Categoria) -> None:
+        """Inclui uma nova categoria e preenche o id gerado"""
+        with self.armazem.lock:
+            obj.id = self.armazem.proximo_id('Categoria')
+            self.armazem.categorias[obj.id] = obj.descricao
+
+    def incluir_unica(self, obj: Categoria) -> bool:
+        """Inclui a categoria somente se não existir outra com a mesma descrição"""
+        with self.armazem.lock:
+            if obj.descricao in self.armazem.categorias.values():
+                return False
+            self.incluir(obj)
+            return True
+
+    def incluir_lote(self, objs: Iterable[Categoria], tamanho_lote: Optional[int] = None) -> list[int]:
+        """Inclui várias categorias e retorna os ids gerados"""
+        with self.armazem.lock:
+            ids = []
+            for obj in objs:
+                self.incluir(obj)
+                ids.append(obj.id)
+            return ids
+
+    def alterar(self, obj: Categoria) -> bool:
+        """Altera uma categoria existente. Retorna se ela foi encontrada"""
+        with self.armazem.lock:
+            if obj.id not in self.armazem.categorias:
+                return False
+            self.armazem.categorias[obj.id] = obj.descricao
+        sincronizar_categoria(obj.id, obj.descricao)
+        return True
+
+    def alterar_unica(self, obj: Categoria) -> bool:
+        """Altera a categoria somente se nenhuma outra tiver a nova descrição"""
+        with self.armazem.lock:
+            if any(descricao == obj.descricao and id != obj.id
+                   for id, descricao in self.armazem.categorias.items()):
+                return False
+            return self.alterar(obj)
+
+    def excluir(self, obj: Categoria) -> bool:
+        """Exclui uma categoria. Categorias com produtos são rejeitadas como pela chave estrangeira"""
+        with self.armazem.lock:
+            if obj.id not in self.armazem.categorias:
+                return False
+            if any(linha[4] == obj.id for linha in self.armazem.produtos.values()):
+                raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+            del self.armazem.categorias[obj.id]
+        sincronizar_categoria(obj.id, None)
+        return True
+
+    def excluir_sem_produtos(self, id: int) -> bool:
+        """Exclui a categoria somente se ela existir e não tiver produtos vinculados"""
+        with self.armazem.lock:
+            existe, produtos = self.situacao(id)
+            if not existe or produtos:
+                return False
+            del self.armazem.categorias[id]
+        sincronizar_categoria(id, None)
+        return True
+
+    def situacao(self, id: int) -> tuple[bool, int]:
+        """Retorna se a categoria existe e quantos produtos estão vinculados a ela"""
+        with self.armazem.lock:
+            produtos = sum(1 for linha in self.armazem.produtos.values() if linha[4] == id)
+            return id in self.armazem.categorias, produtos
+
+    def selecionar_todos(self) -> list[Categoria]:
+        """Seleciona todas as categorias ordenadas por descrição"""
+        with self.armazem.lock:
+            return [Categoria(id=id, descricao=descricao) for descricao, id in self._ordenadas()]
+
+    def selecionar_pagina(self, cursor: Optional[str] = None, tamanho: Optional[int] = None) -> Pagina:
+        """Seleciona uma página de categorias ordenadas por descrição (mesmos cursores do SQLite)"""
+        tamanho = min(max(tamanho or self.TAMANHO_PAGINA, 1), self.TAMANHO_PAGINA_MAXIMO)
+        with self.armazem.lock:
+            pagina = paginar(self._ordenadas(), lambda item: item, cursor, tamanho)
+        pagina.registros = [Categoria(id=id, descricao=descricao) for descricao, id in pagina.registros]
+        return pagina
+
+    def iterar_todos(self, tamanho_lote: Optional[int] = None) -> Iterator[Categoria]:
+        """Percorre todas as categorias (cópia feita no início da iteração)"""
+        yield from self.selecionar_todos()
+
+    def selecionar_um(self, id: int) -> Optional[Categoria]:
+        """Seleciona uma categoria específica pelo ID"""
+        with self.armazem.lock:
+            descricao = self.armazem.categorias.get(id)
+        return None if descricao is None else Categoria(id=id, descricao=descricao)
+
+    def existe_categoria(self, descricao: str, id_excluir: int = None) -> bool:
+        """Verifica se já existe uma categoria com a mesma descrição"""
+        with self.armazem.lock:
+            return any(d == descricao and id != id_excluir for id, d in self.armazem.categorias.items())
+
+
+class ProdutoDAOMemoria(DAO):
+    """ProdutoDAO sobre um ArmazemMemoria"""
+
+    def __init__(self, armazem: ArmazemMemoria):
+        self.armazem = armazem
+
+    @staticmethod
+    def _linha(obj: Produto) -> tuple:
+        return (obj.id, obj.descricao, obj.preco_unitario, obj.quantidade_estoque, obj.categoria.id)
+
+    def _produtos(self, filtro: Optional[Callable[[tuple], bool]] = None) -> list[Produto]:
+        with self.armazem.lock:
+            registros = self.armazem.produtos_ordenados(filtro)
+        mapa = mapa_identidade()
+        return [ProdutoDAO._criar_produto(reg, mapa) for reg in registros]
+
+    def incluir(self, obj: Produto) -> None:
+        """
+        Inclui um novo produto e preenche o id gerado.
+        Uma categoria inexistente é rejeitada (sqlite3.IntegrityError).
+        """
+        with self.armazem.lock:
+            self.armazem.verificar_categoria(obj.categoria.id)
+            obj.id = self.armazem.proximo_id('Produto')
+            self.armazem.produtos[obj.id] = self._linha(obj)
+
+    def incluir_lote(self, objs: Iterable[Produto], tamanho_lote: Optional[int] = None) -> list[int]:
+        """Inclui vários produtos (todos ou nenhum) e retorna os ids gerados"""
+        objs = list(objs)
+        with self.armazem.lock:
+            for obj in objs:
+                self.armazem.verificar_categoria(obj.categoria.id)
+            for obj in objs:
+                obj.id = self.armazem.proximo_id('Produto')
+                self.armazem.produtos[obj.id] = self._linha(obj)
+        return [obj.id for obj in objs]
+
+    def alterar(self, obj: Produto) -> bool:
+        """Altera um produto existente. Retorna se ele foi encontrado"""
+        with self.armazem.lock:
+            if obj.id not in self.armazem.produtos:
+                return False
+            self.armazem.verificar_categoria(obj.categoria.id)
+            self.armazem.produtos[obj.id] = self._linha(obj)
+            self.armazem.registrar_alteracao(obj.id)
+            return True
+
+    def excluir(self, obj: Produto) -> bool:
+        """Exclui um produto. Retorna se ele foi encontrado"""
+        return self.excluir_por_id(obj.id)
+
+    def excluir_por_id(self, id: int) -> bool:
+        """Exclui o produto com o ID informado. Retorna se ele foi encontrado"""
+        with self.armazem.lock:
+            if self.armazem.produtos.pop(id, None) is None:
+                return False
+            self.armazem.registrar_alteracao(id)
+            return True
+
+    def selecionar_todos(self) -> list[Produto]:
+        """Seleciona todos os produtos ordenados por descrição"""
+        return self._produtos()
+
+    def selecionar_pagina(self, cursor: Optional[str] = None, tamanho: Optional[int] = None) -> Pagina:
+        """Seleciona uma página de produtos (ProdutoLinha) ordenados por descrição"""
+        tamanho = min(max(tamanho or self.TAMANHO_PAGINA, 1), self.TAMANHO_PAGINA_MAXIMO)
+        with self.armazem.lock:
+            pagina = paginar(self.armazem.produtos_ordenados(), lambda reg: (reg[1], reg[0]),
+                             cursor, tamanho)
+        mapa = mapa_identidade()
+        pagina.registros = [ProdutoDAO._criar_linha(reg, mapa) for reg in pagina.registros]
+        return pagina
+
+    def iterar_todos(self, tamanho_lote: Optional[int] = None) -> Iterator[Produto]:
+        """Percorre todos os produtos (cópia feita no início da iteração)"""
+        yield from self._produtos()
+
+    def iterar_linhas(self, tamanho_lote: Optional[int] = None) -> Iterator[ProdutoLinha]:
+        """Percorre todos os produtos como ProdutoLinha"""
+        with self.armazem.lock:
+            registros = self.armazem.produtos_ordenados()
+        mapa = mapa_identidade()
+        for reg in registros:
+            yield ProdutoDAO._criar_linha(reg, mapa)
+
+    def selecionar_um(self, id: int) -> Optional[Produto]:
+        """Seleciona um produto específico pelo ID"""
+        with self.armazem.lock:
+            linha = self.armazem.produtos.get(id)
+            if linha is None:
+                return None
+            registro = self.armazem.registro_produto(linha)
+        return ProdutoDAO._criar_produto(registro, mapa_identidade())
+
+    def selecionar_por_categoria(self, categoria_id: int) -> list[Produto]:
+        """Seleciona todos os produtos de uma categoria específica"""
+        return self._produtos(lambda linha: linha[4] == categoria_id)
+
+    def iterar_por_categoria(self, categoria_id: int, tamanho_lote: Optional[int] = None) -> Iterator[Produto]:
+        """Percorre os produtos de uma categoria"""
+        yield from self.selecionar_por_categoria(categoria_id)
+
+    def buscar_por_descricao(self, termo: str, limite: Optional[int] = None) -> list[Produto]:
+        """
+        Busca produtos cuja descrição tenha palavras começando com cada palavra do
+        termo, sem diferenciar acentos. Ordenados por descrição.
+        """
+        termos = re.findall(r'\w+', _sem_acentos(termo))
+        if not termos:
+            return []
+
+        def corresponde(linha: tuple) -> bool:
+            palavras = re.findall(r'\w+', _sem_acentos(linha[1]))
+            return all(any(palavra.startswith(t) for palavra in palavras) for t in termos)
+
+        produtos = self._produtos(corresponde)
+        return produtos if limite is None else produtos[:limite]
+
+    def selecionar_estoque_baixo(self, limite: int) -> list[Produto]:
+        """Seleciona os produtos com estoque abaixo do limite"""
+        return self._produtos(lambda linha: linha[3] is not None and linha[3] < limite)
+
+    def calcular_valor_total_estoque(self) -> float:
+        """Calcula a soma de preço * quantidade de todos os produtos"""
+        with self.armazem.lock:
+            return float(sum(linha[2] * linha[3] for linha in self.armazem.produtos.values()
+                             if linha[3] is not None))
+
+    def resumo_estoque_por_categoria(self, limite: int) -> list[ResumoEstoqueCategoria]:
+        """Totais de estoque de cada categoria (mesmo resultado da consulta SQL)"""
+        with self.armazem.lock:
+            totais = {id: [0, 0, 0.0, 0] for id in self.armazem.categorias}
+            for _, _, preco, quantidade, categoria_id in self.armazem.produtos.values():
+                total = totais[categoria_id]
+                total[0] += 1
+                if quantidade is not None:
+                    total[1] += quantidade
+                    total[2] += preco * quantidade
+                    total[3] += quantidade < limite
+            return [ResumoEstoqueCategoria(id, descricao, *totais[id])
+                    for descricao, id in sorted((d, i) for i, d in self.armazem.categorias.items())]
+
+    @staticmethod
+    def _colunas(linha: tuple) -> tuple:
+        return (linha[0], linha[2], linha[3], linha[4])
+
+    def iterar_colunas_estoque(self, apos_id: int = 0, tamanho_lote: Optional[int] = None) -> Iterator[tuple]:
+        """Percorre as colunas de ProdutoDAO.iterar_colunas_estoque dos produtos com id > apos_id"""
+        with self.armazem.lock:
+            linhas = sorted(self._colunas(linha) for id, linha in self.armazem.produtos.items() if id > apos_id)
+        yield from linhas
+
+    def selecionar_colunas_estoque(self, ids: Iterable[int]) -> list[tuple]:
+        """As mesmas colunas de iterar_colunas_estoque, dos produtos informados que ainda existem"""
+        with self.armazem.lock:
+            linhas = (self.armazem.produtos.get(int(id)) for id in set(ids))
+            return sorted(self._colunas(linha) for linha in linhas if linha is not None)
+
+    def faixa_alteracoes(self) -> tuple[int, int]:
+        """Menor e maior seq do registro de alterações ((0, 0) se estiver vazio)"""
+        with self.armazem.lock:
+            alteracoes = self.armazem.alteracoes
+            return (alteracoes[0][0], alteracoes[-1][0]) if alteracoes else (0, 0)
+
+    def produtos_alterados(self, apos_seq: int, ate_seq: int) -> list[int]:
+        """Ids dos produtos alterados ou excluídos com apos_seq < seq <= ate_seq"""
+        with self.armazem.lock:
+            return sorted({id for seq, id in self.armazem.alteracoes if apos_seq < seq <= ate_seq})
+
+    def descartar_alteracoes(self, ate_seq: int) -> int:
+        """Remove do registro as alterações com seq <= ate_seq e retorna quantas foram removidas"""
+        with self.armazem.lock:
+            antes = len(self.armazem.alteracoes)
+            self.armazem.alteracoes = [item for item in self.armazem.alteracoes if item[0] > ate_seq]
+            return antes - len(self.armazem.alteracoes)
@@ -6,16 +6,46 @@
 
 
 from dataclasses import dataclass
+from typing import NamedTuple
 
-@dataclass
+# slots=True: sem __dict__ por instância, o que reduz bastante a memória
+# quando muitos objetos ficam carregados (relatórios, exportações)
+
+@dataclass(slots=True)
 class Categoria:
     id: int
     descricao: str
 
-@dataclass
+@dataclass(slots=True)
 class Produto:
     id: int
     descricao: str
     preco_unitario: float
     quantidade_estoque: int
-    categoria: Categoria
\ No newline at end of file
+    categoria: Categoria
+
+
+class ProdutoLinha(NamedTuple):
+    """
+    Visão somente leitura de um produto, armazenada como tupla (os campos não podem
+    ser reatribuídos). Tem os mesmos atributos de Produto e é usada nas listagens que
+    não alteram os dados. A categoria é a mesma Categoria compartilhada pelo mapa de
+    identidade, que é mutável: por isso a linha não é hashable.
+    Ocupa um pouco mais que o Produto com slots (a tupla guarda o próprio tamanho),
+    mas bem menos que uma dataclass com __dict__.
+    """
+    id: int
+    descricao: str
+    preco_unitario: float
+    quantidade_estoque: int
+    categoria: Categoria
+
+
+class ResumoEstoqueCategoria(NamedTuple):
+    """Totais de estoque de uma categoria, calculados pelo banco de dados"""
+    categoria_id: int
+    categoria_descricao: str
+    quantidade_produtos: int
+    quantidade_estoque: int
+    valor_total: float
+    produtos_estoque_baixo: int
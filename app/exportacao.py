@@ -0,0 +1,138 @@
+"""
+Exportação do catálogo em CSV ou JSON Lines, sob demanda
+
+Os registros são lidos do DAO em lotes (iterar_linhas / iterar_todos) e
+codificados à medida que são percorridos, em blocos de cerca de TAMANHO_BLOCO
+bytes: a memória usada não depende do tamanho do catálogo. O primeiro bloco
+(cabeçalho do CSV ou primeira linha) é entregue sem esperar o bloco encher,
+então o cliente começa a receber o arquivo imediatamente.
+
+Uso:
+    for bloco in exportar_produtos('csv', compactar=True):
+        arquivo.write(bloco)
+"""
+import csv
+import json
+import zlib
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .services import CategoriaService, ProdutoService
+
+
+# formato -> (content type, extensão do arquivo)
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+# tamanho aproximado de cada bloco entregue ao cliente
+TAMANHO_BLOCO = 64 * 1024
+
+COLUNAS_CATEGORIA = ('id', 'descricao')
+COLUNAS_PRODUTO = ('id', 'descricao', 'preco_unitario', 'quantidade_estoque',
+                   'categoria_id', 'categoria_descricao')
+
+
+class _Eco:
+    """Arquivo falso para o csv.writer: writerow() retorna a linha formatada"""
+
+    def write(self, valor: str) -> str:
+        return valor
+
+
+def codificar_csv(colunas: tuple, linhas: Iterable[tuple]) -> Iterator[str]:
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(colunas)
+    for linha in linhas:
+        yield escritor.writerow(linha)
+
+
+def codificar_jsonl(colunas: tuple, linhas: Iterable[tuple]) -> Iterator[str]:
+    for linha in linhas:
+        yield json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + '\n'
+
+
+_CODIFICADORES: dict[str, Callable[[tuple, Iterable[tuple]], Iterator[str]]] = {
+    'csv': codificar_csv,
+    'jsonl': codificar_jsonl,
+}
+
+
+def agrupar(textos: Iterable[str], tamanho: int = TAMANHO_BLOCO) -> Iterator[bytes]:
+    """Junta os textos em blocos de cerca de `tamanho` bytes (UTF-8); o primeiro sai sozinho"""
+    bloco: list[str] = []
+    total = 0
+    primeiro = True
+    for texto in textos:
+        bloco.append(texto)
+        total += len(texto)
+        if primeiro or total >= tamanho:
+            yield ''.join(bloco).encode('utf-8')
+            bloco, total, primeiro = [], 0, False
+    if bloco:
+        yield ''.join(bloco).encode('utf-8')
+
+
+def comprimir(blocos: Iterable[bytes], nivel: int = 6) -> Iterator[bytes]:
+    """Comprime os blocos em gzip incrementalmente"""
+    # wbits=31: formato gzip (cabeçalho e CRC), não zlib
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+    primeiro = True
+    for bloco in blocos:
+        dados = compressor.compress(bloco)
+        if primeiro:
+            # entrega o primeiro bloco sem esperar o buffer do compressor encher
+            dados += compressor.flush(zlib.Z_SYNC_FLUSH)
+            primeiro = False
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+def exportar(colunas: tuple, linhas: Iterable[tuple], formato: str = 'csv',
+             compactar: bool = False) -> Iterator[bytes]:
+    """Codifica as linhas no formato informado e retorna os blocos de bytes do arquivo"""
+    if formato not in _CODIFICADORES:
+        raise ValueError(f"Formato de exportação inválido: {formato} (use {', '.join(FORMATOS)})")
+    blocos = agrupar(_CODIFICADORES[formato](colunas, linhas))
+    return comprimir(blocos) if compactar else blocos
+
+
+def _linhas_produtos(tamanho_lote: Optional[int]) -> Iterator[tuple]:
+    for produto in ProdutoService().iterar_linhas(tamanho_lote):
+        yield (produto.id, produto.descricao, produto.preco_unitario, produto.quantidade_estoque,
+               produto.categoria.id, produto.categoria.descricao)
+
+
+def _linhas_categorias(tamanho_lote: Optional[int]) -> Iterator[tuple]:
+    for categoria in CategoriaService().iterar_todas(tamanho_lote):
+        yield (categoria.id, categoria.descricao)
+
+
+def exportar_produtos(formato: str = 'csv', compactar: bool = False,
+                      tamanho_lote: Optional[int] = None) -> Iterator[bytes]:
+    """Exporta todos os produtos (com a descrição da categoria)"""
+    return exportar(COLUNAS_PRODUTO, _linhas_produtos(tamanho_lote), formato, compactar)
+
+
+def exportar_categorias(formato: str = 'csv', compactar: bool = False,
+                        tamanho_lote: Optional[int] = None) -> Iterator[bytes]:
+    """Exporta todas as categorias"""
+    return exportar(COLUNAS_CATEGORIA, _linhas_categorias(tamanho_lote), formato, compactar)
+
+
+def nome_arquivo(recurso: str, formato: str, compactar: bool) -> str:
+    return f"{recurso}.{FORMATOS[formato][1]}" + ('.gz' if compactar else '')
+
+
+def tipo_conteudo(formato: str, compactar: bool) -> str:
+    return 'application/gzip' if compactar else FORMATOS[formato][0]
+
+
+def parametros_exportacao(parametros: Any) -> tuple[str, bool]:
+    """Formato e compactação informados na URL (?formato=jsonl&gzip=1)"""
+    formato = (parametros.get('formato') or 'csv').lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação inválido: {formato} (use {', '.join(FORMATOS)})")
+    compactar = (parametros.get('gzip') or '').lower() in ('1', 'true', 'sim')
+    return formato, compactar
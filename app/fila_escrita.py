@@ -0,0 +1,299 @@
+"""
+Fila de escrita com commit em grupo (group commit)
+
+O SQLite aceita um único escritor por vez: com cada thread fazendo o próprio
+commit, as escritas concorrentes disputam o lock do banco (e esperam até o
+busy timeout). Com a fila, as threads apenas enviam as operações de escrita e
+uma thread escritora dedicada as executa em lotes, uma transação por lote
+(até max_operacoes operações ou max_espera_ms milissegundos), pagando um único
+commit (e fsync) pelo lote inteiro.
+
+Cada operação roda em um SAVEPOINT próprio: a falha de uma operação desfaz só
+ela, e o erro é entregue no Future daquela operação. Os Futures são resolvidos
+depois do commit do lote.
+
+Uso:
+    fila = get_fila_escrita()
+    futuro = fila.enviar(produto_dao.incluir, produto)
+    futuro.result()                       # aguarda o commit do lote
+
+    # ou, pelo DAOFactory: DAO_BACKEND['FILA_ESCRITA'] = {'max_operacoes': 100, 'max_espera_ms': 1.0}
+"""
+import atexit
+import functools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, NamedTuple, Optional
+
+from .dao import DAO
+from .transacao import unidade_atual, unidade_de_trabalho
+
+
+class _Operacao(NamedTuple):
+    funcao: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    futuro: Future
+
+
+_FIM = object()
+
+
+class FilaDeEscrita:
+    """
+    Executa as operações de escrita enviadas por várias threads em uma única
+    thread escritora, agrupando-as em transações.
+
+    Args:
+        max_operacoes: Operações por transação (lote)
+        max_espera_ms: Quanto o lote espera por mais operações depois da primeira
+        max_pendentes: Tamanho máximo da fila (enviar() bloqueia quando cheia)
+    """
+
+    def __init__(self, max_operacoes: int = 100, max_espera_ms: float = 1.0, max_pendentes: int = 10000):
+        if max_operacoes < 1:
+            raise ValueError("O número de operações por lote deve ser maior que zero")
+        self.max_operacoes = max_operacoes
+        self.max_espera_ms = max_espera_ms
+        self._fila: queue.Queue = queue.Queue(max_pendentes)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._encerrada = False
+
+        # estatísticas
+        self._lotes = 0
+        self._operacoes = 0
+        self._erros = 0
+        self._falhas_commit = 0
+        self._maior_lote = 0
+        self._tempo_lotes = 0.0
+
+    def _iniciar_thread(self) -> None:
+        with self._lock:
+            if self._encerrada:
+                raise RuntimeError("A fila de escrita foi encerrada")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='dao-escritor', daemon=True)
+                self._thread.start()
+
+    def enviar(self, funcao: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Enfileira uma operação de escrita (ex.: produto_dao.incluir) e retorna o
+        Future com o resultado, resolvido após o commit do lote.
+        Chamadas feitas pela própria thread escritora são executadas na hora.
+        """
+        futuro: Future = Future()
+        if threading.current_thread() is self._thread:
+            futuro.set_running_or_notify_cancel()
+            try:
+                futuro.set_result(funcao(*args, **kwargs))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+        self._iniciar_thread()
+        self._fila.put(_Operacao(funcao, args, kwargs, futuro))
+        return futuro
+
+    def executar(self, funcao: Callable[..., Any], *args, **kwargs) -> Any:
+        """Enfileira a operação e aguarda o resultado (ou a exceção) dela"""
+        return self.enviar(funcao, *args, **kwargs).result()
+
+    def _proximo_lote(self, primeira: _Operacao) -> list:
+        """Junta à primeira operação as que chegarem até o lote encher ou o prazo acabar"""
+        lote = [primeira]
+        prazo = time.monotonic() + self.max_espera_ms / 1000
+        while len(lote) < self.max_operacoes:
+            restante = prazo - time.monotonic()
+            try:
+                operacao = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if operacao is _FIM:
+                # recoloca o aviso de encerramento para depois deste lote
+                self._fila.put(_FIM)
+                break
+            lote.append(operacao)
+        return lote
+
+    def _executar(self) -> None:
+        """Laço da thread escritora"""
+        # a conexão é retirada do pool a cada lote (pela unidade de trabalho) e devolvida
+        # ao final dele: com leitura e escrita separadas o pool de escrita tem uma única
+        # conexão, e as escritas feitas fora da fila (unidades de trabalho) também a usam
+        try:
+            while True:
+                operacao = self._fila.get()
+                if operacao is _FIM:
+                    break
+                self._processar(self._proximo_lote(operacao))
+        finally:
+            # operações enviadas durante o encerramento não serão executadas
+            while True:
+                try:
+                    operacao = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if operacao is not _FIM and operacao.futuro.set_running_or_notify_cancel():
+                    operacao.futuro.set_exception(RuntimeError("A fila de escrita foi encerrada"))
+
+    def _processar(self, lote: list) -> None:
+        """Executa o lote em uma transação, com um SAVEPOINT por operação"""
+        ativas = [op for op in lote if op.futuro.set_running_or_notify_cancel()]
+        if not ativas:
+            return
+        inicio = time.perf_counter()
+        resultados = []
+        try:
+            with unidade_de_trabalho():
+                for op in ativas:
+                    try:
+                        with unidade_de_trabalho():
+                            resultados.append((op, True, op.funcao(*op.args, **op.kwargs)))
+                    except Exception as e:
+                        resultados.append((op, False, e))
+        except Exception as e:
+            # BEGIN ou COMMIT falhou: nenhuma operação do lote foi efetivada
+            logging.error(f"Erro ao efetivar lote da fila de escrita ({len(ativas)} operações): {e}")
+            falhas = {id(op): erro for op, ok, erro in resultados if not ok}
+            for op in ativas:
+                op.futuro.set_exception(falhas.get(id(op), e))
+            with self._lock:
+                self._falhas_commit += 1
+                self._erros += len(ativas)
+            return
+
+        erros = 0
+        for op, ok, valor in resultados:
+            if ok:
+                op.futuro.set_result(valor)
+            else:
+                erros += 1
+                op.futuro.set_exception(valor)
+        with self._lock:
+            self._lotes += 1
+            self._operacoes += len(ativas)
+            self._erros += erros
+            self._maior_lote = max(self._maior_lote, len(ativas))
+            self._tempo_lotes += time.perf_counter() - inicio
+
+    def encerrar(self, wait: bool = True) -> None:
+        """Executa as operações já enviadas e encerra a thread escritora"""
+        with self._lock:
+            if self._encerrada:
+                return
+            self._encerrada = True
+            thread = self._thread
+        if thread is not None:
+            self._fila.put(_FIM)
+            if wait:
+                thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        """Retorna as estatísticas da fila"""
+        with self._lock:
+            return {
+                'batches': self._lotes,
+                'operations': self._operacoes,
+                'errors': self._erros,
+                'failed_commits': self._falhas_commit,
+                'mean_batch': self._operacoes / self._lotes if self._lotes else 0.0,
+                'max_batch': self._maior_lote,
+                'mean_batch_ms': self._tempo_lotes * 1000 / self._lotes if self._lotes else 0.0,
+                'pending': self._fila.qsize(),
+                'max_operacoes': self.max_operacoes,
+                'max_espera_ms': self.max_espera_ms,
+            }
+
+
+class DAOComFilaDeEscrita(DAO):
+    """
+    Decorator que envia os métodos de escrita do DAO para a fila de escrita e
+    aguarda o resultado (a API continua síncrona). Leituras vão direto ao DAO.
+    Dentro de uma unidade de trabalho da thread chamadora, as escritas são
+    executadas diretamente, na transação dela.
+    """
+
+    ESCRITAS = frozenset({'incluir', 'alterar', 'excluir', 'incluir_lote', 'incluir_unica',
+                          'alterar_unica', 'excluir_sem_produtos', 'excluir_por_id',
+                          'descartar_alteracoes'})
+
+    def __init__(self, dao: DAO, fila: Optional[FilaDeEscrita] = None):
+        self.dao = dao
+        self._fila = fila
+
+    @property
+    def fila(self) -> FilaDeEscrita:
+        return self._fila or get_fila_escrita()
+
+    def __getattr__(self, nome: str) -> Any:
+        if nome == 'dao':
+            raise AttributeError(nome)
+        atributo = getattr(self.dao, nome)
+        if nome in self.ESCRITAS:
+            return functools.partial(self._escrever, nome)
+        return atributo
+
+    def _escrever(self, nome: str, *args, **kwargs) -> Any:
+        metodo = getattr(self.dao, nome)
+        if unidade_atual() is not None:
+            return metodo(*args, **kwargs)
+        return self.fila.executar(metodo, *args, **kwargs)
+
+    def incluir(self, obj: Any):
+        return self._escrever('incluir', obj)
+
+    def alterar(self, obj: Any):
+        return self._escrever('alterar', obj)
+
+    def excluir(self, obj: Any):
+        return self._escrever('excluir', obj)
+
+    def selecionar_todos(self) -> list[Any]:
+        return self.dao.selecionar_todos()
+
+    def selecionar_um(self, id: int) -> Optional[Any]:
+        return self.dao.selecionar_um(id)
+
+
+_fila: Optional[FilaDeEscrita] = None
+_fila_lock = threading.Lock()
+
+
+def get_fila_escrita() -> FilaDeEscrita:
+    """Retorna a fila de escrita compartilhada, criando-a (com os valores padrão) na primeira chamada"""
+    global _fila
+    if _fila is None:
+        with _fila_lock:
+            if _fila is None:
+                _fila = FilaDeEscrita()
+    return _fila
+
+
+def configurar_fila_escrita(**kwargs) -> FilaDeEscrita:
+    """
+    Substitui a fila compartilhada por uma nova com os parâmetros informados.
+    As operações já enviadas à fila anterior são executadas antes de ela encerrar.
+    """
+    global _fila
+    with _fila_lock:
+        anterior = _fila
+        _fila = FilaDeEscrita(**kwargs)
+    if anterior is not None:
+        anterior.encerrar()
+    return _fila
+
+
+def encerrar_fila_escrita(wait: bool = True) -> None:
+    """Encerra a fila compartilhada (uma nova é criada se for usada de novo)"""
+    global _fila
+    with _fila_lock:
+        anterior, _fila = _fila, None
+    if anterior is not None:
+        anterior.encerrar(wait)
+
+
+# as operações enfileiradas são efetivadas antes de o processo terminar
+atexit.register(encerrar_fila_escrita)
@@ -0,0 +1,43 @@
+"""
+Mapa de identidade (Identity Map) - uma única instância por entidade durante a materialização
+"""
+from typing import Any, Dict, Tuple
+
+from .dominio import Categoria
+
+
+class MapaDeIdentidade:
+    """
+    Guarda as entidades já materializadas, indexadas por (tipo, id), para que o
+    mesmo registro do banco corresponda sempre ao mesmo objeto Python.
+    Ex.: em uma listagem de produtos, todos os produtos de uma categoria
+    compartilham um único objeto Categoria.
+    """
+
+    def __init__(self):
+        self._objetos: Dict[Tuple[type, Any], Any] = {}
+
+    def categoria(self, id: int, descricao: str) -> Categoria:
+        """Retorna a Categoria já materializada com este id ou cria uma nova"""
+        chave = (Categoria, id)
+        categoria = self._objetos.get(chave)
+        if categoria is None:
+            categoria = Categoria(id=id, descricao=descricao)
+            self._objetos[chave] = categoria
+        return categoria
+
+    def atualizar_categoria(self, id: int, descricao: str) -> None:
+        """Atualiza a descrição da Categoria já materializada com este id, se houver"""
+        categoria = self._objetos.get((Categoria, id))
+        if categoria is not None:
+            categoria.descricao = descricao
+
+    def remover(self, tipo: type, id: Any) -> None:
+        """Esquece a entidade informada (ex.: após excluí-la)"""
+        self._objetos.pop((tipo, id), None)
+
+    def limpar(self) -> None:
+        self._objetos.clear()
+
+    def __len__(self) -> int:
+        return len(self._objetos)
@@ -0,0 +1,234 @@
+"""
+Importação de produtos a partir de arquivos CSV, em lotes
+
+O arquivo é lido sob demanda (csv.reader) e processado em lotes de
+tamanho_lote linhas: cada linha é convertida e validada com as mesmas regras de
+ProdutoService.criar_produto, e as linhas válidas do lote são incluídas em uma
+única transação (executemany). As categorias são carregadas uma única vez, em
+um dicionário descrição -> id, em vez de uma consulta por linha.
+
+Colunas reconhecidas (pelo cabeçalho, em qualquer ordem; as demais são ignoradas):
+    descricao, preco_unitario, quantidade_estoque (opcional, padrão 0) e
+    categoria_descricao (como na exportação) ou categoria_id
+
+O arquivo gerado por produtos/exportar/ (inclusive o .csv.gz) pode ser importado
+diretamente.
+
+Uso:
+    with open('produtos.csv', 'rb') as arquivo:
+        resultado = importar_produtos(abrir_csv(arquivo))
+    resultado.importadas, resultado.erros   # [ErroLinha(linha=7, mensagem='...'), ...]
+"""
+import csv
+import gzip
+import io
+import logging
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Iterator, NamedTuple, Optional, TextIO
+
+from .dominio import Categoria, Produto
+from .services import CategoriaService, ProdutoService
+
+
+TAMANHO_LOTE = 5000
+
+# erros guardados no resultado (os demais são apenas contados ou enviados a ao_erro)
+MAX_ERROS_RELATORIO = 1000
+
+
+class ErroLinha(NamedTuple):
+    """Erro de uma linha do arquivo (o cabeçalho é a linha 1)"""
+    linha: int
+    mensagem: str
+
+
+@dataclass
+class ResultadoImportacao:
+    lidas: int = 0
+    validas: int = 0
+    importadas: int = 0
+    total_erros: int = 0
+    erros: list[ErroLinha] = field(default_factory=list)
+    duracao_s: float = 0.0
+
+    def como_dict(self) -> dict[str, Any]:
+        return {
+            'lidas': self.lidas,
+            'validas': self.validas,
+            'importadas': self.importadas,
+            'total_erros': self.total_erros,
+            'erros': [erro._asdict() for erro in self.erros],
+            'duracao_s': round(self.duracao_s, 3),
+        }
+
+
+def abrir_csv(binario: BinaryIO) -> TextIO:
+    """Abre um arquivo binário (CSV em UTF-8, compactado ou não com gzip) para leitura em texto"""
+    assinatura = binario.read(2)
+    binario.seek(0)
+    if assinatura == b'\x1f\x8b':
+        binario = gzip.GzipFile(fileobj=binario)
+    # utf-8-sig: ignora o BOM gravado por algumas planilhas
+    return io.TextIOWrapper(binario, encoding='utf-8-sig', newline='')
+
+
+def _numero(texto: str, tipo: type, campo: str) -> Any:
+    texto = texto.strip()
+    if tipo is float and ',' in texto and '.' not in texto:
+        # vírgula decimal (ex.: 19,90)
+        texto = texto.replace(',', '.')
+    try:
+        return tipo(texto)
+    except ValueError:
+        raise ValueError(f"{campo} inválido: {texto!r}") from None
+
+
+class ImportadorProdutos:
+    """
+    Importa produtos de um CSV em lotes, com relatório de erros por linha.
+
+    Args:
+        tamanho_lote: Linhas validadas e incluídas por transação
+        max_erros: Erros guardados em ResultadoImportacao.erros
+        gravar: False apenas valida o arquivo, sem incluir nada
+        ao_erro: Chamada para cada erro (ex.: gravar o relatório completo em arquivo)
+    """
+
+    COLUNAS_OBRIGATORIAS = ('descricao', 'preco_unitario')
+
+    def __init__(self, tamanho_lote: int = TAMANHO_LOTE, max_erros: int = MAX_ERROS_RELATORIO,
+                 gravar: bool = True, ao_erro: Optional[Callable[[ErroLinha], None]] = None):
+        if tamanho_lote < 1:
+            raise ValueError("O tamanho do lote deve ser maior que zero")
+        self.tamanho_lote = tamanho_lote
+        self.max_erros = max_erros
+        self.gravar = gravar
+        self.ao_erro = ao_erro
+        self.service = ProdutoService()
+
+    def _indices(self, cabecalho: list[str]) -> None:
+        colunas = {nome.strip().lower(): i for i, nome in enumerate(cabecalho)}
+        faltando = [nome for nome in self.COLUNAS_OBRIGATORIAS if nome not in colunas]
+        if 'categoria_descricao' not in colunas and 'categoria_id' not in colunas:
+            faltando.append('categoria_descricao (ou categoria_id)')
+        if faltando:
+            raise ValueError(f"Colunas ausentes no cabeçalho do CSV: {', '.join(faltando)}")
+        self._descricao = colunas['descricao']
+        self._preco = colunas['preco_unitario']
+        self._quantidade = colunas.get('quantidade_estoque')
+        self._categoria_descricao = colunas.get('categoria_descricao')
+        self._categoria_id = colunas.get('categoria_id')
+
+    def _carregar_categorias(self) -> None:
+        """Consulta as categorias uma única vez para todo o arquivo"""
+        self._categorias: dict[str, Categoria] = {}
+        self._categorias_por_id: dict[int, Categoria] = {}
+        for categoria in CategoriaService().iterar_todas():
+            self._categorias[categoria.descricao] = categoria
+            self._categorias_por_id[categoria.id] = categoria
+
+    def _categoria(self, registro: list[str]) -> Categoria:
+        if self._categoria_descricao is not None and registro[self._categoria_descricao].strip():
+            categoria = self._categorias.get(registro[self._categoria_descricao].strip())
+        elif self._categoria_id is not None and registro[self._categoria_id].strip():
+            categoria = self._categorias_por_id.get(_numero(registro[self._categoria_id], int, "Categoria"))
+        else:
+            raise ValueError("A categoria do produto não foi informada")
+        if categoria is None:
+            raise ValueError("Categoria não encontrada")
+        return categoria
+
+    def _converter(self, registro: list[str]) -> Produto:
+        """Converte e valida uma linha (mesmas regras de ProdutoService.criar_produto)"""
+        try:
+            descricao = registro[self._descricao]
+            preco_unitario = _numero(registro[self._preco], float, "Preço unitário")
+            quantidade = registro[self._quantidade] if self._quantidade is not None else ''
+            quantidade_estoque = _numero(quantidade, int, "Quantidade em estoque") if quantidade.strip() else 0
+            categoria = self._categoria(registro)
+        except IndexError:
+            raise ValueError(f"A linha tem {len(registro)} colunas; faltam valores") from None
+        self.service.validar_dados(descricao, preco_unitario, quantidade_estoque)
+        return Produto(id=None, descricao=descricao.strip(), preco_unitario=preco_unitario,
+                       quantidade_estoque=quantidade_estoque, categoria=categoria)
+
+    def _erro(self, resultado: ResultadoImportacao, linha: int, mensagem: str) -> None:
+        erro = ErroLinha(linha, mensagem)
+        resultado.total_erros += 1
+        if len(resultado.erros) < self.max_erros:
+            resultado.erros.append(erro)
+        if self.ao_erro is not None:
+            self.ao_erro(erro)
+
+    def _incluir(self, resultado: ResultadoImportacao, lote: list[tuple[int, Produto]]) -> None:
+        """Inclui o lote em uma transação; se ela falhar, inclui linha a linha para apontar os erros"""
+        try:
+            self.service.criar_produtos_em_lote([produto for _, produto in lote], self.tamanho_lote)
+            resultado.importadas += len(lote)
+            return
+        except (ValueError, sqlite3.IntegrityError) as e:
+            # ex.: categoria excluída durante a importação; a transação do lote foi desfeita
+            logging.warning(f"Lote com {len(lote)} produtos rejeitado ({e}); incluindo linha a linha")
+        for linha, produto in lote:
+            produto.id = None
+            try:
+                self.service.criar_produtos_em_lote([produto])
+                resultado.importadas += 1
+            except (ValueError, sqlite3.IntegrityError) as e:
+                self._erro(resultado, linha, str(e))
+
+    def importar(self, arquivo: TextIO) -> ResultadoImportacao:
+        """
+        Importa os produtos do arquivo CSV (texto) e retorna o resultado.
+        Um arquivo ilegível (CSV malformado, .csv.gz truncado ou corrompido) gera
+        ValueError com o número da linha; os lotes anteriores já foram incluídos.
+        """
+        leitor = csv.reader(arquivo)
+        try:
+            return self._importar(leitor)
+        except csv.Error as e:
+            raise ValueError(f"CSV malformado na linha {leitor.line_num}: {e}") from e
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            raise ValueError(f"Arquivo compactado truncado ou corrompido após a linha "
+                             f"{leitor.line_num}: {e}") from e
+
+    def _importar(self, leitor) -> ResultadoImportacao:
+        inicio = time.perf_counter()
+        cabecalho = next(leitor, None)
+        if not cabecalho:
+            raise ValueError("O arquivo CSV está vazio")
+        self._indices(cabecalho)
+        self._carregar_categorias()
+
+        resultado = ResultadoImportacao()
+        # (número da linha no arquivo, registro); linhas em branco são ignoradas
+        registros: Iterator[tuple[int, list[str]]] = (
+            (leitor.line_num, registro) for registro in leitor if registro)
+        while True:
+            bloco = list(islice(registros, self.tamanho_lote))
+            if not bloco:
+                break
+            resultado.lidas += len(bloco)
+            validos = []
+            for linha, registro in bloco:
+                try:
+                    validos.append((linha, self._converter(registro)))
+                except ValueError as e:
+                    self._erro(resultado, linha, str(e))
+            resultado.validas += len(validos)
+            if validos and self.gravar:
+                self._incluir(resultado, validos)
+
+        resultado.duracao_s = time.perf_counter() - inicio
+        logging.info(f"Importação de produtos: {resultado.importadas} de {resultado.lidas} linhas "
+                     f"em {resultado.duracao_s:.1f}s ({resultado.total_erros} erros)")
+        return resultado
+
+
+def importar_produtos(arquivo: TextIO, **kwargs) -> ResultadoImportacao:
+    """Atalho para ImportadorProdutos(**kwargs).importar(arquivo)"""
+    return ImportadorProdutos(**kwargs).importar(arquivo)
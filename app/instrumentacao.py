@@ -0,0 +1,219 @@
+"""
+Instrumentação das consultas ao banco de dados
+
+Cada execução feita pelos DAOs (e pelo DatabaseConnection) é medida: duração,
+quantidade de linhas retornadas/afetadas e o nome do comando. As medições são
+agregadas em histogramas de latência por comando, e as execuções acima do limite
+configurado são registradas no log de consultas lentas (com os parâmetros
+mascarados, pois podem conter dados dos usuários).
+
+Consulta em tempo de execução:
+    from app.instrumentacao import MONITOR
+    MONITOR.stats()    # histogramas/percentis por comando
+    MONITOR.lentas()   # últimas consultas lentas
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from .comandos import Comando
+
+
+logger_lentas = logging.getLogger('app.consultas_lentas')
+
+# limites superiores (em ms) dos intervalos dos histogramas; o último intervalo é aberto
+LIMITES_HISTOGRAMA_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+@functools.lru_cache(maxsize=1024)
+def nome_do_sql(sql: str) -> str:
+    """Nome usado para agrupar um SQL avulso (não registrado): o texto normalizado e abreviado"""
+    texto = ' '.join(sql.split())
+    return texto if len(texto) <= 80 else texto[:77] + '...'
+
+
+def nome_do_comando(sql: 'str | Comando') -> str:
+    if isinstance(sql, Comando):
+        return sql.nome
+    return nome_do_sql(sql)
+
+
+def mascarar_parametros(parametros: Any) -> tuple:
+    """Substitui os valores dos parâmetros pelo tipo (e tamanho, para textos)"""
+    if not isinstance(parametros, (tuple, list)):
+        return ('<?>',)
+    mascarados = []
+    for valor in parametros:
+        if valor is None:
+            mascarados.append(None)
+        elif isinstance(valor, (str, bytes)):
+            mascarados.append(f"<{type(valor).__name__}:{len(valor)}>")
+        else:
+            mascarados.append(f"<{type(valor).__name__}>")
+    return tuple(mascarados)
+
+
+class HistogramaLatencia:
+    """Histograma de latências com intervalos fixos (não é thread-safe: use com o lock do monitor)"""
+
+    __slots__ = ('contagens', 'execucoes', 'erros', 'linhas', 'total', 'maximo')
+
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_HISTOGRAMA_MS) + 1)
+        self.execucoes = 0
+        self.erros = 0
+        self.linhas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, duracao_ms: float, linhas: int, erro: bool) -> None:
+        self.contagens[bisect.bisect_left(LIMITES_HISTOGRAMA_MS, duracao_ms)] += 1
+        self.execucoes += 1
+        self.total += duracao_ms
+        if duracao_ms > self.maximo:
+            self.maximo = duracao_ms
+        if erro:
+            self.erros += 1
+        elif linhas > 0:
+            self.linhas += linhas
+
+    def percentil(self, p: float) -> float:
+        """Estimativa do percentil p (0-100): limite superior do intervalo que o contém"""
+        if not self.execucoes:
+            return 0.0
+        alvo = p / 100 * self.execucoes
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo and contagem:
+                if i < len(LIMITES_HISTOGRAMA_MS):
+                    return min(LIMITES_HISTOGRAMA_MS[i], round(self.maximo, 3))
+                return round(self.maximo, 3)
+        return self.maximo
+
+    def resumo(self) -> Dict[str, Any]:
+        intervalos = [f"<={limite}" for limite in LIMITES_HISTOGRAMA_MS] + [f">{LIMITES_HISTOGRAMA_MS[-1]}"]
+        return {
+            'executions': self.execucoes,
+            'errors': self.erros,
+            'rows': self.linhas,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.execucoes, 3) if self.execucoes else 0.0,
+            'max_ms': round(self.maximo, 3),
+            'p50_ms': self.percentil(50),
+            'p95_ms': self.percentil(95),
+            'p99_ms': self.percentil(99),
+            'histogram_ms': {intervalo: contagem for intervalo, contagem
+                             in zip(intervalos, self.contagens) if contagem},
+        }
+
+
+class MonitorDeConsultas:
+    """
+    Agrega as medições das consultas por comando e mantém o log de consultas lentas.
+    Thread-safe.
+
+    Args:
+        limite_lento_ms: Execuções com duração acima deste valor vão para o log de
+            consultas lentas (None desativa o log)
+        max_lentas: Quantidade de consultas lentas recentes mantidas em memória
+    """
+
+    def __init__(self, limite_lento_ms: Optional[float] = 100.0, max_lentas: int = 100):
+        self.ativo = True
+        self.limite_lento_ms = limite_lento_ms
+        self._lock = threading.Lock()
+        self._histogramas: Dict[str, HistogramaLatencia] = {}
+        self._lentas: deque = deque(maxlen=max_lentas)
+
+    def medir(self, sql: 'str | Comando', parametros: Any = ()) -> 'Medicao':
+        """
+        Context manager que mede uma execução. O chamador informa as linhas
+        retornadas/afetadas em medicao.linhas antes de sair do bloco.
+        """
+        return Medicao(self, sql, parametros)
+
+    def registrar(self, sql: 'str | Comando', parametros: Any, duracao_ms: float,
+                  linhas: int = -1, erro: bool = False) -> None:
+        """Registra uma execução já medida"""
+        nome = nome_do_comando(sql)
+        with self._lock:
+            histograma = self._histogramas.get(nome)
+            if histograma is None:
+                histograma = self._histogramas[nome] = HistogramaLatencia()
+            histograma.registrar(duracao_ms, linhas, erro)
+
+        if self.limite_lento_ms is not None and duracao_ms >= self.limite_lento_ms:
+            lenta = {
+                'statement': nome,
+                'duration_ms': round(duracao_ms, 3),
+                'rows': linhas,
+                'error': erro,
+                'params': mascarar_parametros(parametros),
+                'at': time.time(),
+            }
+            with self._lock:
+                self._lentas.append(lenta)
+            logger_lentas.warning(
+                f"Consulta lenta ({duracao_ms:.1f} ms, {linhas} linhas): {nome} - "
+                f"parâmetros: {lenta['params']}")
+
+    def stats(self, nome: Optional[str] = None) -> Dict[str, Any]:
+        """Retorna o resumo (execuções, erros, linhas, latências) de cada comando, ou de um só"""
+        with self._lock:
+            if nome is not None:
+                histograma = self._histogramas.get(nome)
+                return histograma.resumo() if histograma else {}
+            return {nome: histograma.resumo() for nome, histograma in self._histogramas.items()}
+
+    def lentas(self) -> list:
+        """Retorna as consultas lentas mais recentes (da mais antiga para a mais nova)"""
+        with self._lock:
+            return list(self._lentas)
+
+    def zerar(self) -> None:
+        with self._lock:
+            self._histogramas.clear()
+            self._lentas.clear()
+
+
+class Medicao:
+    """Medição de uma única execução (ver MonitorDeConsultas.medir)"""
+
+    __slots__ = ('monitor', 'sql', 'parametros', 'linhas', 'inicio')
+
+    def __init__(self, monitor: MonitorDeConsultas, sql: 'str | Comando', parametros: Any):
+        self.monitor = monitor
+        self.sql = sql
+        self.parametros = parametros
+        self.linhas = -1
+        self.inicio = 0.0
+
+    def __enter__(self) -> 'Medicao':
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb) -> None:
+        if self.monitor.ativo:
+            duracao_ms = (time.perf_counter() - self.inicio) * 1000
+            self.monitor.registrar(self.sql, self.parametros, duracao_ms, self.linhas, tipo is not None)
+
+
+MONITOR = MonitorDeConsultas()
+
+
+def configurar_monitor(limite_lento_ms: Optional[float] = None, ativo: Optional[bool] = None,
+                       max_lentas: Optional[int] = None) -> MonitorDeConsultas:
+    """Altera a configuração do monitor compartilhado"""
+    if limite_lento_ms is not None:
+        MONITOR.limite_lento_ms = limite_lento_ms
+    if ativo is not None:
+        MONITOR.ativo = ativo
+    if max_lentas is not None:
+        with MONITOR._lock:
+            MONITOR._lentas = deque(MONITOR._lentas, maxlen=max_lentas)
+    return MONITOR
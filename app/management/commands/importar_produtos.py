@@ -0,0 +1,57 @@
+"""
+Comando para importar produtos de um arquivo CSV (ou .csv.gz) em lotes
+
+Uso:
+    python manage.py importar_produtos produtos.csv
+    python manage.py importar_produtos produtos.csv.gz --tamanho-lote 10000
+    python manage.py importar_produtos produtos.csv --somente-validar --relatorio erros.csv
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.importacao import TAMANHO_LOTE, ImportadorProdutos, abrir_csv
+
+
+class Command(BaseCommand):
+    help = "Importa produtos de um arquivo CSV, com validação em lotes e relatório de erros por linha"
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Arquivo CSV (UTF-8), compactado ou não com gzip")
+        parser.add_argument('--tamanho-lote', type=int, default=TAMANHO_LOTE,
+                            help="Linhas validadas e incluídas por transação")
+        parser.add_argument('--somente-validar', action='store_true',
+                            help="Valida o arquivo sem incluir nenhum produto")
+        parser.add_argument('--relatorio', default=None,
+                            help="Grava todos os erros (linha, mensagem) neste arquivo CSV")
+
+    def handle(self, *args, **options):
+        relatorio = open(options['relatorio'], 'w', encoding='utf-8', newline='') if options['relatorio'] else None
+        try:
+            ao_erro = None
+            if relatorio is not None:
+                escritor = csv.writer(relatorio)
+                escritor.writerow(('linha', 'mensagem'))
+                ao_erro = escritor.writerow
+            importador = ImportadorProdutos(tamanho_lote=options['tamanho_lote'],
+                                            gravar=not options['somente_validar'], ao_erro=ao_erro)
+            try:
+                with open(options['arquivo'], 'rb') as binario:
+                    resultado = importador.importar(abrir_csv(binario))
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+        finally:
+            if relatorio is not None:
+                relatorio.close()
+
+        for erro in resultado.erros[:20 if relatorio is None else 0]:
+            self.stdout.write(self.style.WARNING(f"Linha {erro.linha}: {erro.mensagem}"))
+        if resultado.total_erros > 20 and relatorio is None:
+            self.stdout.write(f"... e mais {resultado.total_erros - 20} erros "
+                              f"(use --relatorio para gravar todos)")
+        acao = "validadas" if options['somente_validar'] else "importadas"
+        quantidade = resultado.validas if options['somente_validar'] else resultado.importadas
+        self.stdout.write(self.style.SUCCESS(
+            f"{quantidade} de {resultado.lidas} linhas {acao} em {resultado.duracao_s:.1f}s "
+            f"({resultado.lidas / resultado.duracao_s if resultado.duracao_s else 0:,.0f} linhas/s); "
+            f"{resultado.total_erros} com erro"))
@@ -0,0 +1,78 @@
+"""
+Comando para aplicar e inspecionar as migrações do banco de dados da aplicação
+
+Uso:
+    python manage.py migrar_banco                     # aplica as migrações pendentes
+    python manage.py migrar_banco --ate 2             # aplica somente até a versão 2
+    python manage.py migrar_banco --status            # lista migrações aplicadas e pendentes
+    python manage.py migrar_banco --verificar-planos  # EXPLAIN QUERY PLAN das consultas dos DAOs
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from app.migracoes import aplicar_migracoes, listar_migracoes, migracoes_pendentes, versoes_aplicadas
+from app.migracoes.planos import verificar_planos
+from app.singleton import get_database_connection
+
+
+class Command(BaseCommand):
+    help = "Aplica as migrações pendentes do banco de dados da aplicação"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ate', type=int, default=None,
+                            help="Aplica as migrações somente até esta versão")
+        parser.add_argument('--status', action='store_true',
+                            help="Lista as migrações aplicadas e pendentes, sem aplicar nada")
+        parser.add_argument('--verificar-planos', action='store_true',
+                            help="Roda EXPLAIN QUERY PLAN nas consultas dos DAOs e falha se "
+                                 "alguma percorrer uma tabela ou um índice inteiro")
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.listar_status()
+        elif options['verificar_planos']:
+            self.verificar_planos(options['verbosity'])
+        else:
+            aplicadas = aplicar_migracoes(options['ate'])
+            for migracao in aplicadas:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Aplicada: {migracao.versao:04d}_{migracao.nome}"))
+            if not aplicadas:
+                self.stdout.write("Nenhuma migração pendente.")
+
+    def listar_status(self):
+        with get_database_connection().conexao() as conexao:
+            aplicadas = versoes_aplicadas(conexao)
+        for migracao in listar_migracoes():
+            if migracao.versao in aplicadas:
+                situacao = f"aplicada em {aplicadas[migracao.versao][1]}"
+            else:
+                situacao = "PENDENTE"
+            self.stdout.write(f"{migracao.versao:04d}_{migracao.nome}: {situacao}")
+
+    def verificar_planos(self, verbosidade: int):
+        with get_database_connection().conexao() as conexao:
+            pendentes = migracoes_pendentes(conexao)
+        if pendentes:
+            self.stdout.write(self.style.WARNING(
+                f"Atenção: {len(pendentes)} migração(ões) pendente(s); os índices podem estar ausentes."))
+        falhas = 0
+        for resultado in verificar_planos():
+            if resultado.falhou:
+                falhas += 1
+                estilo = self.style.ERROR
+                situacao = ("VARREDURA COMPLETA" if resultado.varreduras and not resultado.permitida
+                            else f"NÃO USA {resultado.indice_esperado}")
+            elif resultado.varreduras:
+                estilo, situacao = self.style.WARNING, "varredura permitida"
+            else:
+                estilo, situacao = self.style.SUCCESS, "ok"
+            if resultado.falhou or verbosidade > 1:
+                self.stdout.write(estilo(f"{resultado.metodo}: {situacao}"))
+                self.stdout.write(f"    {' '.join(resultado.sql.split())}")
+                for detalhe in resultado.plano:
+                    self.stdout.write(f"    -> {detalhe}")
+        if falhas:
+            raise CommandError(f"{falhas} consulta(s) dos DAOs percorrem tabelas ou índices inteiros "
+                               f"ou não usam o índice esperado")
+        self.stdout.write(self.style.SUCCESS("Nenhuma consulta dos DAOs percorre tabelas ou índices inteiros "
+                                             "fora das varreduras permitidas."))
@@ -0,0 +1,44 @@
+"""
+Comando para inspecionar o perfil de desempenho (PRAGMAs) das conexões SQLite
+
+Uso:
+    python manage.py perfil_banco            # PRAGMAs em vigor nas conexões dos DAOs
+    python manage.py perfil_banco --perfis   # valores de cada perfil disponível
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.perfis import PERFIS, PRAGMAS_PERFIL
+from app.pool import get_connection_pool
+from app.singleton import get_database_connection
+
+
+class Command(BaseCommand):
+    help = "Mostra os PRAGMAs em vigor nas conexões SQLite e os perfis disponíveis"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfis', action='store_true',
+                            help="Lista os valores de cada perfil (DATABASE_PROFILE)")
+
+    def handle(self, *args, **options):
+        if options['perfis']:
+            self.listar_perfis()
+        else:
+            self.listar_em_vigor()
+
+    def listar_perfis(self):
+        nomes = list(PERFIS)
+        self.stdout.write(f"{'pragma':<20}" + ''.join(f"{nome:>14}" for nome in nomes))
+        for pragma in PRAGMAS_PERFIL:
+            self.stdout.write(f"{pragma:<20}" + ''.join(f"{PERFIS[nome][pragma]!s:>14}" for nome in nomes))
+
+    def listar_em_vigor(self):
+        pool = get_connection_pool()
+        self.stdout.write(f"Banco: {pool.database}")
+        self.stdout.write(f"DATABASE_PROFILE: {getattr(settings, 'DATABASE_PROFILE', None)!r} "
+                          f"(pool: {pool.stats()['profile']!r})")
+        pragmas = get_database_connection().pragmas()
+        colunas = [papel for papel in ('escrita', 'leitura') if pragmas[papel] is not None]
+        self.stdout.write(f"{'pragma':<20}" + ''.join(f"{papel:>14}" for papel in colunas))
+        for pragma in pragmas['escrita']:
+            self.stdout.write(f"{pragma:<20}" + ''.join(f"{pragmas[papel][pragma]!s:>14}" for papel in colunas))
@@ -0,0 +1,14 @@
+-- Tabelas da aplicação (IF NOT EXISTS: bancos criados antes das migrações já as possuem)
+CREATE TABLE IF NOT EXISTS Categoria(
+    id integer PRIMARY KEY AUTOINCREMENT,
+    descricao varchar(50) not null
+);
+
+CREATE TABLE IF NOT EXISTS Produto(
+    id integer PRIMARY KEY AUTOINCREMENT,
+    descricao varchar(100) not null,
+    preco_unitario decimal(10,2) not null,
+    quantidade_estoque integer,
+    categoria_id int not null,
+    FOREIGN KEY(categoria_id) REFERENCES Categoria(id)
+);
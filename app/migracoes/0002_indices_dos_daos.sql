@@ -0,0 +1,14 @@
+-- Índices usados pelas consultas dos DAOs
+
+-- CategoriaDAO: existe_categoria (WHERE descricao = ?) e listagens/paginação ORDER BY descricao, id
+CREATE INDEX IF NOT EXISTS idx_categoria_descricao ON Categoria(descricao, id);
+
+-- ProdutoDAO: listagens/paginação ORDER BY p.descricao, p.id
+CREATE INDEX IF NOT EXISTS idx_produto_descricao ON Produto(descricao, id);
+
+-- ProdutoDAO.selecionar_por_categoria / iterar_por_categoria (WHERE categoria_id = ? ORDER BY descricao)
+-- e a verificação de produtos vinculados antes de excluir uma categoria
+CREATE INDEX IF NOT EXISTS idx_produto_categoria ON Produto(categoria_id, descricao, id);
+
+-- ProdutoDAO.selecionar_estoque_baixo (WHERE quantidade_estoque < ?)
+CREATE INDEX IF NOT EXISTS idx_produto_quantidade_estoque ON Produto(quantidade_estoque);
@@ -0,0 +1,29 @@
+-- Busca textual (FTS5) na descrição dos produtos, usada por ProdutoDAO.buscar_por_descricao
+
+-- Tabela de conteúdo externo: o texto fica somente em Produto, o FTS guarda apenas o índice.
+-- remove_diacritics 2 faz "cafe" encontrar "Café"; prefix acelera as buscas por prefixo
+-- (enquanto o usuário ainda está digitando) de 2 e 3 caracteres.
+CREATE VIRTUAL TABLE IF NOT EXISTS produto_busca USING fts5(
+    descricao,
+    content = 'Produto',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Mantém o índice sincronizado com a tabela Produto
+CREATE TRIGGER IF NOT EXISTS produto_busca_ai AFTER INSERT ON Produto BEGIN
+    INSERT INTO produto_busca(rowid, descricao) VALUES (new.id, new.descricao);
+END;
+
+CREATE TRIGGER IF NOT EXISTS produto_busca_ad AFTER DELETE ON Produto BEGIN
+    INSERT INTO produto_busca(produto_busca, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+END;
+
+CREATE TRIGGER IF NOT EXISTS produto_busca_au AFTER UPDATE OF descricao ON Produto BEGIN
+    INSERT INTO produto_busca(produto_busca, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+    INSERT INTO produto_busca(rowid, descricao) VALUES (new.id, new.descricao);
+END;
+
+-- Indexa os produtos já existentes
+INSERT INTO produto_busca(produto_busca) VALUES ('rebuild');
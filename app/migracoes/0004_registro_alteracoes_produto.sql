@@ -0,0 +1,18 @@
+-- Registro das alterações e exclusões de produtos, usado pela atualização incremental
+-- da análise de estoque (app.analise_estoque)
+
+-- As inclusões não são registradas: os ids (AUTOINCREMENT) são crescentes, então os
+-- produtos novos são os de id maior que o último já carregado. Assim a importação em
+-- lote não paga um gatilho a mais por linha.
+CREATE TABLE IF NOT EXISTS produto_alteracao(
+    seq integer PRIMARY KEY AUTOINCREMENT,
+    produto_id integer not null
+);
+
+CREATE TRIGGER IF NOT EXISTS produto_alteracao_au AFTER UPDATE ON Produto BEGIN
+    INSERT INTO produto_alteracao(produto_id) VALUES (new.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS produto_alteracao_ad AFTER DELETE ON Produto BEGIN
+    INSERT INTO produto_alteracao(produto_id) VALUES (old.id);
+END;
@@ -0,0 +1,18 @@
+-- Suspensão de gatilhos durante as inclusões em lote (DAO.executar_lote)
+
+-- Um gatilho listado aqui não dispara. A inclusão em lote grava o nome dentro da
+-- própria transação e o remove antes do commit: nenhuma outra conexão o vê, e um
+-- rollback (ou a queda do processo) o desfaz. Diferente de DROP/CREATE TRIGGER,
+-- não altera o esquema, então não invalida os comandos preparados das conexões.
+CREATE TABLE IF NOT EXISTS gatilho_suspenso(
+    nome varchar(100) PRIMARY KEY
+) WITHOUT ROWID;
+
+-- A indexação da busca textual produto a produto passa a poder ser suspensa:
+-- ProdutoDAO.incluir_lote indexa cada bloco com um único INSERT ... SELECT
+DROP TRIGGER IF EXISTS produto_busca_ai;
+CREATE TRIGGER produto_busca_ai AFTER INSERT ON Produto
+WHEN NOT EXISTS (SELECT 1 FROM gatilho_suspenso WHERE nome = 'produto_busca_ai')
+BEGIN
+    INSERT INTO produto_busca(rowid, descricao) VALUES (new.id, new.descricao);
+END;
@@ -0,0 +1,112 @@
+"""
+Migrações versionadas do esquema do banco de dados
+
+Cada migração é um script SQL neste diretório, nomeado NNNN_descricao.sql, aplicado
+uma única vez e em ordem (somente para frente: não há scripts de reversão).
+As versões aplicadas ficam registradas na tabela schema_versao.
+"""
+import re
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from ..singleton import get_database_connection
+
+
+DIRETORIO = Path(__file__).resolve().parent
+_PADRAO_ARQUIVO = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+
+class Migracao(NamedTuple):
+    versao: int
+    nome: str
+    caminho: Path
+
+    def ler_sql(self) -> str:
+        return self.caminho.read_text(encoding='utf-8')
+
+
+def listar_migracoes() -> list[Migracao]:
+    """Retorna todas as migrações disponíveis, ordenadas pela versão"""
+    migracoes = []
+    for caminho in DIRETORIO.glob('*.sql'):
+        m = _PADRAO_ARQUIVO.match(caminho.name)
+        if not m:
+            raise ValueError(f"Nome de migração inválido: {caminho.name}")
+        migracoes.append(Migracao(int(m.group(1)), m.group(2), caminho))
+    migracoes.sort()
+    versoes = [m.versao for m in migracoes]
+    if len(versoes) != len(set(versoes)):
+        raise ValueError("Existem migrações com a mesma versão")
+    return migracoes
+
+
+def _criar_tabela_versao(conexao: sqlite3.Connection) -> None:
+    conexao.execute("""CREATE TABLE IF NOT EXISTS schema_versao(
+                           versao integer PRIMARY KEY,
+                           nome varchar(100) not null,
+                           aplicada_em varchar(32) not null
+                       )""")
+    conexao.commit()
+
+
+def versoes_aplicadas(conexao: sqlite3.Connection) -> dict[int, tuple[str, str]]:
+    """Retorna {versão: (nome, data de aplicação)} das migrações já aplicadas"""
+    _criar_tabela_versao(conexao)
+    registros = conexao.execute("SELECT versao, nome, aplicada_em FROM schema_versao").fetchall()
+    return {reg[0]: (reg[1], reg[2]) for reg in registros}
+
+
+def versao_atual(conexao: sqlite3.Connection) -> int:
+    """Retorna a maior versão aplicada (0 se nenhuma)"""
+    return max(versoes_aplicadas(conexao), default=0)
+
+
+def migracoes_pendentes(conexao: sqlite3.Connection) -> list[Migracao]:
+    """Retorna as migrações ainda não aplicadas, em ordem"""
+    aplicadas = versoes_aplicadas(conexao)
+    return [m for m in listar_migracoes() if m.versao not in aplicadas]
+
+
+def aplicar_migracao(conexao: sqlite3.Connection, migracao: Migracao) -> None:
+    """
+    Aplica uma migração em uma única transação: se qualquer comando falhar,
+    nada do script é mantido e a versão não é registrada.
+    """
+    aplicada_em = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    # executescript() efetiva a transação pendente e executa o texto como está,
+    # então o BEGIN/COMMIT explícito torna o script e o registro da versão atômicos
+    script = (
+        "BEGIN;\n"
+        f"{migracao.ler_sql()}\n;\n"
+        f"INSERT INTO schema_versao(versao, nome, aplicada_em) "
+        f"VALUES ({migracao.versao}, '{migracao.nome}', '{aplicada_em}');\n"
+        "COMMIT;"
+    )
+    try:
+        conexao.executescript(script)
+    except sqlite3.Error as e:
+        if conexao.in_transaction:
+            conexao.rollback()
+        logging.error(f"Erro ao aplicar a migração {migracao.versao:04d}_{migracao.nome}: {e}")
+        raise
+
+
+def aplicar_migracoes(ate: Optional[int] = None) -> list[Migracao]:
+    """
+    Aplica, em ordem, as migrações pendentes (opcionalmente só até a versão informada).
+
+    Returns:
+        Lista das migrações aplicadas
+    """
+    aplicadas = []
+    with get_database_connection().conexao() as conexao:
+        for migracao in migracoes_pendentes(conexao):
+            if ate is not None and migracao.versao > ate:
+                break
+            aplicar_migracao(conexao, migracao)
+            logging.info(f"Migração aplicada: {migracao.versao:04d}_{migracao.nome}")
+            aplicadas.append(migracao)
+    return aplicadas
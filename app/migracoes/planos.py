@@ -0,0 +1,163 @@
+"""
+Verificação dos planos de execução das consultas dos DAOs
+
+Executa cada método dos DAOs dentro de uma unidade de trabalho que é desfeita ao
+final, captura os comandos SQL enviados ao SQLite e roda EXPLAIN QUERY PLAN em
+cada um. Uma consulta que percorre uma tabela inteira ("SCAN tabela") ou um índice
+inteiro, sem restrição ("SCAN tabela USING INDEX idx"), é considerada falha, exceto
+as listadas em VARREDURAS_PERMITIDAS. Os métodos de
+INDICES_ESPERADOS também falham se o plano não buscar pelo índice indicado.
+"""
+import re
+from typing import NamedTuple, Callable, Optional
+
+from ..dao import CategoriaDAO, ProdutoDAO
+from ..dominio import Categoria, Produto
+from ..transacao import unidade_de_trabalho
+
+
+# métodos que, por definição, precisam ler todas as linhas (ou, na primeira página,
+# percorrem o índice na ordem da listagem até o LIMIT)
+VARREDURAS_PERMITIDAS = {
+    'CategoriaDAO.selecionar_todos': "listagem de todas as categorias",
+    'CategoriaDAO.iterar_todos': "listagem de todas as categorias",
+    'CategoriaDAO.selecionar_pagina': "primeira página, limitada pelo LIMIT",
+    'ProdutoDAO.selecionar_todos': "listagem de todos os produtos",
+    'ProdutoDAO.iterar_todos': "listagem de todos os produtos",
+    'ProdutoDAO.iterar_linhas': "listagem de todos os produtos",
+    'ProdutoDAO.selecionar_pagina': "primeira página, limitada pelo LIMIT",
+    'ProdutoDAO.calcular_valor_total_estoque': "agregação sobre todos os produtos",
+    'ProdutoDAO.resumo_estoque_por_categoria': "agregação sobre todos os produtos",
+}
+
+# métodos cujo filtro precisa conduzir a consulta pelo índice indicado (um plano que
+# percorre outro índice para evitar a ordenação é mais lento e não aparece como varredura)
+INDICES_ESPERADOS = {
+    'ProdutoDAO.selecionar_estoque_baixo': 'idx_produto_quantidade_estoque',
+}
+
+_TIPOS_COMANDO = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+# "SCAN p" (tabela inteira) ou "SCAN p USING [COVERING] INDEX idx" sem restrição
+# "(col=?)": leitura do índice inteiro. As tabelas virtuais (FTS5, json_each) aplicam
+# os próprios filtros e o catálogo sqlite_master é pequeno, então não contam.
+_VARREDURA = re.compile(r'^SCAN (?!sqlite_master$|CONSTANT ROW$)(\w+)(?: USING (?:COVERING )?INDEX \w+)?$')
+# subconsultas materializadas ("MATERIALIZE b") são percorridas sem índice por natureza
+_MATERIALIZADA = re.compile(r'^MATERIALIZE (\w+)$')
+
+
+class PlanoConsulta(NamedTuple):
+    metodo: str
+    sql: str
+    plano: list[str]
+    varreduras: list[str]
+    permitida: bool
+    indice_esperado: Optional[str] = None
+
+    @property
+    def usa_indice_esperado(self) -> bool:
+        """Se o plano busca (com restrição) pelo índice esperado para o método, quando houver"""
+        return self.indice_esperado is None or any(
+            detalhe.startswith('SEARCH ') and f" INDEX {self.indice_esperado} (" in detalhe
+            for detalhe in self.plano)
+
+    @property
+    def falhou(self) -> bool:
+        return (bool(self.varreduras) and not self.permitida) or not self.usa_indice_esperado
+
+
+def varreduras_do_plano(plano: list[str]) -> list[str]:
+    """
+    Retorna os passos do plano (coluna detail do EXPLAIN QUERY PLAN) que percorrem
+    uma tabela ou um índice inteiro, ignorando subconsultas materializadas
+    """
+    materializadas = {m.group(1) for m in map(_MATERIALIZADA.match, plano) if m}
+    return [detalhe for detalhe in plano
+            if (m := _VARREDURA.match(detalhe)) and m.group(1) not in materializadas]
+
+
+class _Desfazer(Exception):
+    """Usada para desfazer a unidade de trabalho da verificação"""
+
+
+def _chamadas(categoria_dao: CategoriaDAO, produto_dao: ProdutoDAO) -> list[tuple[str, Callable[[], object]]]:
+    """Chamadas de todos os métodos de consulta e escrita dos DAOs, com dados de exemplo"""
+    categoria = Categoria(id=None, descricao="Verificação de planos")
+    produto = Produto(id=None, descricao="Produto verificação", preco_unitario=1.0,
+                      quantidade_estoque=1, categoria=categoria)
+    produto_lote = Produto(id=None, descricao=produto.descricao, preco_unitario=1.0,
+                           quantidade_estoque=1, categoria=categoria)
+
+    return [
+        ('CategoriaDAO.incluir', lambda: categoria_dao.incluir(categoria)),
+        ('CategoriaDAO.incluir_lote', lambda: categoria_dao.incluir_lote(
+            [Categoria(id=None, descricao=categoria.descricao)])),
+        ('CategoriaDAO.selecionar_todos', categoria_dao.selecionar_todos),
+        ('CategoriaDAO.selecionar_um', lambda: categoria_dao.selecionar_um(categoria.id)),
+        ('CategoriaDAO.existe_categoria', lambda: categoria_dao.existe_categoria(categoria.descricao)),
+        ('CategoriaDAO.existe_categoria', lambda: categoria_dao.existe_categoria(categoria.descricao, categoria.id)),
+        ('CategoriaDAO.selecionar_pagina', lambda: categoria_dao.selecionar_pagina(
+            categoria_dao.selecionar_pagina(tamanho=1).proximo, tamanho=1)),
+        ('CategoriaDAO.iterar_todos', lambda: list(categoria_dao.iterar_todos())),
+        ('CategoriaDAO.alterar', lambda: categoria_dao.alterar(categoria)),
+        ('CategoriaDAO.alterar_unica', lambda: categoria_dao.alterar_unica(categoria)),
+        ('CategoriaDAO.incluir_unica', lambda: categoria_dao.incluir_unica(
+            Categoria(id=None, descricao=categoria.descricao))),
+        ('ProdutoDAO.incluir', lambda: produto_dao.incluir(produto)),
+        ('ProdutoDAO.incluir_lote', lambda: produto_dao.incluir_lote([produto_lote])),
+        ('ProdutoDAO.selecionar_todos', produto_dao.selecionar_todos),
+        ('ProdutoDAO.selecionar_um', lambda: produto_dao.selecionar_um(produto.id)),
+        ('ProdutoDAO.selecionar_por_categoria', lambda: produto_dao.selecionar_por_categoria(categoria.id)),
+        ('ProdutoDAO.iterar_por_categoria', lambda: list(produto_dao.iterar_por_categoria(categoria.id))),
+        ('ProdutoDAO.buscar_por_descricao', lambda: produto_dao.buscar_por_descricao("verificação")),
+        ('ProdutoDAO.selecionar_pagina', lambda: produto_dao.selecionar_pagina(
+            produto_dao.selecionar_pagina(tamanho=1).proximo, tamanho=1)),
+        ('ProdutoDAO.iterar_todos', lambda: list(produto_dao.iterar_todos())),
+        ('ProdutoDAO.iterar_linhas', lambda: list(produto_dao.iterar_linhas())),
+        ('ProdutoDAO.selecionar_estoque_baixo', lambda: produto_dao.selecionar_estoque_baixo(10)),
+        ('ProdutoDAO.calcular_valor_total_estoque', produto_dao.calcular_valor_total_estoque),
+        ('ProdutoDAO.resumo_estoque_por_categoria', lambda: produto_dao.resumo_estoque_por_categoria(10)),
+        ('ProdutoDAO.iterar_colunas_estoque', lambda: list(produto_dao.iterar_colunas_estoque(produto.id - 1))),
+        ('ProdutoDAO.selecionar_colunas_estoque', lambda: produto_dao.selecionar_colunas_estoque([produto.id])),
+        ('ProdutoDAO.faixa_alteracoes', produto_dao.faixa_alteracoes),
+        ('ProdutoDAO.produtos_alterados', lambda: produto_dao.produtos_alterados(0, 10)),
+        ('ProdutoDAO.descartar_alteracoes', lambda: produto_dao.descartar_alteracoes(0)),
+        ('ProdutoDAO.alterar', lambda: produto_dao.alterar(produto)),
+        ('ProdutoDAO.excluir', lambda: produto_dao.excluir(produto)),
+        ('ProdutoDAO.excluir', lambda: produto_dao.excluir(produto_lote)),
+        ('CategoriaDAO.situacao', lambda: categoria_dao.situacao(categoria.id)),
+        ('CategoriaDAO.excluir_sem_produtos', lambda: categoria_dao.excluir_sem_produtos(categoria.id)),
+        ('CategoriaDAO.excluir', lambda: categoria_dao.excluir(categoria)),
+    ]
+
+
+def verificar_planos() -> list[PlanoConsulta]:
+    """
+    Executa os métodos dos DAOs (sem efetivar nada) e retorna o plano de cada
+    comando SQL emitido.
+    """
+    resultados = []
+    try:
+        with unidade_de_trabalho() as uow:
+            conexao = uow.conexao
+            for metodo, chamada in _chamadas(CategoriaDAO(), ProdutoDAO()):
+                comandos = []
+                conexao.set_trace_callback(comandos.append)
+                try:
+                    chamada()
+                finally:
+                    conexao.set_trace_callback(None)
+
+                for sql in comandos:
+                    if not sql.lstrip().upper().startswith(_TIPOS_COMANDO):
+                        continue
+                    plano = [reg[3] for reg in conexao.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+                    if plano == ['SCAN CONSTANT ROW']:
+                        # consultas auxiliares sem tabela (ex.: last_insert_rowid())
+                        continue
+                    resultados.append(PlanoConsulta(metodo, sql, plano, varreduras_do_plano(plano),
+                                                    metodo in VARREDURAS_PERMITIDAS,
+                                                    INDICES_ESPERADOS.get(metodo)))
+            raise _Desfazer()
+    except _Desfazer:
+        pass
+    return resultados
@@ -0,0 +1,130 @@
+"""
+Perfis de desempenho do SQLite
+
+Um perfil é um conjunto de PRAGMAs aplicado pelo pool a cada conexão criada
+(configuração DATABASE_PROFILE do Django). Os perfis prontos são:
+
+- durable:   synchronous=FULL, cada commit chega ao disco antes de retornar
+- balanced:  synchronous=NORMAL (seguro no modo WAL: uma queda de energia pode
+             perder os últimos commits, mas não corrompe o banco), cache e mmap maiores
+- bulk-load: synchronous=OFF e checkpoints espaçados, para cargas grandes que podem
+             ser refeitas do zero em caso de falha
+
+Um perfil também pode ser um dicionário com os PRAGMAs desejados, partindo
+opcionalmente de um perfil pronto:
+
+    DATABASE_PROFILE = {'base': 'balanced', 'cache_size': -131072}
+
+page_size só tem efeito em um banco novo (ou após VACUUM, fora do modo WAL).
+"""
+import sqlite3
+from typing import Any, Optional, Union
+
+
+# ordem de aplicação: page_size precisa vir antes de qualquer escrita (e do journal_mode)
+PRAGMAS_PERFIL = ('page_size', 'cache_size', 'mmap_size', 'synchronous', 'temp_store',
+                  'busy_timeout', 'wal_autocheckpoint')
+
+# nas conexões somente leitura, page_size não pode ser alterado
+PRAGMAS_LEITURA = PRAGMAS_PERFIL[1:]
+
+# PRAGMAs lidos na inspeção das conexões (além dos do perfil)
+PRAGMAS_CONEXAO = ('journal_mode', 'foreign_keys', 'query_only')
+
+# valores nomeados, na ordem do número retornado pelo SQLite
+_NOMEADOS = {
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+
+PERFIS: dict[str, dict[str, Any]] = {
+    'durable': {
+        'page_size': 4096,
+        'cache_size': -8192,          # KiB (valores negativos); 8 MiB
+        'mmap_size': 0,
+        'synchronous': 'FULL',
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 30000,        # ms
+        'wal_autocheckpoint': 1000,   # páginas
+    },
+    'balanced': {
+        'page_size': 4096,
+        'cache_size': -32768,         # 32 MiB
+        'mmap_size': 268435456,       # 256 MiB
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+        'wal_autocheckpoint': 1000,
+    },
+    'bulk-load': {
+        'page_size': 8192,
+        'cache_size': -262144,        # 256 MiB
+        'mmap_size': 1073741824,      # 1 GiB
+        'synchronous': 'OFF',
+        'temp_store': 'MEMORY',
+        'busy_timeout': 60000,
+        'wal_autocheckpoint': 10000,
+    },
+}
+
+
+def _validar(pragma: str, valor: Any) -> Any:
+    """Valida o valor de um PRAGMA (os valores são interpolados no SQL)"""
+    if pragma not in PRAGMAS_PERFIL:
+        raise ValueError(f"PRAGMA não suportado em perfis: {pragma} (use {', '.join(PRAGMAS_PERFIL)})")
+    if pragma in _NOMEADOS:
+        nome = str(valor).upper()
+        if nome not in _NOMEADOS[pragma]:
+            raise ValueError(f"{pragma} inválido: {valor} (use {', '.join(_NOMEADOS[pragma])})")
+        return nome
+    if isinstance(valor, bool) or not isinstance(valor, int):
+        raise ValueError(f"{pragma} deve ser um número inteiro: {valor!r}")
+    if pragma == 'page_size' and (valor < 512 or valor > 65536 or valor & (valor - 1)):
+        raise ValueError(f"page_size deve ser uma potência de 2 entre 512 e 65536: {valor}")
+    return valor
+
+
+def resolver_perfil(perfil: Union[str, dict, None]) -> dict[str, Any]:
+    """
+    Retorna os PRAGMAs (validados) de um perfil, informado pelo nome ou como
+    dicionário (com a chave opcional 'base'). None resulta em nenhum PRAGMA.
+    """
+    if perfil is None:
+        return {}
+    if isinstance(perfil, str):
+        perfil = {'base': perfil}
+    pragmas = dict(perfil)
+    base = pragmas.pop('base', None)
+    valores: dict[str, Any] = {}
+    if base is not None:
+        if base not in PERFIS:
+            raise ValueError(f"Perfil do banco desconhecido: {base} (disponíveis: {', '.join(PERFIS)})")
+        valores.update(PERFIS[base])
+    valores.update(pragmas)
+    return {pragma: _validar(pragma, valores[pragma]) for pragma in PRAGMAS_PERFIL if pragma in valores}
+
+
+def nome_perfil(perfil: Union[str, dict, None]) -> Optional[str]:
+    """Nome do perfil para diagnóstico ('custom' para dicionários sem base)"""
+    if perfil is None or isinstance(perfil, str):
+        return perfil
+    return perfil.get('base') or 'custom'
+
+
+def aplicar_perfil(conexao: sqlite3.Connection, pragmas: dict[str, Any], somente_leitura: bool = False) -> None:
+    """Aplica à conexão os PRAGMAs já resolvidos de um perfil"""
+    for pragma, valor in pragmas.items():
+        if somente_leitura and pragma not in PRAGMAS_LEITURA:
+            continue
+        conexao.execute(f"PRAGMA {pragma} = {valor}")
+
+
+def ler_pragmas(conexao: sqlite3.Connection) -> dict[str, Any]:
+    """Valores em vigor na conexão, com synchronous e temp_store pelo nome"""
+    valores: dict[str, Any] = {}
+    for pragma in PRAGMAS_CONEXAO + PRAGMAS_PERFIL:
+        valor = conexao.execute(f"PRAGMA {pragma}").fetchone()[0]
+        if pragma in _NOMEADOS and isinstance(valor, int) and valor < len(_NOMEADOS[pragma]):
+            valor = _NOMEADOS[pragma][valor]
+        valores[pragma] = valor
+    return valores
@@ -0,0 +1,326 @@
+"""
+Pool de conexões SQLite compartilhado por todos os DAOs
+"""
+import sqlite3
+import threading
+import time
+import logging
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, Union
+
+from .perfis import aplicar_perfil, nome_perfil, resolver_perfil
+
+
+JOURNAL_MODES = ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF')
+
+# raiz do projeto: o banco padrão não depende do diretório de onde o processo foi iniciado
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DATABASE = str(BASE_DIR / 'arq_soft.sqlite3')
+
+
+class PoolEsgotadoError(sqlite3.OperationalError):
+    """Lançada quando nenhuma conexão fica disponível dentro do tempo limite"""
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Conexão criada pelo pool. Guarda o tamanho do cache de comandos preparados
+    (cached_statements) e o espelho desse cache usado nas estatísticas do
+    registro de comandos (app.comandos).
+    """
+
+    def __init__(self, *args, cached_statements: int = 128, **kwargs):
+        super().__init__(*args, cached_statements=cached_statements, **kwargs)
+        self.cached_statements = cached_statements
+        self.comandos_preparados: OrderedDict = OrderedDict()
+
+
+class ConnectionPool:
+    """
+    Pool limitado de conexões SQLite.
+    As conexões são criadas sob demanda (até max_size), configuradas uma única vez
+    (PRAGMAs) e reutilizadas entre as chamadas. Conexões ociosas há mais de
+    idle_timeout segundos são fechadas.
+    Com uri=True, database é uma URI do SQLite (ex.: file:nome?mode=memory&cache=shared).
+    journal_mode é aplicado em cada conexão: WAL (padrão) permite leituras durante
+    uma escrita; DELETE é o journal de rollback tradicional do SQLite.
+    Com read_only=True as conexões são abertas somente para leitura (mode=ro e
+    PRAGMA query_only), e o journal_mode fica a cargo das conexões de escrita.
+    profile é o perfil de desempenho (app.perfis) aplicado a cada conexão: o nome
+    de um perfil pronto ou um dicionário de PRAGMAs.
+    """
+
+    def __init__(self, database: str = DEFAULT_DATABASE, max_size: int = 5,
+                 timeout: float = 30.0, idle_timeout: float = 300.0,
+                 cached_statements: int = 256, uri: bool = False, journal_mode: str = 'WAL',
+                 read_only: bool = False, profile: Union[str, dict, None] = None):
+        if max_size < 1:
+            raise ValueError("O tamanho máximo do pool deve ser maior que zero")
+        journal_mode = journal_mode.upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"journal_mode inválido: {journal_mode} (use {', '.join(JOURNAL_MODES)})")
+        self.database = database
+        self.uri = uri
+        self.journal_mode = journal_mode
+        self.read_only = read_only
+        self.profile = profile
+        # validado aqui para que um perfil inválido falhe na configuração, não na conexão
+        self._pragmas = resolver_perfil(profile)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        # comandos preparados mantidos por conexão (todos os comandos registrados cabem)
+        self.cached_statements = cached_statements
+
+        self._cond = threading.Condition(threading.Lock())
+        # pilha de conexões livres: (conexão, instante em que foi devolvida)
+        self._idle: deque = deque()
+        self._in_use: Dict[int, sqlite3.Connection] = {}
+        self._size = 0
+        self._closed = False
+
+        # estatísticas
+        self._waits = 0
+        self._wait_time = 0.0
+        self._created = 0
+        self._evicted = 0
+        self._checkouts = 0
+
+    def _endereco(self) -> tuple[str, bool]:
+        """Banco a abrir e se ele é uma URI (somente leitura: acrescenta mode=ro)"""
+        if not self.read_only:
+            return self.database, self.uri
+        if self.uri:
+            separador = '&' if '?' in self.database else '?'
+            return f"{self.database}{separador}mode=ro", True
+        return f"{Path(self.database).resolve().as_uri()}?mode=ro", True
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Cria e configura uma nova conexão (executado uma vez por conexão)"""
+        database, uri = self._endereco()
+        conexao = sqlite3.connect(
+            database,
+            check_same_thread=False,  # a conexão pode ser devolvida por outra thread
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            factory=PooledConnection,
+            uri=uri
+        )
+        try:
+            if self.read_only:
+                # recusa qualquer escrita, mesmo que o arquivo permita
+                conexao.execute("PRAGMA query_only = ON")
+                aplicar_perfil(conexao, self._pragmas, somente_leitura=True)
+                return conexao
+            # page_size só vale se aplicado antes do journal_mode (banco novo)
+            aplicar_perfil(conexao, self._pragmas)
+            # Habilita verificação de chaves estrangeiras
+            conexao.execute("PRAGMA foreign_keys = ON")
+            # WAL por padrão (melhor para concorrência); o valor foi validado no __init__
+            conexao.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+            return conexao
+        except sqlite3.Error:
+            conexao.close()
+            raise
+
+    def _evict_idle_locked(self, idle_timeout: Optional[float] = None) -> None:
+        """Fecha as conexões ociosas há mais de idle_timeout (chamar com o lock obtido)"""
+        if idle_timeout is None:
+            idle_timeout = self.idle_timeout
+        if idle_timeout is None:
+            return
+        limite = time.monotonic() - idle_timeout
+        # as mais antigas ficam no início da pilha
+        while self._idle and self._idle[0][1] <= limite:
+            conexao, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            self._close_quietly(conexao)
+
+    @staticmethod
+    def _close_quietly(conexao: sqlite3.Connection) -> None:
+        try:
+            conexao.close()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao fechar conexão do pool: {e}")
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """
+        Retira uma conexão do pool, criando uma nova se houver espaço.
+        Se o pool estiver cheio, aguarda até timeout segundos pela devolução de uma conexão.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("O pool de conexões está fechado")
+            self._evict_idle_locked()
+            inicio = None
+            while True:
+                if self._idle:
+                    # LIFO: reaproveita a conexão usada mais recentemente
+                    conexao, _ = self._idle.pop()
+                    self._in_use[id(conexao)] = conexao
+                    self._checkouts += 1
+                    if inicio is not None:
+                        self._wait_time += time.monotonic() - inicio
+                    return conexao
+                if self._size < self.max_size:
+                    # reserva a vaga e cria a conexão fora do lock
+                    self._size += 1
+                    break
+                if inicio is None:
+                    inicio = time.monotonic()
+                    self._waits += 1
+                restante = timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._wait_time += time.monotonic() - inicio
+                    raise PoolEsgotadoError(
+                        f"Nenhuma conexão disponível no pool após {timeout:.1f}s "
+                        f"(máximo de {self.max_size} conexões)")
+                self._cond.wait(restante)
+            if inicio is not None:
+                self._wait_time += time.monotonic() - inicio
+
+        try:
+            conexao = self._create_connection()
+        except sqlite3.Error:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created += 1
+            self._checkouts += 1
+            self._in_use[id(conexao)] = conexao
+        return conexao
+
+    def release(self, conexao: sqlite3.Connection) -> None:
+        """Devolve uma conexão ao pool, desfazendo qualquer transação pendente"""
+        descartar = False
+        try:
+            if conexao.in_transaction:
+                conexao.rollback()
+        except sqlite3.Error as e:
+            # conexão em estado inválido: não volta para o pool
+            logging.error(f"Erro ao devolver conexão ao pool: {e}")
+            descartar = True
+
+        with self._cond:
+            if self._in_use.pop(id(conexao), None) is None:
+                raise sqlite3.ProgrammingError("Conexão não pertence a este pool")
+            if descartar or self._closed:
+                self._size -= 1
+                self._close_quietly(conexao)
+            else:
+                self._idle.append((conexao, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager que retira uma conexão e a devolve ao final"""
+        conexao = self.acquire()
+        try:
+            yield conexao
+        finally:
+            self.release(conexao)
+
+    def evict_idle(self, idle_timeout: Optional[float] = None) -> None:
+        """
+        Fecha imediatamente as conexões ociosas há mais de idle_timeout segundos
+        (padrão: o idle_timeout do pool; 0 fecha todas as conexões livres).
+        """
+        with self._cond:
+            self._evict_idle_locked(idle_timeout)
+
+    def close_all(self) -> None:
+        """
+        Fecha as conexões livres e impede novas retiradas.
+        Conexões em uso são fechadas quando forem devolvidas.
+        """
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conexao, _ = self._idle.pop()
+                self._size -= 1
+                self._close_quietly(conexao)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna as estatísticas de uso do pool"""
+        with self._cond:
+            return {
+                'size': self._size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'database': self.database,
+                'journal_mode': self.journal_mode,
+                'read_only': self.read_only,
+                'profile': nome_perfil(self.profile),
+                'max_size': self.max_size,
+                'cached_statements': self.cached_statements,
+                'waits': self._waits,
+                'wait_time': self._wait_time,
+                'checkouts': self._checkouts,
+                'created': self._created,
+                'evicted': self._evicted,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+# pool somente leitura usado pelas consultas quando leitura e escrita são separadas
+_reader_pool: Optional[ConnectionPool] = None
+
+
+def get_connection_pool() -> ConnectionPool:
+    """
+    Retorna o pool de conexões compartilhado pelos DAOs, criando-o na primeira chamada.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def configure_connection_pool(**kwargs) -> ConnectionPool:
+    """
+    Substitui o pool compartilhado por um novo, criado com os parâmetros informados.
+    As conexões livres do pool anterior são fechadas; as que estiverem em uso
+    são fechadas quando forem devolvidas.
+    """
+    global _pool
+    with _pool_lock:
+        anterior = _pool
+        _pool = ConnectionPool(**kwargs)
+    if anterior is not None:
+        anterior.close_all()
+    return _pool
+
+
+def get_reader_pool() -> Optional[ConnectionPool]:
+    """
+    Retorna o pool somente leitura, ou None se leitura e escrita usam o mesmo pool
+    (padrão).
+    """
+    return _reader_pool
+
+
+def configure_reader_pool(**kwargs) -> Optional[ConnectionPool]:
+    """
+    Separa leitura e escrita: as consultas passam a usar um pool somente leitura
+    criado com os parâmetros informados (sem parâmetros, volta a usar um único
+    pool). As conexões livres do pool anterior são fechadas.
+    """
+    global _reader_pool
+    with _pool_lock:
+        anterior = _reader_pool
+        _reader_pool = ConnectionPool(read_only=True, **kwargs) if kwargs else None
+    if anterior is not None:
+        anterior.close_all()
+    return _reader_pool
@@ -1,14 +1,28 @@
 """
 Camada de Serviços - Contém a lógica de negócio da aplicação
 Esta camada fica entre as Views e os DAOs, implementando as regras de negócio
+
+Cada escrita é um único comando condicionado (ex.: incluir_unica, alterar_unica,
+excluir_sem_produtos): a verificação e a escrita acontecem no mesmo comando, que
+já é atômico, então os services não abrem uma unidade de trabalho (app.transacao).
+Ela acrescentaria BEGIN/COMMIT e seguraria o lock de escrita durante a consulta
+feita depois de uma escrita recusada (situacao), que só escolhe a mensagem de
+erro; e, com a fila de escrita ativa, faria a escrita sair da fila. A unidade de
+trabalho continua disponível para quem combina várias escritas em uma transação.
 """
 
-from typing import Optional, List
-from .dominio import Categoria, Produto
-from .dao import DAOFactory
+from typing import Optional, List, Iterator
+from .dominio import Categoria, Produto, ProdutoLinha, ResumoEstoqueCategoria
+from .dao import DAOFactory, Pagina
+import sqlite3
 import logging
 
 
+def _categoria_inexistente(erro: sqlite3.IntegrityError) -> bool:
+    """Se o erro foi a chave estrangeira Produto.categoria_id apontando para uma categoria inexistente"""
+    return 'FOREIGN KEY' in str(erro)
+
+
 class CategoriaService:
     """Serviço para gerenciar a lógica de negócio relacionada a categorias"""
     
@@ -19,10 +33,18 @@ class CategoriaService:
         """Lista todas as categorias ordenadas por descrição"""
         return self.dao.selecionar_todos()
     
+    def listar_pagina(self, cursor: Optional[str] = None, tamanho: Optional[int] = None) -> Pagina:
+        """Lista uma página de categorias ordenadas por descrição"""
+        return self.dao.selecionar_pagina(cursor, tamanho)
+    
     def obter_por_id(self, id: int) -> Optional[Categoria]:
         """Obtém uma categoria pelo ID"""
         return self.dao.selecionar_um(id)
     
+    def iterar_todas(self, tamanho_lote: Optional[int] = None) -> Iterator[Categoria]:
+        """Percorre todas as categorias sob demanda (exportações)"""
+        return self.dao.iterar_todos(tamanho_lote)
+    
     def criar_categoria(self, descricao: str) -> bool:
         """
         Cria uma nova categoria, validando regras de negócio
@@ -38,13 +60,10 @@ class CategoriaService:
             
             descricao = descricao.strip()
             
-            # Validação: descrição deve ser única
-            if self.dao.existe_categoria(descricao):
-                raise ValueError("Já existe uma categoria com esta descrição")
-            
-            # Criar categoria
+            # Criar categoria (a inclusão só acontece se a descrição for única)
             categoria = Categoria(id=None, descricao=descricao)
-            self.dao.incluir(categoria)
+            if not self.dao.incluir_unica(categoria):
+                raise ValueError("Já existe uma categoria com esta descrição")
             return True
             
         except Exception as e:
@@ -56,24 +75,22 @@ class CategoriaService:
         Atualiza uma categoria existente, validando regras de negócio
         """
         try:
-            # Validação: categoria deve existir
-            categoria_existente = self.dao.selecionar_um(id)
-            if not categoria_existente:
-                raise ValueError("Categoria não encontrada")
-            
-            # Validação: descrição não pode estar vazia
+            # Validação: descrição não pode estar vazia (uma categoria inexistente é
+            # informada primeiro, como quando a existência era verificada antes)
             if not descricao or not descricao.strip():
+                existe, _ = self.dao.situacao(id)
+                if not existe:
+                    raise ValueError("Categoria não encontrada")
                 raise ValueError("A descrição da categoria não pode estar vazia")
             
-            descricao = descricao.strip()
-            
-            # Validação: descrição deve ser única (exceto para o próprio registro)
-            if self.dao.existe_categoria(descricao, id):
+            # Atualizar categoria (só acontece se ela existir e a descrição for única)
+            categoria = Categoria(id=id, descricao=descricao.strip())
+            if not self.dao.alterar_unica(categoria):
+                # Validação: categoria deve existir / descrição deve ser única
+                existe, _ = self.dao.situacao(id)
+                if not existe:
+                    raise ValueError("Categoria não encontrada")
                 raise ValueError("Já existe uma categoria com esta descrição")
-            
-            # Atualizar categoria
-            categoria = Categoria(id=id, descricao=descricao)
-            self.dao.alterar(categoria)
             return True
             
         except Exception as e:
@@ -89,19 +106,13 @@ class CategoriaService:
         - Não pode ter produtos vinculados
         """
         try:
-            # Validação: categoria deve existir
-            categoria = self.dao.selecionar_um(id)
-            if not categoria:
-                raise ValueError("Categoria não encontrada")
-            
-            # Validação: não pode ter produtos vinculados
-            produto_service = ProdutoService()
-            produtos = produto_service.listar_por_categoria(id)
-            if produtos:
-                raise ValueError(f"Não é possível excluir a categoria. Existe(m) {len(produtos)} produto(s) vinculado(s)")
-            
-            # Excluir categoria
-            self.dao.excluir(categoria)
+            # Excluir categoria (só acontece se ela existir e não tiver produtos)
+            if not self.dao.excluir_sem_produtos(id):
+                # Validação: categoria deve existir / não pode ter produtos vinculados
+                existe, produtos = self.dao.situacao(id)
+                if not existe:
+                    raise ValueError("Categoria não encontrada")
+                raise ValueError(f"Não é possível excluir a categoria. Existe(m) {produtos} produto(s) vinculado(s)")
             return True
             
         except Exception as e:
@@ -111,28 +122,72 @@ class CategoriaService:
 
 class ProdutoService:
     """Serviço para gerenciar a lógica de negócio relacionada a produtos"""
+
+    # quantidade de resultados da busca por descrição (padrão e máximo)
+    LIMITE_BUSCA = 50
+    LIMITE_BUSCA_MAXIMO = 500
     
     def __init__(self):
         self.dao = DAOFactory.get_produto_dao()
-        self.categoria_service = CategoriaService()
     
     def listar_todos(self) -> List[Produto]:
         """Lista todos os produtos ordenados por descrição"""
         return self.dao.selecionar_todos()
     
+    def listar_pagina(self, cursor: Optional[str] = None, tamanho: Optional[int] = None) -> Pagina:
+        """Lista uma página de produtos ordenados por descrição"""
+        return self.dao.selecionar_pagina(cursor, tamanho)
+    
     def obter_por_id(self, id: int) -> Optional[Produto]:
         """Obtém um produto pelo ID"""
         return self.dao.selecionar_um(id)
     
+    def iterar_todos(self) -> Iterator[Produto]:
+        """Percorre todos os produtos sob demanda (exportações e relatórios)"""
+        return self.dao.iterar_todos()
+    
+    def iterar_linhas(self, tamanho_lote: Optional[int] = None) -> Iterator[ProdutoLinha]:
+        """Percorre todos os produtos sob demanda como ProdutoLinha (somente leitura)"""
+        return self.dao.iterar_linhas(tamanho_lote)
+    
     def listar_por_categoria(self, categoria_id: int) -> List[Produto]:
         """Lista produtos de uma categoria específica"""
         return self.dao.selecionar_por_categoria(categoria_id)
     
-    def buscar_por_descricao(self, termo: str) -> List[Produto]:
-        """Busca produtos pela descrição"""
+    def buscar_por_descricao(self, termo: str, limite: Optional[int] = None) -> List[Produto]:
+        """
+        Busca produtos pela descrição (palavras como prefixo, sem diferenciar acentos),
+        dos mais relevantes para os menos, retornando no máximo `limite` produtos
+        """
         if not termo or not termo.strip():
             return []
-        return self.dao.buscar_por_descricao(termo.strip())
+        if limite is None:
+            limite = self.LIMITE_BUSCA
+        elif limite < 1:
+            raise ValueError("O limite da busca deve ser maior que zero")
+        return self.dao.buscar_por_descricao(termo.strip(), min(limite, self.LIMITE_BUSCA_MAXIMO))
+    
+    @staticmethod
+    def validar_dados(descricao: str, preco_unitario: float, quantidade_estoque: int) -> None:
+        """
+        Valida os dados de um produto (regras da inclusão, da alteração e da importação)
+        
+        Regras:
+        - Descrição não pode estar vazia
+        - Preço deve ser positivo
+        - Quantidade de estoque não pode ser negativa
+        """
+        # Validação: descrição não pode estar vazia
+        if not descricao or not descricao.strip():
+            raise ValueError("A descrição do produto não pode estar vazia")
+        
+        # Validação: preço deve ser positivo
+        if preco_unitario <= 0:
+            raise ValueError("O preço unitário deve ser maior que zero")
+        
+        # Validação: quantidade de estoque não pode ser negativa
+        if quantidade_estoque < 0:
+            raise ValueError("A quantidade em estoque não pode ser negativa")
     
     def criar_produto(self, descricao: str, preco_unitario: float, 
                      quantidade_estoque: int, categoria_id: int) -> bool:
@@ -146,22 +201,7 @@ class ProdutoService:
         - Categoria deve existir
         """
         try:
-            # Validação: descrição não pode estar vazia
-            if not descricao or not descricao.strip():
-                raise ValueError("A descrição do produto não pode estar vazia")
-            
-            # Validação: preço deve ser positivo
-            if preco_unitario <= 0:
-                raise ValueError("O preço unitário deve ser maior que zero")
-            
-            # Validação: quantidade de estoque não pode ser negativa
-            if quantidade_estoque < 0:
-                raise ValueError("A quantidade em estoque não pode ser negativa")
-            
-            # Validação: categoria deve existir
-            categoria = self.categoria_service.obter_por_id(categoria_id)
-            if not categoria:
-                raise ValueError("Categoria não encontrada")
+            self.validar_dados(descricao, preco_unitario, quantidade_estoque)
             
             # Criar produto
             produto = Produto(
@@ -169,9 +209,15 @@ class ProdutoService:
                 descricao=descricao.strip(),
                 preco_unitario=preco_unitario,
                 quantidade_estoque=quantidade_estoque,
-                categoria=categoria
+                categoria=Categoria(id=categoria_id, descricao=None)
             )
-            self.dao.incluir(produto)
+            try:
+                self.dao.incluir(produto)
+            except sqlite3.IntegrityError as e:
+                # Validação: categoria deve existir (garantida pela chave estrangeira)
+                if _categoria_inexistente(e):
+                    raise ValueError("Categoria não encontrada") from e
+                raise
             return True
             
         except Exception as e:
@@ -184,27 +230,13 @@ class ProdutoService:
         Atualiza um produto existente, validando regras de negócio
         """
         try:
-            # Validação: produto deve existir
-            produto_existente = self.dao.selecionar_um(id)
-            if not produto_existente:
-                raise ValueError("Produto não encontrado")
-            
-            # Validação: descrição não pode estar vazia
-            if not descricao or not descricao.strip():
-                raise ValueError("A descrição do produto não pode estar vazia")
-            
-            # Validação: preço deve ser positivo
-            if preco_unitario <= 0:
-                raise ValueError("O preço unitário deve ser maior que zero")
-            
-            # Validação: quantidade de estoque não pode ser negativa
-            if quantidade_estoque < 0:
-                raise ValueError("A quantidade em estoque não pode ser negativa")
-            
-            # Validação: categoria deve existir
-            categoria = self.categoria_service.obter_por_id(categoria_id)
-            if not categoria:
-                raise ValueError("Categoria não encontrada")
+            try:
+                self.validar_dados(descricao, preco_unitario, quantidade_estoque)
+            except ValueError:
+                # Validação: produto deve existir (informado antes dos dados inválidos)
+                if self.dao.selecionar_um(id) is None:
+                    raise ValueError("Produto não encontrado") from None
+                raise
             
             # Atualizar produto
             produto = Produto(
@@ -212,15 +244,37 @@ class ProdutoService:
                 descricao=descricao.strip(),
                 preco_unitario=preco_unitario,
                 quantidade_estoque=quantidade_estoque,
-                categoria=categoria
+                categoria=Categoria(id=categoria_id, descricao=None)
             )
-            self.dao.alterar(produto)
+            try:
+                alterado = self.dao.alterar(produto)
+            except sqlite3.IntegrityError as e:
+                # Validação: categoria deve existir (garantida pela chave estrangeira)
+                if _categoria_inexistente(e):
+                    raise ValueError("Categoria não encontrada") from e
+                raise
+            # Validação: produto deve existir
+            if not alterado:
+                raise ValueError("Produto não encontrado")
             return True
             
         except Exception as e:
             logging.error(f"Erro ao atualizar produto: {e}")
             raise
     
+    def criar_produtos_em_lote(self, produtos: List[Produto], tamanho_lote: Optional[int] = None) -> List[int]:
+        """
+        Inclui produtos já validados (validar_dados) em uma única transação e
+        retorna os ids gerados. Se alguma categoria não existir, nenhum é incluído.
+        """
+        try:
+            return self.dao.incluir_lote(produtos, tamanho_lote)
+        except sqlite3.IntegrityError as e:
+            # Validação: categoria deve existir (garantida pela chave estrangeira)
+            if _categoria_inexistente(e):
+                raise ValueError("Categoria não encontrada") from e
+            raise
+    
     def excluir_produto(self, id: int) -> bool:
         """
         Exclui um produto, validando regras de negócio
@@ -229,13 +283,9 @@ class ProdutoService:
         - Produto deve existir
         """
         try:
-            # Validação: produto deve existir
-            produto = self.dao.selecionar_um(id)
-            if not produto:
+            # Excluir produto / Validação: produto deve existir
+            if not self.dao.excluir_por_id(id):
                 raise ValueError("Produto não encontrado")
-            
-            # Excluir produto
-            self.dao.excluir(produto)
             return True
             
         except Exception as e:
@@ -246,12 +296,17 @@ class ProdutoService:
         """
         Retorna produtos com estoque baixo (abaixo do limite especificado)
         """
-        todos_produtos = self.dao.selecionar_todos()
-        return [p for p in todos_produtos if p.quantidade_estoque is not None and p.quantidade_estoque < limite]
+        return self.dao.selecionar_estoque_baixo(limite)
     
     def calcular_valor_total_estoque(self) -> float:
         """
         Calcula o valor total do estoque (soma de preço * quantidade de todos os produtos)
         """
-        produtos = self.dao.selecionar_todos()
-        return sum(p.preco_unitario * (p.quantidade_estoque or 0) for p in produtos)
+        return self.dao.calcular_valor_total_estoque()
+    
+    def resumo_estoque_por_categoria(self, limite: int = 10) -> List[ResumoEstoqueCategoria]:
+        """
+        Retorna os totais de estoque de cada categoria (quantidade de produtos, estoque,
+        valor total e produtos com estoque abaixo do limite)
+        """
+        return self.dao.resumo_estoque_por_categoria(limite)
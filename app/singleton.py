@@ -3,19 +3,50 @@ Implementação do padrão Singleton para gerenciar conexão com banco de dados
 """
 import sqlite3
 import threading
-from typing import Optional, Dict
+import time
+import logging
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+
+from .pool import ConnectionPool, get_connection_pool, configure_connection_pool, get_reader_pool
+from .instrumentacao import MONITOR
+from .perfis import ler_pragmas
+
+
+class _ConexaoDaThread:
+    """Registro da conexão vinculada a uma thread"""
+
+    __slots__ = ('thread', 'pool', 'conexao', 'ultimo_uso', 'em_uso', 'persistente')
+
+    def __init__(self, thread: threading.Thread, pool: ConnectionPool, conexao: sqlite3.Connection):
+        self.thread = thread
+        self.pool = pool
+        self.conexao: Optional[sqlite3.Connection] = conexao
+        self.ultimo_uso = time.monotonic()
+        # quantidade de blocos conexao() ativos usando esta conexão
+        self.em_uso = 0
+        # vinculada por get_connection(): permanece com a thread após o uso
+        self.persistente = False
 
 
 class DatabaseConnection:
     """
     Implementação do padrão Singleton para gerenciar a conexão com o banco de dados.
     Garante que apenas uma instância da classe exista e gerencia conexões por thread.
+
+    As conexões vêm do pool compartilhado (que limita o total de conexões abertas) e
+    ficam vinculadas à thread através de thread-local storage. Conexões de threads
+    que já terminaram, ou ociosas há mais de idle_timeout, são devolvidas ao pool
+    pelo reaper.
+
+    Com leitura e escrita separadas (configure_reader_pool), conexao_leitura()
+    usa o pool somente leitura e o pool compartilhado fica com a única conexão
+    de escrita.
     """
-    
+
     _instance: Optional['DatabaseConnection'] = None
     _lock: threading.Lock = threading.Lock()
-    _connections: Dict[int, sqlite3.Connection] = {}
-    
+
     def __new__(cls) -> 'DatabaseConnection':
         """
         Controla a criação de instâncias garantindo que apenas uma exista.
@@ -24,95 +55,322 @@ class DatabaseConnection:
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
-                    cls._instance = super(DatabaseConnection, cls).__new__(cls)
+                    instance = super(DatabaseConnection, cls).__new__(cls)
+                    instance._inicializar()
+                    cls._instance = instance
         return cls._instance
-    
+
+    def _inicializar(self) -> None:
+        """Inicializa o estado da instância única"""
+        self._local = threading.local()
+        self._registros_lock = threading.Lock()
+        self._registros: Dict[int, _ConexaoDaThread] = {}
+        self.idle_timeout: Optional[float] = 300.0
+        self._reaped = 0
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+
+    def configure(self, max_connections: Optional[int] = None, idle_timeout: Optional[float] = None,
+                  timeout: Optional[float] = None) -> None:
+        """
+        Reconfigura o limite total de conexões e os tempos de espera/ociosidade.
+
+        Args:
+            max_connections: Número máximo de conexões abertas (tamanho do pool)
+            idle_timeout: Segundos de ociosidade até a conexão ser devolvida/fechada
+            timeout: Segundos de espera por uma conexão livre ou por um lock do SQLite
+        """
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        if max_connections is not None or timeout is not None:
+            atual = get_connection_pool()
+            configure_connection_pool(
+                database=atual.database,
+                max_size=max_connections if max_connections is not None else atual.max_size,
+                timeout=timeout if timeout is not None else atual.timeout,
+                idle_timeout=self.idle_timeout,
+                cached_statements=atual.cached_statements,
+                uri=atual.uri,
+                journal_mode=atual.journal_mode,
+                profile=atual.profile
+            )
+
+    def _obter_registro(self, persistente: bool) -> _ConexaoDaThread:
+        """
+        Retorna o registro da thread atual, vinculando uma conexão do pool se a
+        thread ainda não tiver uma (ou se a anterior foi recolhida pelo reaper).
+        """
+        pool = get_connection_pool()
+        substituido = None
+        with self._registros_lock:
+            registro = getattr(self._local, 'registro', None)
+            if registro is not None and registro.conexao is not None:
+                # fora de um bloco em andamento, uma conexão de um pool já substituído
+                # (ex.: outro backend configurado no DAOFactory) é trocada por uma do atual
+                if registro.pool is pool or registro.em_uso > 0:
+                    self._marcar_uso(registro, persistente)
+                    return registro
+                substituido = registro
+
+        if substituido is not None:
+            self._devolver([substituido])
+        # antes de ocupar mais uma vaga no pool, libera as conexões abandonadas
+        self.reap()
+        registro = _ConexaoDaThread(threading.current_thread(), pool, pool.acquire())
+        with self._registros_lock:
+            self._registros[id(registro)] = registro
+            if substituido is not None:
+                registro.persistente = substituido.persistente
+            self._marcar_uso(registro, persistente)
+        self._local.registro = registro
+        return registro
+
+    @staticmethod
+    def _marcar_uso(registro: _ConexaoDaThread, persistente: bool) -> None:
+        """Atualiza o registro para um novo uso (chamar com o lock dos registros)"""
+        registro.ultimo_uso = time.monotonic()
+        if persistente:
+            registro.persistente = True
+        else:
+            registro.em_uso += 1
+
+    def _remover_locked(self, registro: _ConexaoDaThread, forcar: bool = False) -> Optional[sqlite3.Connection]:
+        """Remove o registro e retorna a conexão a devolver (chamar com o lock dos registros)"""
+        if registro.em_uso > 0 and not forcar:
+            return None
+        if self._registros.pop(id(registro), None) is None:
+            return None
+        conexao, registro.conexao = registro.conexao, None
+        return conexao
+
+    def _devolver(self, registros: list) -> None:
+        """Remove os registros informados e devolve suas conexões ao pool"""
+        with self._registros_lock:
+            conexoes = [(r.pool, self._remover_locked(r)) for r in registros]
+        for pool, conexao in conexoes:
+            if conexao is None:
+                continue
+            try:
+                pool.release(conexao)
+            except sqlite3.Error as e:
+                logging.error(f"Erro ao devolver conexão ao pool: {e}")
+
     def get_connection(self) -> sqlite3.Connection:
         """
         Retorna a conexão com o banco de dados para a thread atual.
         Cada thread terá sua própria conexão para evitar problemas de concorrência.
+        A conexão permanece vinculada à thread até close_connection(), até a thread
+        terminar ou até ficar ociosa por mais de idle_timeout.
         """
-        thread_id = threading.current_thread().ident
-        
-        if thread_id not in self._connections or self._connections[thread_id] is None:
-            # Criar nova conexão para esta thread
-            connection = sqlite3.connect(
-                'arq_soft.sqlite3',
-                check_same_thread=False,  # Permite uso em threads diferentes
-                timeout=30.0  # Timeout para evitar locks indefinidos
-            )
-            # Habilita checagem de foreign keys
-            connection.execute("PRAGMA foreign_keys = ON")
-            # Configura para WAL mode (melhor para concorrência)
-            connection.execute("PRAGMA journal_mode = WAL")
-            
-            self._connections[thread_id] = connection
-        
-        return self._connections[thread_id]
-    
+        return self._obter_registro(persistente=True).conexao
+
+    @contextmanager
+    def conexao(self) -> Iterator[sqlite3.Connection]:
+        """
+        Context manager que fornece a conexão da thread atual.
+        Se a thread ainda não tiver uma conexão, uma é retirada do pool e devolvida
+        ao final do bloco mais externo. Blocos aninhados compartilham a mesma conexão.
+        """
+        registro = self._obter_registro(persistente=False)
+        try:
+            yield registro.conexao
+        finally:
+            with self._registros_lock:
+                registro.em_uso -= 1
+                registro.ultimo_uso = time.monotonic()
+                liberar = registro.em_uso == 0 and not registro.persistente
+            if liberar:
+                # o bloco pode ser encerrado por outra thread (ex.: gerador coletado
+                # pelo garbage collector), então só limpa o registro se for desta thread
+                if getattr(self._local, 'registro', None) is registro:
+                    self._local.registro = None
+                self._devolver([registro])
+
+    @contextmanager
+    def conexao_leitura(self) -> Iterator[sqlite3.Connection]:
+        """
+        Context manager que fornece uma conexão para consultas.
+        Com leitura e escrita separadas, a conexão vem do pool somente leitura e é
+        devolvida ao final do bloco; dentro de um bloco conexao() ou de uma
+        transação da thread, usa a mesma conexão dela (para ver as próprias
+        alterações ainda não efetivadas).
+        """
+        leitura = get_reader_pool()
+        registro = getattr(self._local, 'registro', None)
+        if leitura is None or (registro is not None and registro.conexao is not None
+                               and (registro.em_uso > 0 or registro.conexao.in_transaction)):
+            with self.conexao() as conexao:
+                yield conexao
+        else:
+            with leitura.connection() as conexao:
+                yield conexao
+
     def close_connection(self, thread_id: Optional[int] = None) -> None:
         """
         Fecha a conexão com o banco de dados para uma thread específica ou atual.
+        A conexão volta para o pool, que a fecha quando ficar ociosa.
         """
         if thread_id is None:
-            thread_id = threading.current_thread().ident
-            
-        if thread_id in self._connections and self._connections[thread_id] is not None:
-            self._connections[thread_id].close()
-            del self._connections[thread_id]
-    
+            thread_id = threading.get_ident()
+        with self._registros_lock:
+            registros = [r for r in self._registros.values()
+                         if r.thread.ident == thread_id and r.em_uso == 0]
+        self._devolver(registros)
+
     def close_all_connections(self) -> None:
         """
-        Fecha todas as conexões ativas.
+        Fecha todas as conexões que não estão em uso.
+        """
+        with self._registros_lock:
+            registros = [r for r in self._registros.values() if r.em_uso == 0]
+        self._devolver(registros)
+        get_connection_pool().evict_idle(0)
+        leitura = get_reader_pool()
+        if leitura is not None:
+            leitura.evict_idle(0)
+
+    def reap(self) -> int:
+        """
+        Devolve ao pool as conexões de threads que já terminaram e as conexões
+        vinculadas ociosas há mais de idle_timeout.
+
+        Returns:
+            Quantidade de conexões recolhidas
+        """
+        agora = time.monotonic()
+        with self._registros_lock:
+            recolher = [
+                r for r in self._registros.values()
+                if not r.thread.is_alive()
+                or (self.idle_timeout is not None and r.em_uso == 0
+                    and agora - r.ultimo_uso > self.idle_timeout)
+            ]
+            # threads encerradas não voltam a usar a conexão, mesmo que em_uso > 0
+            conexoes = [(r.pool, self._remover_locked(r, forcar=not r.thread.is_alive()))
+                        for r in recolher]
+            self._reaped += len(recolher)
+        for pool, conexao in conexoes:
+            if conexao is None:
+                continue
+            try:
+                pool.release(conexao)
+            except sqlite3.Error as e:
+                logging.error(f"Erro ao devolver conexão ao pool: {e}")
+        get_connection_pool().evict_idle()
+        leitura = get_reader_pool()
+        if leitura is not None:
+            leitura.evict_idle()
+        return len(recolher)
+
+    def start_reaper(self, interval: float = 30.0) -> None:
+        """
+        Inicia uma thread em segundo plano que executa reap() periodicamente.
+        """
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper_stop.clear()
+            self._reaper = threading.Thread(
+                target=self._executar_reaper, args=(interval,),
+                name='DatabaseConnection-reaper', daemon=True
+            )
+            self._reaper.start()
+
+    def stop_reaper(self) -> None:
+        """Interrompe a thread do reaper, se estiver em execução"""
+        self._reaper_stop.set()
+        if self._reaper is not None:
+            self._reaper.join()
+            self._reaper = None
+
+    def _executar_reaper(self, interval: float) -> None:
+        while not self._reaper_stop.wait(interval):
+            try:
+                self.reap()
+            except Exception as e:
+                logging.error(f"Erro no reaper de conexões: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna as conexões vinculadas a threads e as estatísticas do pool"""
+        with self._registros_lock:
+            vinculadas = len(self._registros)
+            em_uso = sum(1 for r in self._registros.values() if r.em_uso > 0)
+            reaped = self._reaped
+        leitura = get_reader_pool()
+        return {
+            'bound': vinculadas,
+            'bound_in_use': em_uso,
+            'reaped': reaped,
+            'pool': get_connection_pool().stats(),
+            'reader_pool': leitura.stats() if leitura is not None else None,
+        }
+
+    def pragmas(self) -> Dict[str, Any]:
+        """
+        Retorna os PRAGMAs em vigor (perfil de desempenho, journal_mode...) na
+        conexão de escrita da thread atual e, se houver, em uma conexão de leitura.
         """
-        for thread_id in list(self._connections.keys()):
-            if self._connections[thread_id] is not None:
-                self._connections[thread_id].close()
-        self._connections.clear()
-    
+        with self.conexao() as conexao:
+            escrita = ler_pragmas(conexao)
+        leitura = get_reader_pool()
+        if leitura is not None:
+            with leitura.connection() as conexao:
+                return {'escrita': escrita, 'leitura': ler_pragmas(conexao)}
+        return {'escrita': escrita, 'leitura': None}
+
     def execute_sql(self, sql: str, parametros: tuple = (), commit: bool = True) -> sqlite3.Cursor:
         """
         Executa um comando SQL no banco de dados usando prepared statements.
-        
+
         Args:
             sql: Comando SQL a ser executado
             parametros: Parâmetros para o prepared statement
             commit: Se deve confirmar a transação (padrão: True)
-            
+
         Returns:
             Cursor com o resultado da execução
         """
-        connection = self.get_connection()
-        cursor = connection.cursor()
-        
-        try:
-            result = cursor.execute(sql, parametros)
-            
-            if commit:
-                connection.commit()
-                
-            return result
-        except Exception as e:
-            # Em caso de erro, fazer rollback
-            if commit:
-                connection.rollback()
-            raise e
-    
+        if not commit:
+            # a transação aberta continua na conexão depois do retorno, então ela fica
+            # vinculada à thread até o commit/rollback e close_connection(); com commit,
+            # a conexão é usada só neste bloco (com leitura e escrita separadas ela é a
+            # única de escrita, e outras threads esperariam por ela)
+            self.get_connection()
+        with self.conexao() as connection:
+            cursor = connection.cursor()
+
+            try:
+                with MONITOR.medir(sql, parametros) as medicao:
+                    result = cursor.execute(sql, parametros)
+
+                    if commit:
+                        connection.commit()
+                    medicao.linhas = result.rowcount
+
+                return result
+            except Exception as e:
+                # Em caso de erro, fazer rollback
+                if commit:
+                    connection.rollback()
+                raise e
+
     def execute_select(self, sql: str, parametros: tuple = ()) -> list:
         """
         Executa um comando SELECT usando prepared statements e retorna todos os resultados.
-        
+
         Args:
             sql: Comando SELECT a ser executado
             parametros: Parâmetros para o prepared statement
-            
+
         Returns:
             Lista com todos os registros encontrados
         """
-        connection = self.get_connection()
-        cursor = connection.cursor()
-        result = cursor.execute(sql, parametros).fetchall()
-        return result
+        with self.conexao_leitura() as connection:
+            cursor = connection.cursor()
+            with MONITOR.medir(sql, parametros) as medicao:
+                result = cursor.execute(sql, parametros).fetchall()
+                medicao.linhas = len(result)
+            return result
 
 
 # Função de conveniência para obter a instância singleton
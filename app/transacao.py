@@ -0,0 +1,138 @@
+"""
+Unidade de trabalho (Unit of Work) - agrupa várias operações dos DAOs em uma única transação
+"""
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager, ExitStack
+from typing import Optional, Iterator, Callable
+
+from .singleton import get_database_connection
+from .identidade import MapaDeIdentidade
+
+
+_estado = threading.local()
+
+
+class UnidadeDeTrabalho:
+    """
+    Transação compartilhada pelos DAOs na thread atual.
+    Enquanto a unidade estiver ativa, todos os DAOs usam a mesma conexão e nenhum
+    comando é efetivado individualmente: o commit acontece uma única vez, ao final
+    da unidade mais externa. Unidades aninhadas usam SAVEPOINTs.
+    """
+
+    def __init__(self, conexao: sqlite3.Connection, nivel: int, pai: Optional['UnidadeDeTrabalho'] = None):
+        self.conexao = conexao
+        self.nivel = nivel
+        self.pai = pai
+        self._callbacks: list[Callable[[], None]] = []
+        # recursos alterados durante a unidade (ex.: caches de leitura invalidados)
+        self.alterados: set = set()
+        # mapa de identidade compartilhado pelas consultas da unidade (opcional)
+        self.mapa_identidade: Optional[MapaDeIdentidade] = None
+
+    @property
+    def raiz(self) -> 'UnidadeDeTrabalho':
+        """Unidade mais externa (a que detém a transação)"""
+        unidade = self
+        while unidade.pai is not None:
+            unidade = unidade.pai
+        return unidade
+
+    def ao_finalizar(self, callback: Callable[[], None]) -> None:
+        """
+        Registra uma função a ser executada quando a unidade mais externa terminar
+        (após o commit ou o rollback).
+        """
+        self.raiz._callbacks.append(callback)
+
+    def _executar_callbacks(self) -> None:
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Erro ao finalizar unidade de trabalho: {e}")
+
+    @property
+    def savepoint(self) -> str:
+        return f"uow_{self.nivel}"
+
+    def _iniciar(self, imediata: bool) -> None:
+        if self.nivel == 0:
+            # IMMEDIATE obtém o lock de escrita já no início, evitando SQLITE_BUSY
+            # quando a transação passa de leitura para escrita
+            self.conexao.execute("BEGIN IMMEDIATE" if imediata else "BEGIN")
+        else:
+            self.conexao.execute(f"SAVEPOINT {self.savepoint}")
+
+    def _confirmar(self) -> None:
+        if self.nivel == 0:
+            self.conexao.commit()
+        else:
+            self.conexao.execute(f"RELEASE SAVEPOINT {self.savepoint}")
+
+    def _desfazer(self) -> None:
+        try:
+            if self.nivel == 0:
+                self.conexao.rollback()
+            else:
+                self.conexao.execute(f"ROLLBACK TO SAVEPOINT {self.savepoint}")
+                self.conexao.execute(f"RELEASE SAVEPOINT {self.savepoint}")
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao desfazer unidade de trabalho: {e}")
+
+
+def unidade_atual() -> Optional[UnidadeDeTrabalho]:
+    """Retorna a unidade de trabalho ativa na thread atual, se houver"""
+    return getattr(_estado, 'unidade', None)
+
+
+@contextmanager
+def unidade_de_trabalho(imediata: bool = True, mapa_identidade: bool = False) -> Iterator[UnidadeDeTrabalho]:
+    """
+    Abre uma unidade de trabalho na thread atual.
+
+    Uso:
+        with unidade_de_trabalho() as uow:
+            categoria_dao.incluir(...)
+            produto_dao.incluir(...)
+
+    Se o bloco terminar sem erros, as alterações são efetivadas com um único commit
+    (ou o SAVEPOINT é liberado, se a unidade estiver aninhada); caso contrário são
+    desfeitas e a exceção é propagada.
+
+    Args:
+        imediata: Se a transação mais externa deve obter o lock de escrita no início
+        mapa_identidade: Se as consultas da unidade devem compartilhar um mapa de
+            identidade (a mesma categoria vira o mesmo objeto em todas as consultas)
+    """
+    pai = unidade_atual()
+    with ExitStack() as pilha:
+        if pai is None:
+            # mantém a conexão da thread vinculada durante toda a unidade
+            conexao = pilha.enter_context(get_database_connection().conexao())
+            unidade = UnidadeDeTrabalho(conexao, 0)
+            if mapa_identidade:
+                unidade.mapa_identidade = MapaDeIdentidade()
+        else:
+            unidade = UnidadeDeTrabalho(pai.conexao, pai.nivel + 1, pai)
+
+        unidade._iniciar(imediata)
+        _estado.unidade = unidade
+        try:
+            yield unidade
+        except BaseException:
+            unidade._desfazer()
+            raise
+        else:
+            try:
+                unidade._confirmar()
+            except sqlite3.Error:
+                unidade._desfazer()
+                raise
+        finally:
+            _estado.unidade = pai
+            if pai is None:
+                unidade._executar_callbacks()
@@ -1,4 +1,6 @@
-from django.http import HttpResponseRedirect
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseRedirect, HttpResponseBadRequest, JsonResponse, Http404, StreamingHttpResponse
 from django.shortcuts import render
 from django.urls import reverse
 from django.contrib import messages
@@ -9,6 +11,13 @@ from utils import helper
 from .dominio import *
 from .dao import DAOFactory
 from .services import CategoriaService, ProdutoService
+from .assincrono import executar, iterar
+from . import exportacao
+from .importacao import ImportadorProdutos, abrir_csv
+from .instrumentacao import MONITOR
+from .comandos import COMANDOS
+from .singleton import get_database_connection
+from .fila_escrita import get_fila_escrita
 
 
 def home(request):
@@ -17,15 +26,38 @@ def home(request):
     return render(request, template)
 
 
-def categorias(request, acao=None, id=None):
-    """Gerencia as operações CRUD para categorias usando Services"""
+def _parametros_pagina(request):
+    """Obtém o cursor e o tamanho de página informados na URL da listagem"""
+    cursor = request.GET.get('cursor') or None
+    try:
+        tamanho = int(request.GET['tamanho']) if request.GET.get('tamanho') else None
+    except ValueError:
+        tamanho = None
+    return cursor, tamanho
+
+
+async def categorias(request, acao=None, id=None):
+    """
+    Gerencia as operações CRUD para categorias usando Services.
+    View assíncrona: as chamadas aos services rodam no executor dos DAOs.
+    """
     try:
         service = CategoriaService()
 
         # listar registros 
         if acao is None:
-            registros = service.listar_todas()
-            return render(request, 'categorias_listar.html', context={'registros': registros})
+            cursor, tamanho = _parametros_pagina(request)
+            try:
+                pagina = await executar(service.listar_pagina, cursor, tamanho)
+            except ValueError as e:
+                # cursor inválido: volta para a primeira página
+                messages.error(request, str(e))
+                pagina = await executar(service.listar_pagina, None, tamanho)
+            return render(request, 'categorias_listar.html', context={
+                'registros': pagina.registros,
+                'pagina': pagina,
+                'tamanho': tamanho
+            })
         
         # salvar registro
         elif acao == 'salvar':
@@ -34,7 +66,7 @@ def categorias(request, acao=None, id=None):
 
             if acao_form == 'Inclusão':
                 try:
-                    service.criar_categoria(form_data['descricao'])
+                    await executar(service.criar_categoria, form_data['descricao'])
                     messages.success(request, 'Categoria incluída com sucesso!')
                 except ValueError as e:
                     messages.error(request, str(e))
@@ -45,18 +77,18 @@ def categorias(request, acao=None, id=None):
 
             elif acao_form == 'Exclusão':
                 try:
-                    service.excluir_categoria(int(form_data['id']))
+                    await executar(service.excluir_categoria, int(form_data['id']))
                     messages.success(request, 'Categoria excluída com sucesso!')
                 except ValueError as e:
                     messages.error(request, str(e))
 
             else:  # Alteração
                 try:
-                    service.atualizar_categoria(int(form_data['id']), form_data['descricao'])
+                    await executar(service.atualizar_categoria, int(form_data['id']), form_data['descricao'])
                     messages.success(request, 'Categoria alterada com sucesso!')
                 except ValueError as e:
                     messages.error(request, str(e))
-                    obj = service.obter_por_id(int(form_data['id']))
+                    obj = await executar(service.obter_por_id, int(form_data['id']))
                     return render(request, 'categorias_editar.html', {
                         'acao': 'Alteração',
                         'obj': obj
@@ -71,7 +103,7 @@ def categorias(request, acao=None, id=None):
         # alterar ou excluir
         elif acao in ['alterar', 'excluir']:
             acao_display = 'Alteração' if acao == 'alterar' else 'Exclusão'
-            obj = service.obter_por_id(int(id))
+            obj = await executar(service.obter_por_id, int(id))
             if not obj:
                 messages.error(request, 'Categoria não encontrada.')
                 return HttpResponseRedirect(reverse("categorias"))
@@ -84,37 +116,31 @@ def categorias(request, acao=None, id=None):
         logging.error(f"Erro em categorias: {err}")
         messages.error(request, f'Erro: {err}')
         return render(request, 'home.html', context={'ERRO': err})
-        
-        # inserir registro
-        elif acao == 'incluir':
-            return render(request, 'categorias_editar.html', {'acao': 'Inclusão'})
-        
-        # alterar ou excluir
-        elif acao in ['alterar', 'excluir']:
-            acao = 'Alteração' if acao == 'alterar' else 'Exclusão'
-            # seleciona o registro pelo id informado
-            obj = dao.selecionar_um(id)
-            return render(request, 'categorias_editar.html', {'acao': acao, 'obj': obj})
-        
-        # acao INVALIDA
-        else:
-            raise Exception('Ação inválida')
-
-    # se ocorreu algunm erro, insere a mensagem para ser exibida no contexto da página 
-    except Exception as err:
-        return render(request, 'home.html', context={'ERRO': err})
 
 
-def produtos(request, acao=None, id=None):
-    """Gerencia as operações CRUD para produtos usando Services"""
+async def produtos(request, acao=None, id=None):
+    """
+    Gerencia as operações CRUD para produtos usando Services.
+    View assíncrona: as chamadas aos services rodam no executor dos DAOs.
+    """
     try:
         produto_service = ProdutoService()
         categoria_service = CategoriaService()
 
         # listar registros 
         if acao is None:
-            registros = produto_service.listar_todos()
-            return render(request, 'produtos_listar.html', context={'registros': registros})
+            cursor, tamanho = _parametros_pagina(request)
+            try:
+                pagina = await executar(produto_service.listar_pagina, cursor, tamanho)
+            except ValueError as e:
+                # cursor inválido: volta para a primeira página
+                messages.error(request, str(e))
+                pagina = await executar(produto_service.listar_pagina, None, tamanho)
+            return render(request, 'produtos_listar.html', context={
+                'registros': pagina.registros,
+                'pagina': pagina,
+                'tamanho': tamanho
+            })
         
         # salvar registro
         elif acao == 'salvar':
@@ -123,7 +149,8 @@ def produtos(request, acao=None, id=None):
 
             if acao_form == 'Inclusão':
                 try:
-                    produto_service.criar_produto(
+                    await executar(
+                        produto_service.criar_produto,
                         descricao=form_data['descricao'],
                         preco_unitario=float(form_data['preco_unitario']),
                         quantidade_estoque=int(form_data['quantidade_estoque']) if form_data['quantidade_estoque'] else 0,
@@ -132,7 +159,7 @@ def produtos(request, acao=None, id=None):
                     messages.success(request, 'Produto incluído com sucesso!')
                 except (ValueError, TypeError) as e:
                     messages.error(request, str(e))
-                    categorias = categoria_service.listar_todas()
+                    categorias = await executar(categoria_service.listar_todas)
                     return render(request, 'produtos_editar.html', {
                         'acao': 'Inclusão',
                         'categorias': categorias,
@@ -146,14 +173,15 @@ def produtos(request, acao=None, id=None):
 
             elif acao_form == 'Exclusão':
                 try:
-                    produto_service.excluir_produto(int(form_data['id']))
+                    await executar(produto_service.excluir_produto, int(form_data['id']))
                     messages.success(request, 'Produto excluído com sucesso!')
                 except ValueError as e:
                     messages.error(request, str(e))
             
             else:  # Alteração
                 try:
-                    produto_service.atualizar_produto(
+                    await executar(
+                        produto_service.atualizar_produto,
                         id=int(form_data['id']),
                         descricao=form_data['descricao'],
                         preco_unitario=float(form_data['preco_unitario']),
@@ -163,8 +191,8 @@ def produtos(request, acao=None, id=None):
                     messages.success(request, 'Produto alterado com sucesso!')
                 except (ValueError, TypeError) as e:
                     messages.error(request, str(e))
-                    obj = produto_service.obter_por_id(int(form_data['id']))
-                    categorias = categoria_service.listar_todas()
+                    obj = await executar(produto_service.obter_por_id, int(form_data['id']))
+                    categorias = await executar(categoria_service.listar_todas)
                     return render(request, 'produtos_editar.html', {
                         'acao': 'Alteração',
                         'obj': obj,
@@ -175,7 +203,7 @@ def produtos(request, acao=None, id=None):
         
         # inserir registro
         elif acao == 'incluir':
-            categorias = categoria_service.listar_todas()
+            categorias = await executar(categoria_service.listar_todas)
             return render(request, 'produtos_editar.html', {
                 'acao': 'Inclusão', 
                 'categorias': categorias
@@ -183,12 +211,12 @@ def produtos(request, acao=None, id=None):
         
         # alterar ou excluir
         elif acao in ['alterar', 'excluir']:
-            produto = produto_service.obter_por_id(int(id))
+            produto = await executar(produto_service.obter_por_id, int(id))
             if not produto:
                 messages.error(request, 'Produto não encontrado.')
                 return HttpResponseRedirect(reverse("produtos"))
             
-            categorias = categoria_service.listar_todas()
+            categorias = await executar(categoria_service.listar_todas)
             acao_display = 'Alteração' if acao == 'alterar' else 'Exclusão'
 
             return render(request, 'produtos_editar.html', {
@@ -206,6 +234,87 @@ def produtos(request, acao=None, id=None):
         return render(request, 'home.html', context={'ERRO': err})
 
 
+def _resposta_exportacao(request, recurso: str, exportar):
+    """
+    Resposta com o arquivo gerado sob demanda por exportar(formato, compactar).
+    No ASGI o conteúdo precisa ser um iterador assíncrono (um iterador comum
+    seria lido por inteiro antes do envio).
+    """
+    try:
+        formato, compactar = exportacao.parametros_exportacao(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    if isinstance(request, ASGIRequest):
+        conteudo = iterar(exportar, formato, compactar)
+    else:
+        conteudo = exportar(formato, compactar)
+    resposta = StreamingHttpResponse(conteudo, content_type=exportacao.tipo_conteudo(formato, compactar))
+    resposta['Content-Disposition'] = (
+        f'attachment; filename="{exportacao.nome_arquivo(recurso, formato, compactar)}"')
+    return resposta
+
+
+def exportar_produtos(request):
+    """Exporta todos os produtos em CSV ou JSON Lines (?formato=jsonl), opcionalmente em gzip (?gzip=1)"""
+    return _resposta_exportacao(request, 'produtos', exportacao.exportar_produtos)
+
+
+def exportar_categorias(request):
+    """Exporta todas as categorias em CSV ou JSON Lines (?formato=jsonl), opcionalmente em gzip (?gzip=1)"""
+    return _resposta_exportacao(request, 'categorias', exportacao.exportar_categorias)
+
+
+def _importar_arquivo(arquivo, somente_validar: bool):
+    return ImportadorProdutos(gravar=not somente_validar).importar(abrir_csv(arquivo.file))
+
+
+async def importar_produtos(request):
+    """
+    Importa produtos de um arquivo CSV (ou .csv.gz) enviado pelo formulário, em lotes,
+    com relatório de erros por linha. Com ?formato=json o resultado vem em JSON.
+    """
+    contexto = {}
+    if request.method == 'POST':
+        arquivo = request.FILES.get('arquivo')
+        if arquivo is None:
+            messages.error(request, 'Selecione o arquivo CSV a importar')
+        else:
+            try:
+                resultado = await executar(_importar_arquivo, arquivo, bool(request.POST.get('somente_validar')))
+            except (ValueError, UnicodeDecodeError) as e:
+                if request.GET.get('formato') == 'json':
+                    return JsonResponse({'erro': str(e)}, status=400)
+                messages.error(request, str(e))
+            else:
+                if request.GET.get('formato') == 'json':
+                    return JsonResponse(resultado.como_dict(), json_dumps_params={'ensure_ascii': False})
+                contexto['resultado'] = resultado
+    return render(request, 'produtos_importar.html', contexto)
+
+
+def diagnostico_consultas(request):
+    """
+    Exibe (em JSON) as estatísticas das consultas ao banco: latências por comando,
+    consultas lentas recentes, cache de comandos preparados, conexões, PRAGMAs em vigor
+    (perfil do banco), backend dos DAOs e fila de escrita.
+    Disponível somente com DEBUG ativo.
+    """
+    if not settings.DEBUG:
+        raise Http404()
+    if request.GET.get('zerar'):
+        MONITOR.zerar()
+    return JsonResponse({
+        'consultas': MONITOR.stats(request.GET.get('comando')),
+        'lentas': MONITOR.lentas(),
+        'limite_lento_ms': MONITOR.limite_lento_ms,
+        'comandos': COMANDOS.stats(),
+        'conexoes': get_database_connection().stats(),
+        'pragmas': get_database_connection().pragmas(),
+        'backend': DAOFactory.get_backend().descricao(),
+        'fila_escrita': get_fila_escrita().stats() if DAOFactory.usar_fila_escrita else None,
+    }, json_dumps_params={'ensure_ascii': False, 'indent': 2})
+
+
 def obter_categorias():
     """Função auxiliar para obter todas as categorias (compatibilidade)"""
     service = CategoriaService()
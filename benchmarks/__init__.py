@@ -0,0 +1,3 @@
+"""
+Benchmarks da aplicação (execute a partir da raiz do projeto com python -m benchmarks.<modulo>)
+"""
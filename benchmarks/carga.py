@@ -0,0 +1,259 @@
+"""
+Teste de carga concorrente sobre o DatabaseConnection e os DAOs
+
+Leitores e escritores (threads ou processos) executam operações dos DAOs ao mesmo
+tempo sobre um catálogo gerado (benchmarks.comum) durante um tempo fixo. Para cada
+combinação de journal (WAL / DELETE), timeout e quantidade de leitores/escritores
+são reportados latências (p50/p95/p99), vazão e os erros de concorrência:
+
+- busy:         SQLITE_BUSY ("database is locked") após esgotar o busy timeout
+- locked:       SQLITE_LOCKED (conflito dentro da mesma conexão/cache compartilhado)
+- pool_timeout: nenhuma conexão livre no pool dentro do timeout (PoolEsgotadoError)
+
+Leitores alternam selecionar_um, selecionar_pagina e buscar_por_descricao;
+escritores repetem o ciclo incluir -> alterar -> excluir_por_id nos próprios
+produtos, então o catálogo não muda entre as execuções. Com --fila-escrita as
+escritas passam pela fila com commit em grupo (app.fila_escrita) e as estatísticas
+dos lotes são incluídas no resultado. Com --conexoes-leitura N as consultas usam N
+conexões somente leitura e as escritas uma única conexão; --perfil aplica um perfil
+de desempenho (app.perfis) às conexões.
+
+Uso:
+    python -m benchmarks.carga --leitores 8 --escritores 2 --duracao 10
+    python -m benchmarks.carga --modos WAL DELETE --timeout 0.05 1 30 --escritores 1 4 8
+    python -m benchmarks.carga --processos --leitores 4 --escritores 4 --saida carga.json
+    python -m benchmarks.carga --modos WAL --escritores 8 --fila-escrita
+    python -m benchmarks.carga --modos WAL --leitores 8 --conexoes-leitura 8
+    python -m benchmarks.carga --modos WAL --perfil durable balanced bulk-load
+"""
+import argparse
+import itertools
+import logging
+import multiprocessing
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from app.dao import DAOFactory
+from app.dominio import Produto
+from app.fila_escrita import get_fila_escrita
+from app.perfis import PERFIS
+from app.pool import PoolEsgotadoError
+from app.singleton import get_database_connection
+from benchmarks import comum
+
+
+TIPOS_ERRO = ('busy', 'locked', 'pool_timeout', 'other')
+
+
+def classificar_erro(erro: sqlite3.Error) -> str:
+    """Classifica um erro do sqlite3 em um dos TIPOS_ERRO"""
+    if isinstance(erro, PoolEsgotadoError):
+        return 'pool_timeout'
+    nome = getattr(erro, 'sqlite_errorname', None) or ''
+    if nome.startswith('SQLITE_BUSY'):
+        return 'busy'
+    if nome.startswith('SQLITE_LOCKED'):
+        return 'locked'
+    if 'is locked' in str(erro):
+        # versões do Python sem sqlite_errorname
+        return 'locked' if 'table' in str(erro) else 'busy'
+    return 'other'
+
+
+def _iniciar_processo(config: dict) -> None:
+    """Inicialização de cada processo trabalhador (o backend não é herdado no spawn)"""
+    logging.disable(logging.CRITICAL)
+    DAOFactory.configurar(config)
+
+
+def trabalhar(papel: str, indice: int, linhas: int, semente: int, inicio_em: float,
+              duracao: float, pausa_ms: float) -> dict[str, Any]:
+    """
+    Executa operações de leitura ou escrita de inicio_em (time.time()) até
+    inicio_em + duracao e retorna as latências (ms) e os erros por tipo.
+    """
+    rng = random.Random(semente * 1000 + indice)
+    produto_dao = DAOFactory.get_produto_dao()
+    categoria = DAOFactory.get_categoria_dao().selecionar_todos()[0]
+    latencias: list[float] = []
+    erros: Counter = Counter()
+    proprios: list[Produto] = []
+
+    def ler(passo: int) -> None:
+        if passo % 3 == 0:
+            produto_dao.selecionar_um(rng.randint(1, linhas))
+        elif passo % 3 == 1:
+            produto_dao.selecionar_pagina()
+        else:
+            produto_dao.buscar_por_descricao("note", 20)
+
+    def escrever(passo: int) -> None:
+        if passo % 3 == 0 or not proprios:
+            produto = Produto(id=None, descricao=f"Carga {papel} {indice} {passo}", preco_unitario=1.0,
+                              quantidade_estoque=rng.randint(0, 100), categoria=categoria)
+            produto_dao.incluir(produto)
+            proprios.append(produto)
+        elif passo % 3 == 1:
+            produto = proprios[-1]
+            produto.quantidade_estoque += 1
+            produto_dao.alterar(produto)
+        else:
+            produto_dao.excluir_por_id(proprios.pop().id)
+
+    operacao = ler if papel == 'leitor' else escrever
+    time.sleep(max(0.0, inicio_em - time.time()))
+    fim = inicio_em + duracao
+    passo = 0
+    while time.time() < fim:
+        inicio = time.perf_counter()
+        try:
+            operacao(passo)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        except sqlite3.Error as e:
+            erros[classificar_erro(e)] += 1
+        passo += 1
+        if pausa_ms:
+            time.sleep(pausa_ms / 1000)
+
+    # remove os produtos que ficaram (sem medir); uma falha aqui não afeta o resultado
+    for produto in proprios:
+        try:
+            produto_dao.excluir_por_id(produto.id)
+        except sqlite3.Error:
+            pass
+    get_database_connection().close_connection()
+    return {'papel': papel, 'latencias': latencias, 'erros': dict(erros)}
+
+
+def resumir_papel(papel: str, resultados: list[dict], duracao: float) -> dict[str, Any]:
+    latencias = sorted(itertools.chain.from_iterable(r['latencias'] for r in resultados))
+    erros = Counter()
+    for r in resultados:
+        erros.update(r['erros'])
+    return {
+        'role': papel,
+        'workers': len(resultados),
+        'operations': len(latencias),
+        'throughput_ops_s': round(len(latencias) / duracao, 1),
+        'p50_ms': round(comum.percentil(latencias, 50), 3),
+        'p95_ms': round(comum.percentil(latencias, 95), 3),
+        'p99_ms': round(comum.percentil(latencias, 99), 3),
+        'max_ms': round(latencias[-1], 3) if latencias else 0.0,
+        'errors': {tipo: erros.get(tipo, 0) for tipo in TIPOS_ERRO},
+    }
+
+
+def executar_cenario(args: argparse.Namespace, modo: str, timeout: float, leitores: int,
+                     escritores: int, perfil: Optional[str] = None) -> dict[str, Any]:
+    opcoes = {'journal_mode': modo, 'timeout': timeout, 'max_connections': args.max_conexoes,
+              'read_connections': args.conexoes_leitura}
+    diretorio = Path(args.diretorio or comum.DIRETORIO_BANCOS) / modo.lower()
+    catalogo = comum.preparar_catalogo(args.linhas, args.semente, 'sqlite', diretorio, opcoes=opcoes)
+    config = {'ENGINE': 'sqlite', 'NAME': catalogo['database'], 'OPTIONS': opcoes, 'PROFILE': perfil}
+    if args.fila_escrita:
+        config['FILA_ESCRITA'] = {'max_operacoes': args.max_lote, 'max_espera_ms': args.espera_lote_ms}
+    if (args.fila_escrita or perfil) and not args.processos:
+        DAOFactory.configurar(config)
+
+    trabalhadores = [('leitor', i) for i in range(leitores)] + [('escritor', i) for i in range(escritores)]
+    executor: Executor
+    if args.processos:
+        executor = ProcessPoolExecutor(len(trabalhadores), mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_iniciar_processo, initargs=(config,))
+    else:
+        executor = ThreadPoolExecutor(len(trabalhadores), thread_name_prefix='carga')
+    # folga para criar as threads/processos antes de todos começarem juntos
+    inicio_em = time.time() + (3.0 if args.processos else 0.5)
+    with executor:
+        futuros = [executor.submit(trabalhar, papel, indice, args.linhas, args.semente, inicio_em,
+                                   args.duracao, args.pausa_ms)
+                   for papel, indice in trabalhadores]
+        resultados = [f.result() for f in futuros]
+
+    # com processos, cada um tem a própria fila (as estatísticas ficam nele)
+    fila = get_fila_escrita().stats() if args.fila_escrita and not args.processos else None
+    return {
+        'journal_mode': modo,
+        'timeout': timeout,
+        'max_connections': args.max_conexoes,
+        'read_connections': args.conexoes_leitura,
+        'profile': perfil,
+        'readers': leitores,
+        'writers': escritores,
+        'workers': 'processes' if args.processos else 'threads',
+        'duration_s': args.duracao,
+        'write_queue': fila if args.fila_escrita else None,
+        'roles': [resumir_papel(papel, [r for r in resultados if r['papel'] == papel], args.duracao)
+                  for papel in ('leitor', 'escritor') if any(r['papel'] == papel for r in resultados)],
+    }
+
+
+def imprimir(cenario: dict, saida) -> None:
+    for papel in cenario['roles']:
+        erros = papel['errors']
+        print(f"{cenario['journal_mode']:<8}{cenario['profile'] or '-':>10}{cenario['timeout']:>8g}{cenario['readers']:>5}{cenario['writers']:>5}"
+              f"  {papel['role']:<9}{papel['operations']:>9}{papel['throughput_ops_s']:>10.1f}"
+              f"{papel['p50_ms']:>10.3f}{papel['p95_ms']:>10.3f}{papel['p99_ms']:>10.3f}"
+              f"{erros['busy']:>7}{erros['locked']:>7}{erros['pool_timeout']:>7}{erros['other']:>7}",
+              file=saida, flush=True)
+    if cenario['write_queue']:
+        fila = cenario['write_queue']
+        print(f"{'':36}fila: {fila['operations']} operações em {fila['batches']} lotes "
+              f"(média {fila['mean_batch']:.1f}, maior {fila['max_batch']}, "
+              f"{fila['mean_batch_ms']:.2f} ms/lote)", file=saida, flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga concorrente dos DAOs")
+    parser.add_argument('--leitores', type=int, nargs='+', default=[4])
+    parser.add_argument('--escritores', type=int, nargs='+', default=[2])
+    parser.add_argument('--modos', nargs='+', default=['WAL', 'DELETE'], type=str.upper,
+                        choices=['WAL', 'DELETE', 'TRUNCATE', 'PERSIST'],
+                        help="Journal modes comparados")
+    parser.add_argument('--timeout', type=float, nargs='+', default=[30.0],
+                        help="Timeout(s) em segundos: busy timeout do SQLite e espera por conexão do pool")
+    parser.add_argument('--max-conexoes', type=int, default=5, help="Tamanho do pool (por processo)")
+    parser.add_argument('--conexoes-leitura', type=int, default=0,
+                        help="Conexões somente leitura (0: leitura e escrita no mesmo pool)")
+    parser.add_argument('--processos', action='store_true', help="Trabalhadores em processos em vez de threads")
+    parser.add_argument('--duracao', type=float, default=5.0, help="Segundos de carga por cenário")
+    parser.add_argument('--pausa-ms', type=float, default=0.0, help="Pausa entre as operações de cada trabalhador")
+    parser.add_argument('--perfil', nargs='+', default=[None], choices=list(PERFIS),
+                        help="Perfil(s) de desempenho das conexões comparados (DATABASE_PROFILE)")
+    parser.add_argument('--fila-escrita', action='store_true',
+                        help="Escritas pela fila com commit em grupo (app.fila_escrita)")
+    parser.add_argument('--max-lote', type=int, default=100, help="Operações por lote da fila de escrita")
+    parser.add_argument('--espera-lote-ms', type=float, default=1.0,
+                        help="Espera máxima por mais operações em cada lote da fila de escrita")
+    parser.add_argument('--linhas', type=int, default=10000, help="Produtos no catálogo")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--diretorio', default=None, help="Onde ficam os catálogos SQLite")
+    parser.add_argument('--saida', help="Arquivo JSON com os resultados ('-' para a saída padrão)")
+    args = parser.parse_args(argv)
+
+    # os erros esperados sob contenção não devem poluir a saída
+    logging.disable(logging.CRITICAL)
+    saida = sys.stderr if args.saida == '-' else sys.stdout
+    documento = {'environment': comum.ambiente(), 'scenarios': []}
+    print(f"{'journal':<8}{'perfil':>10}{'timeout':>8}{'R':>5}{'W':>5}  {'papel':<9}{'ops':>9}{'ops/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'busy':>7}{'locked':>7}{'pool':>7}{'outros':>7}",
+          file=saida)
+    for modo, perfil, timeout, leitores, escritores in itertools.product(
+            args.modos, args.perfil, args.timeout, args.leitores, args.escritores):
+        cenario = executar_cenario(args, modo, timeout, leitores, escritores, perfil)
+        documento['scenarios'].append(cenario)
+        imprimir(cenario, saida)
+
+    if args.saida:
+        comum.salvar(documento, args.saida)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Funções compartilhadas pelos benchmarks que usam o banco de dados:
+preparação de catálogos sintéticos reproduzíveis, medição de tempos,
+resultados em JSON e comparação com uma execução anterior (baseline).
+"""
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from app.dao import DAOFactory
+from app.dominio import Categoria, Produto
+from app.migracoes import aplicar_migracoes
+from app.pool import BASE_DIR
+from app.singleton import get_database_connection
+
+
+# os catálogos gerados são reaproveitados entre as execuções (gerar 1M de linhas é demorado)
+DIRETORIO_BANCOS = Path(tempfile.gettempdir()) / 'dao_benchmarks'
+
+_ITENS = ["Notebook", "Monitor", "Teclado", "Mouse", "Cadeira", "Mesa", "Máquina de Café",
+          "Fone de Ouvido", "Impressora", "Roteador", "Câmera", "Ventilador", "Luminária",
+          "Garrafa Térmica", "Mochila", "Relógio", "Caixa de Som", "Estante", "Liquidificador", "Tênis"]
+_ATRIBUTOS = ["Básico", "Compacto", "Ergonômico", "Profissional", "Sem Fio", "Portátil", "Premium",
+              "Econômico", "Inteligente", "Clássico", "Elétrico", "Digital"]
+_MARCAS = ["Orion", "Atlas", "Vega", "Lyra", "Draco", "Pegasus", "Aquila", "Cygnus", "Hydra", "Lupus"]
+_SETORES = ["Informática", "Escritório", "Casa", "Cozinha", "Esporte", "Eletrônicos", "Áudio",
+            "Iluminação", "Viagem", "Decoração"]
+
+
+def quantidade_categorias(linhas: int) -> int:
+    """Categorias do catálogo: cerca de uma para cada mil produtos (mínimo de 10)"""
+    return max(10, linhas // 1000)
+
+
+def descricoes_categorias(quantidade: int) -> list[str]:
+    return [f"{_SETORES[i % len(_SETORES)]} {i // len(_SETORES) + 1:04d}" for i in range(quantidade)]
+
+
+def gerar_produtos(linhas: int, categorias: list[Categoria], semente: int) -> Iterator[Produto]:
+    """Produtos sintéticos determinísticos (mesma semente, mesmo catálogo)"""
+    rng = random.Random(semente)
+    for i in range(linhas):
+        descricao = (f"{rng.choice(_ITENS)} {rng.choice(_ATRIBUTOS)} "
+                     f"{rng.choice(_MARCAS)} {i:07d}")
+        yield Produto(id=None, descricao=descricao,
+                      preco_unitario=round(rng.uniform(5, 5000), 2),
+                      quantidade_estoque=rng.randint(0, 200),
+                      categoria=categorias[rng.randrange(len(categorias))])
+
+
+def caminho_banco(linhas: int, semente: int, diretorio: Optional[Path] = None) -> Path:
+    return Path(diretorio or DIRETORIO_BANCOS) / f"catalogo_{linhas}_{semente}.sqlite3"
+
+
+def _remover_banco(caminho: Path) -> None:
+    # conexões ociosas ainda abertas continuariam gravando no arquivo apagado
+    get_database_connection().close_all_connections()
+    for sufixo in ('', '-wal', '-shm'):
+        Path(f"{caminho}{sufixo}").unlink(missing_ok=True)
+
+
+def preparar_catalogo(linhas: int, semente: int = 42, engine: str = 'sqlite',
+                      diretorio: Optional[Path] = None, recriar: bool = False,
+                      opcoes: Optional[dict] = None) -> dict[str, Any]:
+    """
+    Configura o DAOFactory com um catálogo de `linhas` produtos. No backend 'sqlite'
+    o catálogo fica em um arquivo próprio (nunca no banco da aplicação) e é
+    reaproveitado se já existir; os backends em memória são sempre populados.
+
+    Returns:
+        Descrição do catálogo (backend, banco, linhas, categorias e tempo de carga)
+    """
+    config: dict[str, Any] = {'ENGINE': engine, 'OPTIONS': dict(opcoes or {})}
+    if engine == 'sqlite':
+        caminho = caminho_banco(linhas, semente, diretorio)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        if recriar:
+            _remover_banco(caminho)
+        config['NAME'] = caminho
+    else:
+        config['NAME'] = f"benchmark_{linhas}_{semente}"
+    backend = DAOFactory.configurar(config)
+    if engine != 'memoria':
+        aplicar_migracoes()
+
+    categoria_dao = DAOFactory.get_categoria_dao()
+    produto_dao = DAOFactory.get_produto_dao()
+    catalogo = {**backend.descricao(), 'engine': engine, 'linhas': linhas, 'semente': semente,
+                'categorias': quantidade_categorias(linhas), 'carga_s': None}
+    if categoria_dao.selecionar_todos():
+        # catálogo reaproveitado de uma execução anterior (recriado se ficou incompleto)
+        existentes = sum(r.quantidade_produtos for r in produto_dao.resumo_estoque_por_categoria(0))
+        if existentes == linhas or engine != 'sqlite':
+            return catalogo
+        DAOFactory.configurar({'ENGINE': 'memoria'})
+        return preparar_catalogo(linhas, semente, engine, diretorio, True, opcoes)
+
+    inicio = time.perf_counter()
+    categorias = [Categoria(id=None, descricao=descricao)
+                  for descricao in descricoes_categorias(quantidade_categorias(linhas))]
+    categoria_dao.incluir_lote(categorias)
+    produto_dao.incluir_lote(gerar_produtos(linhas, categorias, semente))
+    catalogo['carga_s'] = round(time.perf_counter() - inicio, 3)
+    return catalogo
+
+
+def percentil(ordenados: list[float], p: float) -> float:
+    """Percentil p (0-100) com interpolação linear sobre valores já ordenados"""
+    if not ordenados:
+        return 0.0
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def resumir(duracoes_ms: list[float], itens_por_chamada: int = 1) -> dict[str, Any]:
+    """Estatísticas de uma série de medições (ms por chamada)"""
+    ordenados = sorted(duracoes_ms)
+    total_ms = sum(ordenados)
+    return {
+        'repetitions': len(ordenados),
+        'mean_ms': round(total_ms / len(ordenados), 4) if ordenados else 0.0,
+        'min_ms': round(ordenados[0], 4) if ordenados else 0.0,
+        'p50_ms': round(percentil(ordenados, 50), 4),
+        'p95_ms': round(percentil(ordenados, 95), 4),
+        'p99_ms': round(percentil(ordenados, 99), 4),
+        'max_ms': round(ordenados[-1], 4) if ordenados else 0.0,
+        # operações (ou linhas, nas inclusões em lote) por segundo
+        'ops_per_s': round(len(ordenados) * itens_por_chamada / (total_ms / 1000), 1) if total_ms else 0.0,
+    }
+
+
+def medir(funcao: Callable[[], Any], tempo_minimo: float = 0.5, min_repeticoes: int = 5,
+          max_repeticoes: int = 2000, aquecimento: int = 1) -> list[float]:
+    """
+    Chama a função repetidamente (após `aquecimento` chamadas não medidas) até somar
+    tempo_minimo segundos e min_repeticoes chamadas, e retorna a duração de cada uma (ms).
+    """
+    for _ in range(aquecimento):
+        funcao()
+    duracoes = []
+    inicio_total = time.perf_counter()
+    while len(duracoes) < max_repeticoes:
+        inicio = time.perf_counter()
+        funcao()
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+        if len(duracoes) >= min_repeticoes and time.perf_counter() - inicio_total >= tempo_minimo:
+            break
+    return duracoes
+
+
+def medir_cada(funcao: Callable[[Any], Any], itens: Iterable[Any]) -> list[float]:
+    """Duração (ms) de funcao(item) para cada item"""
+    duracoes = []
+    for item in itens:
+        inicio = time.perf_counter()
+        funcao(item)
+        duracoes.append((time.perf_counter() - inicio) * 1000)
+    return duracoes
+
+
+def _versao_codigo() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def ambiente() -> dict[str, Any]:
+    """Dados do ambiente de execução, gravados junto com os resultados"""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': _versao_codigo(),
+        'argv': sys.argv[1:],
+    }
+
+
+def chave_resultado(resultado: dict[str, Any]) -> tuple:
+    return (resultado['scenario'], resultado['engine'], resultado['rows'])
+
+
+def salvar(documento: dict[str, Any], destino: str) -> None:
+    """Grava os resultados em JSON (destino '-' escreve na saída padrão)"""
+    texto = json.dumps(documento, ensure_ascii=False, indent=2)
+    if destino == '-':
+        print(texto)
+    else:
+        Path(destino).write_text(texto + '\n', encoding='utf-8')
+
+
+def carregar(origem: str) -> dict[str, Any]:
+    return json.loads(Path(origem).read_text(encoding='utf-8'))
+
+
+def comparar(atual: dict[str, Any], baseline: dict[str, Any], metrica: str = 'p50_ms',
+             tolerancia: float = 0.10, minimo_ms: float = 0.05) -> list[dict[str, Any]]:
+    """
+    Compara os cenários presentes nas duas execuções pela métrica informada.
+    Um cenário regrediu se ficou mais de `tolerancia` (fração) mais lento e a
+    diferença passa de `minimo_ms` (evita acusar ruído em operações de microssegundos).
+    Métricas de vazão (ops_per_s) regridem quando diminuem.
+    """
+    anteriores = {chave_resultado(r): r for r in baseline.get('results', [])}
+    comparacoes = []
+    for resultado in atual.get('results', []):
+        anterior = anteriores.get(chave_resultado(resultado))
+        if anterior is None or metrica not in anterior:
+            continue
+        antes, depois = anterior[metrica], resultado[metrica]
+        if metrica == 'ops_per_s':
+            variacao = (antes - depois) / antes if antes else 0.0
+            regrediu = variacao > tolerancia
+        else:
+            variacao = (depois - antes) / antes if antes else 0.0
+            regrediu = variacao > tolerancia and depois - antes > minimo_ms
+        comparacoes.append({
+            'scenario': resultado['scenario'], 'engine': resultado['engine'], 'rows': resultado['rows'],
+            'metric': metrica, 'baseline': antes, 'current': depois,
+            # positivo = pior
+            'change': round(variacao, 4), 'regression': regrediu,
+        })
+    return comparacoes
@@ -0,0 +1,89 @@
+"""
+Compara a memória e o tempo de criação das representações das entidades de domínio:
+- dataclass comum (com __dict__ por instância, a representação original)
+- dataclass com slots (app.dominio.Produto)
+- tupla nomeada somente leitura (app.dominio.ProdutoLinha)
+e, para a dataclass com slots, o ganho do mapa de identidade (app.identidade): uma
+Categoria por linha (como antes do mapa) contra uma Categoria compartilhada por id.
+
+Uso:
+    python -m benchmarks.memoria_dominio [quantidade ...]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from app.dominio import Categoria, Produto, ProdutoLinha
+
+
+@dataclass
+class CategoriaComDict:
+    id: int
+    descricao: str
+
+
+@dataclass
+class ProdutoComDict:
+    id: int
+    descricao: str
+    preco_unitario: float
+    quantidade_estoque: int
+    categoria: CategoriaComDict
+
+
+def gerar_registros(quantidade: int) -> list:
+    """Simula os registros vindos do banco (mesmo formato do SELECT dos DAOs)"""
+    return [(i, f"Produto {i}", 10.0 + i % 100, i % 50, i % 30, f"Categoria {i % 30}")
+            for i in range(quantidade)]
+
+
+def medir(nome: str, registros: list, classe_produto, classe_categoria,
+          compartilhar_categoria: bool = True) -> dict:
+    """
+    Mede a memória retida e o tempo para materializar os registros. Com
+    compartilhar_categoria=False cada linha cria a sua própria Categoria.
+    """
+    categorias = {}
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    objetos = []
+    for reg in registros:
+        categoria = categorias.get(reg[4]) if compartilhar_categoria else None
+        if categoria is None:
+            categoria = categorias[reg[4]] = classe_categoria(reg[4], reg[5])
+        objetos.append(classe_produto(reg[0], reg[1], reg[2], reg[3], categoria))
+    tempo = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objetos
+    return {
+        'representacao': nome,
+        'quantidade': len(registros),
+        'memoria_mb': memoria / 1024 / 1024,
+        'bytes_por_objeto': memoria / len(registros),
+        'tempo_s': tempo,
+    }
+
+
+def main(quantidades: list[int]) -> None:
+    representacoes = [
+        ('dataclass (__dict__)', ProdutoComDict, CategoriaComDict, True),
+        ('slots, categoria/linha', Produto, Categoria, False),
+        ('dataclass (slots)', Produto, Categoria, True),
+        ('ProdutoLinha (tupla)', ProdutoLinha, Categoria, True),
+    ]
+    print(f"{'representação':<24}{'linhas':>10}{'memória (MB)':>15}{'bytes/obj':>12}{'tempo (s)':>12}")
+    for quantidade in quantidades:
+        registros = gerar_registros(quantidade)
+        for nome, classe_produto, classe_categoria, compartilhar in representacoes:
+            r = medir(nome, registros, classe_produto, classe_categoria, compartilhar)
+            print(f"{r['representacao']:<24}{r['quantidade']:>10}{r['memoria_mb']:>15.1f}"
+                  f"{r['bytes_por_objeto']:>12.0f}{r['tempo_s']:>12.3f}")
+        del registros
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000])
@@ -0,0 +1,262 @@
+"""
+Suíte de benchmarks das camadas DAO, Service e View
+
+Para cada tamanho de catálogo (produtos gerados com semente fixa, ver
+benchmarks.comum) mede:
+- dao:     CRUD (incluir/alterar/excluir, inclusão em lote), leituras e relatórios
+           (também pela análise de estoque em arrays NumPy)
+- service: listagens, busca, criação e atualização com as regras de negócio
+- view:    renderização completa de /categorias/ e /produtos/ pelo cliente de testes do Django
+
+Os resultados (latências p50/p95/p99 e vazão por cenário) podem ser gravados em
+JSON e comparados com uma execução anterior; cenários mais lentos que a
+tolerância são apontados como regressão e o processo termina com código 1.
+
+Uso:
+    python -m benchmarks.suite                                  # catálogo de 1k produtos
+    python -m benchmarks.suite --linhas 1000 100000 1000000 --saida baseline.json
+    python -m benchmarks.suite --linhas 1000 100000 --comparar baseline.json --tolerancia 0.15
+    python -m benchmarks.suite --engine memoria --camadas dao service
+"""
+import argparse
+import os
+import random
+import sys
+from typing import Any, Callable, Iterator
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proj_padroes_projeto.settings')
+django.setup()
+
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from app.analise_estoque import AnaliseEstoque
+from app.dao import DAOFactory, codificar_cursor
+from app.dominio import Produto
+from app.instrumentacao import MONITOR
+from app.services import CategoriaService, ProdutoService
+from benchmarks import comum
+
+
+CAMADAS = ('dao', 'service', 'view')
+# a partir deste tamanho as leituras da tabela inteira não têm chamada de aquecimento
+LINHAS_LEITURA_PESADA = 100_000
+
+
+class Contexto:
+    """Dados de referência do catálogo usados pelos cenários"""
+
+    def __init__(self, linhas: int, engine: str, semente: int, tempo_minimo: float, operacoes: int):
+        self.linhas = linhas
+        self.engine = engine
+        self.tempo_minimo = tempo_minimo
+        self.operacoes = operacoes
+        self.rng = random.Random(semente)
+        self.categoria_dao = DAOFactory.get_categoria_dao()
+        self.produto_dao = DAOFactory.get_produto_dao()
+        self.categoria = self.categoria_dao.selecionar_todos()[0]
+        # os produtos do catálogo têm ids 1..linhas (os cenários de escrita removem o que incluem)
+        self.ids = [self.rng.randint(1, linhas) for _ in range(1000)]
+        meio = self.produto_dao.selecionar_um(linhas // 2 or 1)
+        self.cursor_meio = codificar_cursor('>', (meio.descricao, meio.id))
+        # o número no fim da descrição é único: a busca encontra um único produto
+        self.termo_raro = meio.descricao.rsplit(' ', 1)[-1]
+        self.termo_comum = "note"
+
+    def proximo_id(self) -> int:
+        return self.ids[self.rng.randrange(len(self.ids))]
+
+    def resultado(self, cenario: str, camada: str, duracoes: list[float], itens_por_chamada: int = 1) -> dict:
+        return {'scenario': cenario, 'layer': camada, 'engine': self.engine, 'rows': self.linhas,
+                **comum.resumir(duracoes, itens_por_chamada)}
+
+    def medir(self, funcao: Callable[[], Any], pesada: bool = False) -> list[float]:
+        if pesada:
+            aquecimento = 0 if self.linhas >= LINHAS_LEITURA_PESADA else 1
+            return comum.medir(funcao, self.tempo_minimo, min_repeticoes=3, aquecimento=aquecimento)
+        return comum.medir(funcao, self.tempo_minimo)
+
+    def produto_novo(self, indice: int) -> Produto:
+        return Produto(id=None, descricao=f"Benchmark Produto {indice}", preco_unitario=10.0,
+                       quantidade_estoque=5, categoria=self.categoria)
+
+
+def cenarios_dao(ctx: Contexto) -> Iterator[dict]:
+    categoria_dao, produto_dao = ctx.categoria_dao, ctx.produto_dao
+
+    yield ctx.resultado('dao.categoria.selecionar_todos', 'dao', ctx.medir(categoria_dao.selecionar_todos))
+    yield ctx.resultado('dao.produto.selecionar_um', 'dao',
+                        ctx.medir(lambda: produto_dao.selecionar_um(ctx.proximo_id())))
+    yield ctx.resultado('dao.produto.selecionar_pagina', 'dao', ctx.medir(produto_dao.selecionar_pagina))
+    yield ctx.resultado('dao.produto.selecionar_pagina.meio', 'dao',
+                        ctx.medir(lambda: produto_dao.selecionar_pagina(ctx.cursor_meio)))
+    yield ctx.resultado('dao.produto.buscar_por_descricao.raro', 'dao',
+                        ctx.medir(lambda: produto_dao.buscar_por_descricao(ctx.termo_raro)))
+    yield ctx.resultado('dao.produto.buscar_por_descricao.comum', 'dao',
+                        ctx.medir(lambda: produto_dao.buscar_por_descricao(ctx.termo_comum, 50)))
+    yield ctx.resultado('dao.produto.calcular_valor_total_estoque', 'dao',
+                        ctx.medir(produto_dao.calcular_valor_total_estoque, pesada=True))
+    yield ctx.resultado('dao.produto.resumo_estoque_por_categoria', 'dao',
+                        ctx.medir(lambda: produto_dao.resumo_estoque_por_categoria(10), pesada=True))
+    yield ctx.resultado('dao.produto.selecionar_todos', 'dao',
+                        ctx.medir(produto_dao.selecionar_todos, pesada=True))
+
+    # mesmos relatórios sobre as colunas em arrays NumPy (app.analise_estoque)
+    analise = AnaliseEstoque()
+    yield ctx.resultado('dao.analise.carregar', 'dao', ctx.medir(analise.carregar, pesada=True))
+    yield ctx.resultado('dao.analise.atualizar', 'dao', ctx.medir(analise.atualizar))
+    yield ctx.resultado('dao.analise.valor_total', 'dao', ctx.medir(analise.valor_total))
+    yield ctx.resultado('dao.analise.resumo_por_categoria', 'dao',
+                        ctx.medir(lambda: analise.resumo_por_categoria(10)))
+    yield ctx.resultado('dao.analise.percentis', 'dao', ctx.medir(lambda: analise.percentis('preco_unitario')))
+
+    # CRUD: cada operação medida individualmente; o catálogo volta ao estado original
+    novos = [ctx.produto_novo(i) for i in range(ctx.operacoes)]
+    yield ctx.resultado('dao.produto.incluir', 'dao', comum.medir_cada(produto_dao.incluir, novos))
+    for produto in novos:
+        produto.quantidade_estoque += 1
+    yield ctx.resultado('dao.produto.alterar', 'dao', comum.medir_cada(produto_dao.alterar, novos))
+    yield ctx.resultado('dao.produto.excluir_por_id', 'dao',
+                        comum.medir_cada(produto_dao.excluir_por_id, [p.id for p in novos]))
+
+    tamanho_lote = 1000
+
+    def incluir_lote():
+        lote = [ctx.produto_novo(i) for i in range(tamanho_lote)]
+        produto_dao.incluir_lote(lote)
+        incluidos.extend(p.id for p in lote)
+
+    incluidos: list[int] = []
+    duracoes = comum.medir(incluir_lote, ctx.tempo_minimo, min_repeticoes=3, max_repeticoes=20, aquecimento=0)
+    for id in incluidos:
+        produto_dao.excluir_por_id(id)
+    yield ctx.resultado('dao.produto.incluir_lote', 'dao', duracoes, tamanho_lote)
+
+
+def cenarios_service(ctx: Contexto) -> Iterator[dict]:
+    categoria_service = CategoriaService()
+    produto_service = ProdutoService()
+
+    yield ctx.resultado('service.categoria.listar_pagina', 'service', ctx.medir(categoria_service.listar_pagina))
+    yield ctx.resultado('service.produto.listar_pagina', 'service', ctx.medir(produto_service.listar_pagina))
+    yield ctx.resultado('service.produto.buscar_por_descricao', 'service',
+                        ctx.medir(lambda: produto_service.buscar_por_descricao(ctx.termo_comum)))
+    yield ctx.resultado('service.produto.resumo_estoque_por_categoria', 'service',
+                        ctx.medir(produto_service.resumo_estoque_por_categoria, pesada=True))
+
+    def atualizar(id: int):
+        # regrava os mesmos valores: o catálogo não muda
+        produto = produto_service.obter_por_id(id)
+        produto_service.atualizar_produto(id, produto.descricao, produto.preco_unitario,
+                                          produto.quantidade_estoque, produto.categoria.id)
+
+    yield ctx.resultado('service.produto.atualizar_produto', 'service',
+                        comum.medir_cada(atualizar, ctx.ids[:ctx.operacoes]))
+
+    # criar_produto não retorna o id: os ids criados ficam depois do de uma inclusão de referência
+    referencia = ctx.produto_novo(-1)
+    ctx.produto_dao.incluir(referencia)
+    duracoes = comum.medir_cada(
+        lambda i: produto_service.criar_produto(f"Benchmark Service {i}", 10.0, 5, ctx.categoria.id),
+        range(ctx.operacoes))
+    for id in range(referencia.id, referencia.id + ctx.operacoes + 1):
+        ctx.produto_dao.excluir_por_id(id)
+    yield ctx.resultado('service.produto.criar_produto', 'service', duracoes)
+
+
+def cenarios_view(ctx: Contexto) -> Iterator[dict]:
+    cliente = Client()
+
+    def obter(url: str) -> Callable[[], None]:
+        def requisicao():
+            resposta = cliente.get(url)
+            if resposta.status_code != 200:
+                raise RuntimeError(f"GET {url} retornou {resposta.status_code}")
+        return requisicao
+
+    yield ctx.resultado('view.categorias', 'view', ctx.medir(obter('/categorias/')))
+    yield ctx.resultado('view.produtos', 'view', ctx.medir(obter('/produtos/')))
+    yield ctx.resultado('view.produtos.meio', 'view', ctx.medir(obter(f'/produtos/?cursor={ctx.cursor_meio}')))
+
+
+_CENARIOS = {'dao': cenarios_dao, 'service': cenarios_service, 'view': cenarios_view}
+
+
+def imprimir(resultado: dict, saida) -> None:
+    print(f"{resultado['scenario']:<48}{resultado['rows']:>9}{resultado['repetitions']:>7}"
+          f"{resultado['p50_ms']:>11.3f}{resultado['p95_ms']:>11.3f}{resultado['p99_ms']:>11.3f}"
+          f"{resultado['ops_per_s']:>13.1f}", file=saida, flush=True)
+
+
+def executar(args: argparse.Namespace, saida) -> dict:
+    # a suíte mede o custo real (monitor ativo), mas sem o log de consultas lentas
+    MONITOR.limite_lento_ms = None
+    documento = {'environment': comum.ambiente(), 'catalogs': [], 'results': []}
+    print(f"{'cenário':<48}{'linhas':>9}{'reps':>7}{'p50 (ms)':>11}{'p95 (ms)':>11}"
+          f"{'p99 (ms)':>11}{'ops/s':>13}", file=saida)
+    for linhas in args.linhas:
+        catalogo = comum.preparar_catalogo(linhas, args.semente, args.engine, args.diretorio, args.recriar)
+        documento['catalogs'].append(catalogo)
+        if catalogo['carga_s'] is not None:
+            print(f"# catálogo de {linhas} produtos gerado em {catalogo['carga_s']:.1f}s", file=saida)
+        ctx = Contexto(linhas, args.engine, args.semente, args.tempo_minimo, args.operacoes)
+        for camada in args.camadas:
+            for resultado in _CENARIOS[camada](ctx):
+                documento['results'].append(resultado)
+                imprimir(resultado, saida)
+    return documento
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks das camadas DAO, Service e View")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[1000],
+                        help="Tamanhos dos catálogos (quantidade de produtos), ex.: 1000 100000 1000000")
+    parser.add_argument('--engine', default='sqlite', choices=['sqlite', 'sqlite_memoria', 'memoria'],
+                        help="Backend dos DAOs (ver DAO_BACKEND)")
+    parser.add_argument('--camadas', nargs='+', default=list(CAMADAS), choices=CAMADAS)
+    parser.add_argument('--semente', type=int, default=42, help="Semente dos dados gerados")
+    parser.add_argument('--tempo-minimo', type=float, default=0.5,
+                        help="Segundos mínimos de medição por cenário")
+    parser.add_argument('--operacoes', type=int, default=200,
+                        help="Operações medidas nos cenários de escrita")
+    parser.add_argument('--diretorio', default=None,
+                        help=f"Onde ficam os catálogos SQLite (padrão: {comum.DIRETORIO_BANCOS})")
+    parser.add_argument('--recriar', action='store_true', help="Gera os catálogos de novo")
+    parser.add_argument('--saida', help="Arquivo JSON com os resultados ('-' para a saída padrão)")
+    parser.add_argument('--comparar', metavar='BASELINE', help="JSON de uma execução anterior")
+    parser.add_argument('--metrica', default='p50_ms',
+                        choices=['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'ops_per_s'])
+    parser.add_argument('--tolerancia', type=float, default=0.10,
+                        help="Piora relativa tolerada antes de acusar regressão (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    setup_test_environment()
+    # com o JSON na saída padrão, a tabela vai para a saída de erros
+    saida = sys.stderr if args.saida == '-' else sys.stdout
+    documento = executar(args, saida)
+
+    codigo = 0
+    if args.comparar:
+        comparacoes = comum.comparar(documento, comum.carregar(args.comparar), args.metrica, args.tolerancia)
+        documento['comparison'] = {'baseline': args.comparar, 'metric': args.metrica,
+                                   'tolerance': args.tolerancia, 'scenarios': comparacoes}
+        regressoes = [c for c in comparacoes if c['regression']]
+        print(f"\nComparação com {args.comparar} ({args.metrica}, tolerância {args.tolerancia:.0%}):",
+              file=saida)
+        for c in comparacoes:
+            marca = "REGRESSÃO" if c['regression'] else "ok"
+            print(f"  {c['scenario']:<48}{c['rows']:>9}{c['baseline']:>12.3f}{c['current']:>12.3f}"
+                  f"{c['change']:>+9.1%}  {marca}", file=saida)
+        if regressoes:
+            print(f"{len(regressoes)} cenário(s) com regressão", file=saida)
+            codigo = 1
+
+    if args.saida:
+        comum.salvar(documento, args.saida)
+    return codigo
+
+
+if __name__ == '__main__':
+    sys.exit(main())
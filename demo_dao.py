@@ -163,6 +163,9 @@ def demonstrar_uso_services():
             categoria_service.excluir_categoria(categoria_tecnologia.id)
             print("   🗑️ Categoria removida")
 
+    except Exception as e:
+        print(f"   ❌ Erro inesperado: {e}")
+
 
 def demonstrar_seguranca():
     """Demonstra as funcionalidades de segurança implementadas"""
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -82,6 +83,45 @@ DATABASES = {
 }
 
 
+# Instrumentação dos DAOs: execuções acima deste tempo (em ms) são registradas
+# no log 'app.consultas_lentas' (parâmetros mascarados)
+DAO_LIMITE_CONSULTA_LENTA_MS = 100.0
+
+# Armazenamento usado pelos DAOs (ver app/backends.py):
+#   'sqlite'          banco SQLite no arquivo NAME
+#   'sqlite_memoria'  banco SQLite em memória compartilhado pelas conexões (testes)
+#   'memoria'         dicionários em memória, sem SQL (testes e caches de leitura)
+DAO_BACKEND = {
+    'ENGINE': 'sqlite',
+    'NAME': BASE_DIR / 'arq_soft.sqlite3',
+    'OPTIONS': {
+        'max_connections': 5,
+        'timeout': 30.0,
+        'idle_timeout': 300.0,
+        'cached_statements': 256,
+        # WAL: leituras não esperam a escrita (python -m benchmarks.carga compara com DELETE)
+        'journal_mode': 'WAL',
+        # consultas em conexões somente leitura (uma por núcleo) e escritas em uma única
+        # conexão; com 0, leitura e escrita dividem as max_connections
+        'read_connections': os.cpu_count() or 4,
+    },
+    # caches de leitura ({'max_itens': ..., 'ttl': segundos} ou None para desativar)
+    'CACHE_CATEGORIAS': {'max_itens': 1000, 'ttl': 300.0},
+    'CACHE_PRODUTOS': None,
+    # escritas enviadas a uma thread escritora que as efetiva em lotes (commit em grupo),
+    # ex.: {'max_operacoes': 100, 'max_espera_ms': 1.0}; None executa cada escrita na própria thread
+    'FILA_ESCRITA': None,
+}
+
+# Perfil de desempenho aplicado a cada conexão SQLite dos DAOs (app/perfis.py):
+#   'durable'    synchronous=FULL: cada commit é gravado no disco antes de retornar
+#   'balanced'   synchronous=NORMAL, cache de 32 MiB e mmap de 256 MiB
+#   'bulk-load'  synchronous=OFF e checkpoints espaçados, para cargas que podem ser refeitas
+# ou um dicionário de PRAGMAs, ex.: {'base': 'balanced', 'cache_size': -131072}.
+# Os valores em vigor aparecem em /diagnostico/consultas/ e em `manage.py perfil_banco`.
+DATABASE_PROFILE = 'balanced'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -35,8 +35,10 @@ urlpatterns = [
     #   - categorias/alterar/<id>/ : exibe a página de alteracao de registro
     #   - categorias/excluir/<id>/ : exibe a página de exclusao de registro
     #   - categorias/salvar/       : insere, altera ou exclui um registro do BD
+    #   - categorias/exportar/     : exporta todas as categorias (CSV ou JSON Lines)
     # 
     path('categorias/', views.categorias, name='categorias'),
+    path('categorias/exportar/', views.exportar_categorias, name='exportar_categorias'),
     path('categorias/<str:acao>/', views.categorias, name='categorias' ), 
     path('categorias/<str:acao>/<int:id>/', views.categorias, name='categorias'),
 
@@ -48,11 +50,18 @@ urlpatterns = [
     #   - produtos/alterar/<id>/ : exibe a página de alteracao de registro
     #   - produtos/excluir/<id>/ : exibe a página de exclusao de registro
     #   - produtos/salvar/       : insere, altera ou exclui um registro do BD
+    #   - produtos/exportar/     : exporta todos os produtos (CSV ou JSON Lines)
+    #   - produtos/importar/     : importa produtos de um arquivo CSV, em lotes
     # 
     # 
     path('produtos/', views.produtos, name='produtos'),
+    path('produtos/exportar/', views.exportar_produtos, name='exportar_produtos'),
+    path('produtos/importar/', views.importar_produtos, name='importar_produtos'),
     path('produtos/<str:acao>/', views.produtos, name='produtos' ), 
     path('produtos/<str:acao>/<int:id>/', views.produtos, name='produtos'),
+
+    # estatísticas das consultas ao banco (somente com DEBUG)
+    path('diagnostico/consultas/', views.diagnostico_consultas, name='diagnostico_consultas'),
 ] 
 
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -6,14 +6,35 @@ Execute este arquivo para testar as funcionalidades implementadas
 import sys
 import os
 import logging
+import threading
+import time
+import asyncio
+import sqlite3
+import gzip
+import io
+import json
+import math
+import base64
 
 # Adicionar o diretório da aplicação ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.dao import DAOFactory
+from app.dao import CategoriaDAO, DAOComCache, DAOFactory, codificar_cursor
+from app.cache import CacheLRU
 from app.services import CategoriaService, ProdutoService
 from app.dominio import Categoria, Produto
 from app.singleton import get_database_connection
+from app.pool import get_connection_pool
+from app.comandos import COMANDOS
+from app.instrumentacao import MONITOR, configurar_monitor
+from app.transacao import unidade_de_trabalho
+from app.migracoes import aplicar_migracoes
+from app.migracoes.planos import verificar_planos, varreduras_do_plano
+from app.fila_escrita import get_fila_escrita
+from app.exportacao import exportar_produtos
+from app.importacao import abrir_csv, importar_produtos
+from app.analise_estoque import AnaliseEstoque
+from app.assincrono import configurar_executor, encerrar_executor, iterar
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +61,51 @@ def teste_conexao_singleton():
         print("✅ Conexão com banco de dados estabelecida")
     except Exception as e:
         print(f"❌ Erro ao conectar: {e}")
+    
+    # Testar recolhimento de conexões de threads encerradas
+    try:
+        thread = threading.Thread(target=db1.get_connection)
+        thread.start()
+        thread.join()
+        if db1.reap() >= 1:
+            print("✅ Conexão de thread encerrada devolvida ao pool")
+        else:
+            print("❌ Conexão de thread encerrada não foi recolhida")
+    except Exception as e:
+        print(f"❌ Erro no reaper: {e}")
+
+
+def teste_pool_conexoes():
+    """Testa se os DAOs reutilizam as conexões do pool"""
+    print("\n=== TESTE: Pool de Conexões ===")
+    
+    try:
+        pool = get_connection_pool()
+        dao = DAOFactory.get_categoria_dao()
+        criadas_antes = pool.stats()['created']
+        
+        # Várias consultas seguidas devem reutilizar a mesma conexão
+        for _ in range(10):
+            dao.selecionar_todos()
+        
+        stats = pool.stats()
+        if stats['created'] - criadas_antes <= 1:
+            print(f"✅ Conexões reutilizadas - estatísticas: {stats}")
+        else:
+            print(f"❌ Pool não reutilizou as conexões - estatísticas: {stats}")
+        
+        # Comandos registrados são preparados uma vez por conexão e depois reaproveitados
+        COMANDOS.zerar_estatisticas()
+        for _ in range(10):
+            dao.existe_categoria("Categoria inexistente")
+        stats = COMANDOS.stats()
+        if stats['executions'] == 10 and stats['prepares'] <= 1:
+            print(f"✅ Comandos preparados reaproveitados - {stats['cache_hits']} acertos no cache")
+        else:
+            print(f"❌ Comandos preparados não reaproveitados - estatísticas: {stats}")
+        
+    except Exception as e:
+        print(f"❌ Erro no teste do pool: {e}")
 
 
 def teste_categoria_dao():
@@ -207,6 +273,553 @@ def teste_produto_dao():
         print(f"❌ Erro no teste ProdutoDAO: {e}")
 
 
+def teste_produto_linha():
+    """Testa o contrato de ProdutoLinha: tupla somente leitura com a categoria compartilhada"""
+    print("\n=== TESTE: ProdutoLinha ===")
+    
+    try:
+        linhas = list(DAOFactory.get_produto_dao().iterar_linhas())
+        produtos = {p.id: p for p in DAOFactory.get_produto_dao().selecionar_todos()}
+        linha = linhas[0]
+        
+        # mesmos valores que o Produto correspondente
+        produto = produtos[linha.id]
+        if (linha.descricao, linha.preco_unitario, linha.categoria.descricao) == \
+                (produto.descricao, produto.preco_unitario, produto.categoria.descricao):
+            print(f"✅ {len(linhas)} linhas com os mesmos atributos de Produto")
+        else:
+            print("❌ ProdutoLinha difere do Produto")
+        
+        try:
+            linha.preco_unitario = 0
+            print("❌ Campo de ProdutoLinha reatribuído")
+        except AttributeError:
+            print("✅ Campos de ProdutoLinha somente leitura")
+        
+        # a categoria (mutável) é compartilhada entre as linhas, então a linha não é hashable
+        mesma_categoria = [l for l in linhas if l.categoria.id == linha.categoria.id]
+        try:
+            hash(linha)
+            print("❌ ProdutoLinha com categoria mutável aceitou hash()")
+        except TypeError:
+            if all(l.categoria is linha.categoria for l in mesma_categoria):
+                print("✅ Categoria compartilhada entre as linhas (linha não é hashable)")
+            else:
+                print("❌ Linhas da mesma categoria com objetos Categoria diferentes")
+    except Exception as e:
+        print(f"❌ Erro no teste ProdutoLinha: {e}")
+
+
+def teste_inclusao_em_lote():
+    """Testa incluir_lote: ids preenchidos, lote vazio e rollback do lote inteiro em caso de erro"""
+    print("\n=== TESTE: Inclusão em Lote ===")
+    
+    categoria_dao = DAOFactory.get_categoria_dao()
+    produto_dao = DAOFactory.get_produto_dao()
+    categorias = [Categoria(id=None, descricao=f"Categoria Lote {i}") for i in range(5)]
+    try:
+        # os ids gerados voltam para os objetos, na ordem de inclusão
+        ids = categoria_dao.incluir_lote(categorias, tamanho_lote=2)
+        if ids == [c.id for c in categorias] and all(
+                categoria_dao.selecionar_um(c.id).descricao == c.descricao for c in categorias):
+            print(f"✅ {len(ids)} categorias incluídas com os ids preenchidos")
+        else:
+            print(f"❌ Ids do lote inesperados: {ids}")
+        
+        # lote vazio não altera nada
+        total_antes = len(produto_dao.selecionar_todos())
+        if produto_dao.incluir_lote([]) == [] and categoria_dao.incluir_lote(iter([])) == [] \
+                and len(produto_dao.selecionar_todos()) == total_antes:
+            print("✅ Lote vazio sem efeito")
+        else:
+            print("❌ Lote vazio alterou o banco")
+        
+        # uma categoria inexistente no terceiro bloco desfaz também os blocos anteriores
+        produtos = [Produto(id=None, descricao=f"Produto Lote {i}", preco_unitario=1.0, quantidade_estoque=1,
+                            categoria=Categoria(id=999999, descricao="") if i == 5 else categorias[0])
+                    for i in range(6)]
+        try:
+            produto_dao.incluir_lote(produtos, tamanho_lote=2)
+            print("❌ Lote com categoria inexistente aceito")
+        except sqlite3.IntegrityError:
+            if len(produto_dao.selecionar_todos()) == total_antes:
+                print("✅ Erro no meio do lote desfaz o lote inteiro")
+            else:
+                print("❌ Blocos anteriores ao erro foram mantidos")
+    except Exception as e:
+        print(f"❌ Erro no teste de inclusão em lote: {e}")
+    finally:
+        for categoria in categorias:
+            if categoria.id:
+                categoria_dao.excluir(categoria)
+
+
+def teste_iteracao():
+    """Testa as leituras em fluxo (iterar_todos/iterar_por_categoria) contra as listagens"""
+    print("\n=== TESTE: Leitura em Fluxo ===")
+    
+    try:
+        categoria_dao = DAOFactory.get_categoria_dao()
+        produto_dao = DAOFactory.get_produto_dao()
+        
+        # mesmos registros e mesma ordem das listagens, qualquer que seja o tamanho do lote
+        produtos = [p.id for p in produto_dao.selecionar_todos()]
+        categorias = [c.id for c in categoria_dao.selecionar_todos()]
+        if all([p.id for p in produto_dao.iterar_todos(tamanho_lote)] == produtos for tamanho_lote in (1, 3, None)) \
+                and [c.id for c in categoria_dao.iterar_todos(tamanho_lote=2)] == categorias:
+            print(f"✅ iterar_todos igual a selecionar_todos ({len(produtos)} produtos, {len(categorias)} categorias)")
+        else:
+            print("❌ iterar_todos diferente de selecionar_todos")
+        
+        por_categoria = {id: [p.id for p in produto_dao.selecionar_por_categoria(id)] for id in categorias}
+        if all([p.id for p in produto_dao.iterar_por_categoria(id, tamanho_lote=2)] == ids
+               for id, ids in por_categoria.items()) and not list(produto_dao.iterar_por_categoria(999999)):
+            print("✅ iterar_por_categoria igual a selecionar_por_categoria")
+        else:
+            print("❌ iterar_por_categoria diferente de selecionar_por_categoria")
+        
+        # a conexão fica em uso enquanto o gerador está aberto e é liberada quando ele é fechado
+        em_uso = get_database_connection().stats()['bound_in_use']
+        gerador = produto_dao.iterar_todos(tamanho_lote=1)
+        next(gerador)
+        durante = get_database_connection().stats()['bound_in_use']
+        gerador.close()
+        if durante == em_uso + 1 and get_database_connection().stats()['bound_in_use'] == em_uso:
+            print("✅ Gerador fechado antes do fim libera a conexão")
+        else:
+            print("❌ Conexão do gerador não liberada ao fechá-lo")
+    except Exception as e:
+        print(f"❌ Erro no teste de leitura em fluxo: {e}")
+
+
+def teste_paginacao():
+    """Testa a paginação por chave: percurso completo, empates, última página e cursores inválidos"""
+    print("\n=== TESTE: Paginação ===")
+    
+    produto_dao = DAOFactory.get_produto_dao()
+    categoria = Categoria(id=None, descricao="Categoria Paginação")
+    try:
+        DAOFactory.get_categoria_dao().incluir(categoria)
+        # descrições iguais: o id desempata a ordem e nenhum produto se repete ou se perde
+        produto_dao.incluir_lote([Produto(id=None, descricao="Produto Paginação Empate", preco_unitario=1.0,
+                                          quantidade_estoque=1, categoria=categoria) for _ in range(3)])
+        esperados = [p.id for p in sorted(produto_dao.selecionar_todos(), key=lambda p: (p.descricao, p.id))]
+        
+        paginas = [produto_dao.selecionar_pagina(tamanho=2)]
+        while paginas[-1].proximo:
+            paginas.append(produto_dao.selecionar_pagina(paginas[-1].proximo, tamanho=2))
+        ids = [p.id for pagina in paginas for p in pagina.registros]
+        if ids == esperados and paginas[0].anterior is None and paginas[-1].proximo is None:
+            print(f"✅ {len(paginas)} páginas percorridas sem repetições, inclusive nos empates")
+        else:
+            print(f"❌ Percurso das páginas inesperado: {ids} != {esperados}")
+        
+        # voltando da última página chega-se às mesmas páginas
+        volta = [paginas[-1]]
+        while volta[-1].anterior:
+            volta.append(produto_dao.selecionar_pagina(volta[-1].anterior, tamanho=2))
+        if [[p.id for p in pagina.registros] for pagina in reversed(volta)] == \
+                [[p.id for p in pagina.registros] for pagina in paginas]:
+            print("✅ Páginas anteriores iguais às percorridas para frente")
+        else:
+            print("❌ Páginas anteriores diferentes")
+        
+        # depois da última chave: página vazia, sem cursores
+        ultimo = paginas[-1].registros[-1]
+        vazia = produto_dao.selecionar_pagina(codificar_cursor('>', (ultimo.descricao, ultimo.id)))
+        if vazia.registros == [] and vazia.proximo is None and vazia.anterior is None:
+            print("✅ Página vazia após a última chave")
+        else:
+            print(f"❌ Página após a última chave: {vazia}")
+        
+        # cursores adulterados são recusados
+        forjados = ["não-é-base64!", base64.urlsafe_b64encode(b'[">", "a", "1"]').decode(),
+                    base64.urlsafe_b64encode(b'["=", "a", 1]').decode(), base64.urlsafe_b64encode(b'\xff').decode()]
+        recusados = 0
+        for cursor in forjados:
+            try:
+                produto_dao.selecionar_pagina(cursor)
+            except ValueError:
+                recusados += 1
+        if recusados == len(forjados):
+            print("✅ Cursores adulterados recusados")
+        else:
+            print(f"❌ {len(forjados) - recusados} cursores adulterados aceitos")
+    except Exception as e:
+        print(f"❌ Erro no teste de paginação: {e}")
+    finally:
+        if categoria.id:
+            for produto in produto_dao.selecionar_por_categoria(categoria.id):
+                produto_dao.excluir(produto)
+            DAOFactory.get_categoria_dao().excluir(categoria)
+
+
+def teste_cache_dao():
+    """Testa o cache de leitura dos DAOs: acertos, cópias independentes e invalidação pelas escritas"""
+    print("\n=== TESTE: Cache dos DAOs ===")
+    
+    categoria = Categoria(id=None, descricao="Categoria Cache")
+    try:
+        DAOFactory.configurar({'CACHE_PRODUTOS': {'max_itens': 100, 'ttl': 60.0}})
+        categoria_dao = DAOFactory.get_categoria_dao()
+        produto_dao = DAOFactory.get_produto_dao()
+        cache = DAOFactory.cache_produtos
+        categoria_dao.incluir(categoria)
+        produto_dao.incluir(Produto(id=None, descricao="Produto Cache", preco_unitario=1.0,
+                                    quantidade_estoque=1, categoria=categoria))
+        
+        produtos = produto_dao.selecionar_todos()
+        antes = cache.stats()
+        repetidos = produto_dao.selecionar_todos()
+        depois = cache.stats()
+        if depois['hits'] == antes['hits'] + 1 and depois['misses'] == antes['misses']:
+            print("✅ Segunda leitura atendida pelo cache")
+        else:
+            print(f"❌ Leitura repetida não usou o cache: {depois}")
+        
+        # o chamador recebe cópias: alterar o produto ou a categoria dele não muda o cache
+        produto = next(p for p in repetidos if p.descricao == "Produto Cache")
+        produto.preco_unitario = 999.0
+        produto.categoria.descricao = "Alterada fora do DAO"
+        cacheado = next(p for p in produto_dao.selecionar_todos() if p.id == produto.id)
+        mesma_categoria = [p for p in repetidos if p.categoria.id == produto.categoria.id]
+        if (cacheado.preco_unitario, cacheado.categoria.descricao) == (1.0, "Categoria Cache") \
+                and all(p.categoria is produto.categoria for p in mesma_categoria) \
+                and all(p.categoria is not produto.categoria for p in produtos):
+            print("✅ Cópias independentes do cache (categorias compartilhadas dentro da cópia)")
+        else:
+            print("❌ Alteração do chamador chegou ao cache")
+        
+        # alterar a categoria invalida também o cache de produtos (dependente)
+        categoria.descricao = "Categoria Cache Alterada"
+        categoria_dao.alterar(categoria)
+        misses = cache.stats()['misses']
+        atualizado = next(p for p in produto_dao.selecionar_todos() if p.id == produto.id)
+        if atualizado.categoria.descricao == "Categoria Cache Alterada" and cache.stats()['misses'] == misses + 1:
+            print("✅ Escrita na categoria invalidou o cache de produtos")
+        else:
+            print("❌ Cache de produtos não invalidado pela escrita na categoria")
+        
+        # uma leitura que começou antes de uma escrita concorrente não recoloca o valor antigo
+        leu, continuar = threading.Event(), threading.Event()
+        
+        class CategoriaDAOLenta(CategoriaDAO):
+            def selecionar_um(self, id):
+                lida = super().selecionar_um(id)
+                leu.set()
+                continuar.wait(10)
+                return lida
+        
+        cache_categorias = CacheLRU()
+        leitor = DAOComCache(CategoriaDAOLenta(), cache_categorias)
+        escritor = DAOComCache(CategoriaDAO(), cache_categorias)
+        thread = threading.Thread(target=leitor.selecionar_um, args=(categoria.id,))
+        thread.start()
+        try:
+            leu.wait(10)
+            categoria.descricao = "Categoria Cache Concorrente"
+            escritor.alterar(categoria)
+        finally:
+            continuar.set()
+            thread.join()
+        if escritor.selecionar_um(categoria.id).descricao == "Categoria Cache Concorrente" \
+                and cache_categorias.stats()['stale_discards'] == 1:
+            print("✅ Leitura concorrente com uma escrita não recoloca o valor antigo no cache")
+        else:
+            print(f"❌ Valor antigo recolocado no cache: {cache_categorias.stats()}")
+        
+        # dentro da unidade de trabalho, depois de uma escrita, a leitura vê o dado não efetivado
+        with unidade_de_trabalho():
+            produto_dao.excluir_por_id(produto.id)
+            visivel = any(p.id == produto.id for p in produto_dao.selecionar_todos())
+        if not visivel and not any(p.id == produto.id for p in produto_dao.selecionar_todos()):
+            print("✅ Leituras após escrita na unidade de trabalho ignoram o cache")
+        else:
+            print("❌ Unidade de trabalho leu o produto excluído do cache")
+    except Exception as e:
+        print(f"❌ Erro no teste do cache dos DAOs: {e}")
+    finally:
+        if categoria.id:
+            for produto in DAOFactory.get_produto_dao().selecionar_por_categoria(categoria.id):
+                DAOFactory.get_produto_dao().excluir(produto)
+            DAOFactory.get_categoria_dao().excluir(categoria)
+        DAOFactory.configurar()
+
+
+def teste_mapa_identidade():
+    """Testa o mapa de identidade: uma Categoria por id na consulta e na unidade de trabalho"""
+    print("\n=== TESTE: Mapa de Identidade ===")
+    
+    categoria = Categoria(id=None, descricao="Categoria Identidade")
+    try:
+        categoria_dao = DAOFactory.get_categoria_dao()
+        produto_dao = DAOFactory.get_produto_dao()
+        categoria_dao.incluir(categoria)
+        for i in range(3):
+            produto_dao.incluir(Produto(id=None, descricao=f"Produto Identidade {i}", preco_unitario=1.0,
+                                        quantidade_estoque=1, categoria=categoria))
+        
+        produtos = produto_dao.selecionar_por_categoria(categoria.id)
+        outra_consulta = produto_dao.selecionar_por_categoria(categoria.id)
+        if len(produtos) == 3 and all(p.categoria is produtos[0].categoria for p in produtos) \
+                and outra_consulta[0].categoria is not produtos[0].categoria:
+            print("✅ Produtos da mesma categoria compartilham a Categoria (um mapa por consulta)")
+        else:
+            print("❌ Categoria não compartilhada entre os produtos da consulta")
+        
+        with unidade_de_trabalho(mapa_identidade=True):
+            primeira = produto_dao.selecionar_por_categoria(categoria.id)[0].categoria
+            segunda = produto_dao.selecionar_todos()
+            mesma = all(p.categoria is primeira for p in segunda if p.categoria.id == categoria.id)
+            categoria_dao.alterar(Categoria(id=categoria.id, descricao="Categoria Identidade Alterada"))
+            depois = produto_dao.selecionar_por_categoria(categoria.id)[0].categoria
+        if mesma and depois is primeira and primeira.descricao == "Categoria Identidade Alterada":
+            print("✅ Unidade de trabalho mantém uma Categoria por id, atualizada pelas escritas")
+        else:
+            print(f"❌ Mapa da unidade de trabalho inconsistente: {primeira.descricao}")
+        categoria.descricao = "Categoria Identidade Alterada"
+    except Exception as e:
+        print(f"❌ Erro no teste do mapa de identidade: {e}")
+    finally:
+        if categoria.id:
+            for produto in DAOFactory.get_produto_dao().selecionar_por_categoria(categoria.id):
+                DAOFactory.get_produto_dao().excluir(produto)
+            DAOFactory.get_categoria_dao().excluir(categoria)
+
+
+def teste_unidade_de_trabalho():
+    """Testa se a unidade de trabalho desfaz todas as operações em caso de erro"""
+    print("\n=== TESTE: Unidade de Trabalho ===")
+    
+    try:
+        dao = DAOFactory.get_categoria_dao()
+        total_antes = len(dao.selecionar_todos())
+        
+        # Teste: erro no meio da unidade desfaz as duas inclusões
+        try:
+            with unidade_de_trabalho():
+                dao.incluir(Categoria(id=None, descricao="Categoria UoW 1"))
+                dao.incluir(Categoria(id=None, descricao="Categoria UoW 2"))
+                raise RuntimeError("falha simulada")
+        except RuntimeError:
+            pass
+        
+        if len(dao.selecionar_todos()) == total_antes:
+            print("✅ Rollback da unidade de trabalho funcionando")
+        else:
+            print("❌ Unidade de trabalho não desfez as inclusões")
+        
+    except Exception as e:
+        print(f"❌ Erro no teste da unidade de trabalho: {e}")
+
+
+def teste_busca_textual():
+    """Testa a busca FTS5 por prefixo e sem acentos, mantida pelos triggers"""
+    print("\n=== TESTE: Busca Textual ===")
+    
+    try:
+        aplicar_migracoes()
+        categoria_dao = DAOFactory.get_categoria_dao()
+        produto_dao = DAOFactory.get_produto_dao()
+        categoria = categoria_dao.selecionar_todos()[0]
+        
+        produto = Produto(id=None, descricao="Máquina de Café Expresso Teste", preco_unitario=10.0,
+                          quantidade_estoque=1, categoria=categoria)
+        produto_dao.incluir_lote([produto])
+        
+        encontrados = [p.id for p in produto_dao.buscar_por_descricao("maquina cafe expr")]
+        if produto.id in encontrados:
+            print("✅ Busca por prefixo sem acentos funcionando")
+        else:
+            print("❌ Produto incluído não encontrado na busca")
+        
+        produto.descricao = "Chaleira Teste"
+        produto_dao.alterar(produto)
+        if produto.id not in [p.id for p in produto_dao.buscar_por_descricao("maquina")]:
+            print("✅ Índice de busca atualizado após alteração")
+        else:
+            print("❌ Índice de busca não acompanhou a alteração")
+        
+        produto_dao.excluir(produto)
+        if not produto_dao.buscar_por_descricao("chaleira teste"):
+            print("✅ Índice de busca atualizado após exclusão")
+        else:
+            print("❌ Produto excluído ainda aparece na busca")
+        
+    except Exception as e:
+        print(f"❌ Erro no teste da busca textual: {e}")
+
+
+def teste_dao_assincrono():
+    """Testa a API assíncrona dos DAOs (operações executadas no executor dedicado)"""
+    print("\n=== TESTE: DAO Assíncrono ===")
+    
+    async def consultar():
+        dao = DAOFactory.get_categoria_dao_assincrono()
+        # várias consultas simultâneas, cada uma em uma thread do executor
+        return await asyncio.gather(dao.selecionar_todos(), dao.selecionar_todos(),
+                                    dao.existe_categoria("Categoria inexistente"))
+    
+    try:
+        todas, de_novo, existe = asyncio.run(consultar())
+        esperado = [c.id for c in DAOFactory.get_categoria_dao().selecionar_todos()]
+        if [c.id for c in todas] == esperado == [c.id for c in de_novo] and not existe:
+            print(f"✅ {len(todas)} categorias obtidas com await")
+        else:
+            print("❌ Resultado do DAO assíncrono difere do DAO síncrono")
+        
+        # as leituras em fluxo simultâneas não passam do limite de threads do executor
+        limite = 2
+        ativas, maximo, trava = [0], [0], threading.Lock()
+        
+        def gerar():
+            with trava:
+                ativas[0] += 1
+                maximo[0] = max(maximo[0], ativas[0])
+            try:
+                yield from DAOFactory.get_categoria_dao().iterar_todos()
+                time.sleep(0.05)
+            finally:
+                with trava:
+                    ativas[0] -= 1
+        
+        async def percorrer():
+            return [c async for c in iterar(gerar)]
+        
+        async def exportacoes():
+            return await asyncio.gather(*(percorrer() for _ in range(limite * 3)))
+        
+        configurar_executor(limite)
+        try:
+            resultados = asyncio.run(exportacoes())
+        finally:
+            encerrar_executor()
+        if maximo[0] <= limite and all(len(r) == len(esperado) for r in resultados):
+            print(f"✅ {len(resultados)} leituras em fluxo, no máximo {maximo[0]} simultâneas")
+        else:
+            print(f"❌ {maximo[0]} leituras em fluxo simultâneas (limite {limite})")
+        
+    except Exception as e:
+        print(f"❌ Erro no teste do DAO assíncrono: {e}")
+
+
+def teste_instrumentacao():
+    """Testa a medição das consultas e o log de consultas lentas"""
+    print("\n=== TESTE: Instrumentação das Consultas ===")
+    
+    try:
+        dao = DAOFactory.get_produto_dao()
+        antes = MONITOR.stats('produto.selecionar_um').get('executions', 0)
+        for id in range(1, 6):
+            dao.selecionar_um(id)
+        stats = MONITOR.stats('produto.selecionar_um')
+        if stats['executions'] - antes == 5:
+            print(f"✅ Execuções medidas - p95: {stats['p95_ms']} ms, máximo: {stats['max_ms']} ms")
+        else:
+            print(f"❌ Execuções não medidas corretamente: {stats}")
+        
+        # com limite zero toda consulta é lenta; os parâmetros não podem aparecer no log
+        limite = MONITOR.limite_lento_ms
+        configurar_monitor(limite_lento_ms=0)
+        try:
+            dao.buscar_por_descricao("termo secreto")
+        finally:
+            configurar_monitor(limite_lento_ms=limite)
+        lenta = MONITOR.lentas()[-1]
+        if "secreto" not in str(lenta['params']):
+            print(f"✅ Consulta lenta registrada com parâmetros mascarados: {lenta['params']}")
+        else:
+            print("❌ Parâmetros da consulta lenta não foram mascarados")
+        
+    except Exception as e:
+        print(f"❌ Erro no teste da instrumentação: {e}")
+
+
+def teste_planos_consulta():
+    """Testa a verificação dos planos de execução das consultas dos DAOs"""
+    print("\n=== TESTE: Planos de Consulta ===")
+    
+    try:
+        aplicar_migracoes()
+        planos = verificar_planos()
+        estoque_baixo = [p for p in planos if p.metodo == 'ProdutoDAO.selecionar_estoque_baixo']
+        if estoque_baixo and all(p.usa_indice_esperado for p in estoque_baixo) \
+                and not any('idx_produto_descricao' in detalhe for p in estoque_baixo for detalhe in p.plano):
+            print("✅ Estoque baixo conduzido por idx_produto_quantidade_estoque")
+        else:
+            print(f"❌ Plano do estoque baixo: {[p.plano for p in estoque_baixo]}")
+        
+        # percorrer um índice inteiro, sem restrição, também é varredura
+        with get_database_connection().conexao() as conexao:
+            def plano(sql):
+                return [reg[3] for reg in conexao.execute(f"EXPLAIN QUERY PLAN {sql}", ('x',)).fetchall()]
+            indice_inteiro = plano("SELECT id, descricao FROM Produto WHERE ? IS NOT NULL ORDER BY descricao")
+            com_restricao = plano("SELECT id FROM Produto WHERE descricao = ?")
+        listagem = [p for p in planos if p.metodo == 'ProdutoDAO.selecionar_todos']
+        if varreduras_do_plano(indice_inteiro) and not varreduras_do_plano(com_restricao) \
+                and listagem and all(p.varreduras and p.permitida and not p.falhou for p in listagem):
+            print("✅ Varredura de índice sem restrição detectada (e permitida só nas listagens)")
+        else:
+            print(f"❌ Varredura de índice não detectada: {indice_inteiro}")
+        
+        falhas = [p.metodo for p in planos if p.falhou]
+        if not falhas:
+            print(f"✅ {len(planos)} planos verificados sem varreduras não permitidas")
+        else:
+            print(f"❌ Consultas com varredura ou sem o índice esperado: {falhas}")
+    except Exception as e:
+        print(f"❌ Erro no teste dos planos de consulta: {e}")
+
+
+def teste_analise_estoque():
+    """Testa a análise de estoque em arrays NumPy e a atualização incremental"""
+    print("\n=== TESTE: Análise de Estoque ===")
+    
+    produtos = []
+    try:
+        aplicar_migracoes()
+        service = ProdutoService()
+        analise = AnaliseEstoque()
+        analise.carregar()
+        
+        resumo_sql = service.resumo_estoque_por_categoria(10)
+        resumo = analise.resumo_por_categoria(10)
+        iguais = len(resumo) == len(resumo_sql) and all(
+            a[:4] == b[:4] and a[5] == b[5] and math.isclose(a[4], b[4]) for a, b in zip(resumo, resumo_sql))
+        baixo = sorted(p.id for p in service.verificar_estoque_baixo(10))
+        if (math.isclose(analise.valor_total(), service.calcular_valor_total_estoque())
+                and iguais and analise.ids_estoque_baixo(10).tolist() == baixo):
+            print(f"✅ Valor total, resumo por categoria e estoque baixo iguais aos do banco ({len(analise)} produtos)")
+        else:
+            print("❌ Análise diferente das consultas do banco")
+        
+        # inclusões, alterações e exclusões aplicadas sem recarregar tudo
+        produto_dao = DAOFactory.get_produto_dao()
+        categoria = DAOFactory.get_categoria_dao().selecionar_todos()[0]
+        produtos = [Produto(id=None, descricao=f"Produto Análise {i}", preco_unitario=10.0 + i,
+                            quantidade_estoque=i, categoria=categoria) for i in range(3)]
+        produto_dao.incluir_lote(produtos)
+        analise.atualizar()
+        produtos[0].quantidade_estoque = 50
+        produto_dao.alterar(produtos[0])
+        produto_dao.excluir(produtos[1])
+        lidos = analise.atualizar()
+        
+        completa = AnaliseEstoque()
+        completa.carregar()
+        if (lidos == 2 and analise.cargas == 1
+                and all(a.tolist() == b.tolist() for a, b in zip(analise.colunas, completa.colunas))):
+            print("✅ Atualização incremental igual à carga completa")
+        else:
+            print(f"❌ Atualização incremental divergente: {analise.stats()}")
+    except Exception as e:
+        print(f"❌ Erro no teste da análise de estoque: {e}")
+    finally:
+        for produto in produtos:
+            if produto.id:
+                DAOFactory.get_produto_dao().excluir_por_id(produto.id)
+
+
 def teste_produto_service():
     """Testa as operações da ProdutoService"""
     print("\n=== TESTE: ProdutoService ===")
@@ -276,6 +889,387 @@ def teste_produto_service():
         print(f"❌ Erro no teste ProdutoService: {e}")
 
 
+def teste_relatorios_estoque():
+    """Testa os relatórios calculados pelo banco contra os totais calculados em Python"""
+    print("\n=== TESTE: Relatórios de Estoque ===")
+    
+    produto_dao = DAOFactory.get_produto_dao()
+    service = ProdutoService()
+    categoria = Categoria(id=None, descricao="Categoria Relatórios")
+    try:
+        DAOFactory.get_categoria_dao().incluir(categoria)
+        # inclui um produto sem quantidade (NULL), que não conta no estoque nem como estoque baixo
+        produto_dao.incluir_lote([Produto(id=None, descricao=f"Produto Relatório {i}", preco_unitario=2.5 * (i + 1),
+                                          quantidade_estoque=None if i == 0 else i * 4, categoria=categoria)
+                                  for i in range(4)])
+        todos = produto_dao.selecionar_todos()
+        limite = 10
+        
+        valor = sum(p.preco_unitario * (p.quantidade_estoque or 0) for p in todos)
+        baixo = sorted(p.id for p in todos if p.quantidade_estoque is not None and p.quantidade_estoque < limite)
+        if math.isclose(service.calcular_valor_total_estoque(), valor) and \
+                sorted(p.id for p in service.verificar_estoque_baixo(limite)) == baixo:
+            print(f"✅ Valor total ({valor:.2f}) e estoque baixo iguais aos calculados em Python")
+        else:
+            print("❌ Valor total ou estoque baixo diferente do calculado em Python")
+        
+        diferentes = []
+        for resumo in service.resumo_estoque_por_categoria(limite):
+            produtos = [p for p in todos if p.categoria.id == resumo.categoria_id]
+            esperado = (len(produtos), sum(p.quantidade_estoque or 0 for p in produtos),
+                        sum(1 for p in produtos if p.quantidade_estoque is not None and p.quantidade_estoque < limite))
+            if (resumo.quantidade_produtos, resumo.quantidade_estoque, resumo.produtos_estoque_baixo) != esperado \
+                    or not math.isclose(resumo.valor_total, sum(p.preco_unitario * (p.quantidade_estoque or 0)
+                                                                for p in produtos)):
+                diferentes.append(resumo.categoria_descricao)
+        if not diferentes:
+            print("✅ Resumo por categoria igual ao calculado em Python")
+        else:
+            print(f"❌ Resumo diferente nas categorias: {diferentes}")
+    except Exception as e:
+        print(f"❌ Erro no teste dos relatórios de estoque: {e}")
+    finally:
+        if categoria.id:
+            for produto in produto_dao.selecionar_por_categoria(categoria.id):
+                produto_dao.excluir(produto)
+            DAOFactory.get_categoria_dao().excluir(categoria)
+
+
+def teste_escritas_service():
+    """Testa os erros das escritas de um único comando dos services (duplicidade, registros inexistentes)"""
+    print("\n=== TESTE: Escritas dos Services ===")
+    
+    categoria_service = CategoriaService()
+    produto_service = ProdutoService()
+    categoria_dao = DAOFactory.get_categoria_dao()
+    criadas = []
+    try:
+        for descricao in ("Categoria Escrita A", "Categoria Escrita B"):
+            categoria_service.criar_categoria(descricao)
+            criadas.append(next(c for c in categoria_service.listar_todas() if c.descricao == descricao))
+        a, b = criadas
+        produto_service.criar_produto("Produto Escrita", 10.0, 1, a.id)
+        produto = next(p for p in produto_service.listar_por_categoria(a.id))
+        total_categorias = len(categoria_service.listar_todas())
+        
+        casos = [
+            (lambda: categoria_service.criar_categoria(" Categoria Escrita A "), "Já existe uma categoria"),
+            (lambda: categoria_service.atualizar_categoria(b.id, "Categoria Escrita A"), "Já existe uma categoria"),
+            (lambda: categoria_service.atualizar_categoria(999999, "Categoria Escrita C"), "Categoria não encontrada"),
+            (lambda: categoria_service.atualizar_categoria(999999, " "), "Categoria não encontrada"),
+            (lambda: categoria_service.atualizar_categoria(b.id, " "), "não pode estar vazia"),
+            (lambda: categoria_service.excluir_categoria(a.id), "Existe(m) 1 produto(s)"),
+            (lambda: categoria_service.excluir_categoria(999999), "Categoria não encontrada"),
+            (lambda: produto_service.criar_produto("Produto Sem Categoria", 1.0, 1, 999999), "Categoria não encontrada"),
+            (lambda: produto_service.atualizar_produto(produto.id, "Produto Escrita", 1.0, 1, 999999),
+             "Categoria não encontrada"),
+            (lambda: produto_service.atualizar_produto(999999, "Produto Escrita", 1.0, 1, a.id), "Produto não encontrado"),
+            (lambda: produto_service.atualizar_produto(999999, "", 1.0, 1, a.id), "Produto não encontrado"),
+            (lambda: produto_service.atualizar_produto(produto.id, "Produto Escrita", 0, 1, a.id), "preço unitário"),
+            (lambda: produto_service.excluir_produto(999999), "Produto não encontrado"),
+        ]
+        falhas = []
+        for i, (operacao, mensagem) in enumerate(casos):
+            try:
+                operacao()
+                falhas.append(f"caso {i}: aceito")
+            except ValueError as e:
+                if mensagem not in str(e):
+                    falhas.append(f"caso {i}: {e}")
+        
+        # nenhuma escrita recusada alterou os dados
+        atual = produto_service.obter_por_id(produto.id)
+        if (not falhas and len(categoria_service.listar_todas()) == total_categorias
+                and categoria_service.obter_por_id(b.id).descricao == "Categoria Escrita B"
+                and (atual.preco_unitario, atual.categoria.id) == (10.0, a.id)):
+            print(f"✅ {len(casos)} escritas inválidas recusadas com a mensagem esperada, sem alterar os dados")
+        else:
+            print(f"❌ Escritas inválidas: {falhas}")
+        produto_service.excluir_produto(produto.id)
+    except Exception as e:
+        print(f"❌ Erro no teste das escritas dos services: {e}")
+    finally:
+        for categoria in criadas:
+            categoria_dao.excluir(categoria)
+
+
+def teste_leitura_separada():
+    """Testa a separação entre conexões somente leitura e a conexão de escrita"""
+    print("\n=== TESTE: Leitura e Escrita Separadas ===")
+    
+    try:
+        DAOFactory.configurar({'OPTIONS': {'read_connections': 2}})
+        dao = DAOFactory.get_categoria_dao()
+        categoria = Categoria(id=None, descricao="Categoria Leitura Separada")
+        dao.incluir(categoria)
+        
+        # fora de uma transação a consulta usa o pool somente leitura
+        with get_database_connection().conexao_leitura() as conexao:
+            try:
+                conexao.execute("DELETE FROM Categoria WHERE id = ?", (categoria.id,))
+                print("❌ Conexão de leitura aceitou uma escrita")
+            except sqlite3.Error:
+                print("✅ Conexão de leitura recusa escritas")
+        
+        # dentro da unidade de trabalho a consulta vê a inclusão ainda não efetivada
+        with unidade_de_trabalho():
+            outra = Categoria(id=None, descricao="Categoria Leitura Separada 2")
+            dao.incluir(outra)
+            visivel = dao.selecionar_um(outra.id) is not None
+            dao.excluir(outra)
+        
+        stats = get_database_connection().stats()
+        if visivel and stats['pool']['max_size'] == 1 and stats['reader_pool']['checkouts'] > 0:
+            print("✅ Consultas roteadas para as conexões de leitura")
+        else:
+            print(f"❌ Roteamento inesperado: {stats}")
+        dao.excluir(categoria)
+        
+        # com a fila de escrita, a única conexão de escrita volta ao pool ao final de
+        # cada lote e fica disponível para as unidades de trabalho das outras threads
+        # (a thread principal devolve a conexão que vinculou com get_connection(), que
+        # ocuparia a única conexão de escrita até close_connection())
+        get_database_connection().close_connection()
+        
+        # execute_sql com commit devolve a conexão de escrita ao final: outra thread
+        # consegue escrever enquanto a primeira continua viva
+        DAOFactory.configurar({'OPTIONS': {'read_connections': 2, 'timeout': 2.0}})
+        dao = DAOFactory.get_categoria_dao()
+        escreveu, terminar = threading.Event(), threading.Event()
+        
+        def escrever_pelo_singleton():
+            get_database_connection().execute_sql(
+                "INSERT INTO Categoria (descricao) VALUES (?)", ("Categoria Singleton Thread",))
+            escreveu.set()
+            terminar.wait(10)
+        
+        thread = threading.Thread(target=escrever_pelo_singleton)
+        thread.start()
+        try:
+            escreveu.wait(10)
+            outra = Categoria(id=None, descricao="Categoria Leitura Separada 3")
+            dao.incluir(outra)
+            dao.excluir(outra)
+            vinculadas = get_database_connection().stats()['bound']
+        finally:
+            terminar.set()
+            thread.join()
+        get_database_connection().execute_sql(
+            "DELETE FROM Categoria WHERE descricao = ?", ("Categoria Singleton Thread",))
+        if vinculadas == 0 and dao.selecionar_um(outra.id) is None:
+            print("✅ execute_sql não retém a conexão de escrita entre threads")
+        else:
+            print(f"❌ Conexões ainda vinculadas após execute_sql: {vinculadas}")
+        
+        DAOFactory.configurar({'OPTIONS': {'read_connections': 2, 'timeout': 2.0}, 'FILA_ESCRITA': {}})
+        dao = DAOFactory.get_categoria_dao()
+        categoria = Categoria(id=None, descricao="Categoria Leitura Separada Fila")
+        dao.incluir(categoria)
+        with unidade_de_trabalho():
+            dao.excluir(categoria)
+        dao.incluir(categoria)
+        dao.excluir(categoria)
+        if dao.selecionar_um(categoria.id) is None and get_fila_escrita().stats()['operations'] == 3:
+            print("✅ Fila de escrita e unidades de trabalho compartilham a conexão de escrita")
+        else:
+            print("❌ Escritas pela fila com leitura separada não efetivadas")
+    except Exception as e:
+        print(f"❌ Erro no teste de leitura separada: {e}")
+    finally:
+        DAOFactory.configurar({'OPTIONS': {'read_connections': 0}})
+
+
+def teste_exportacao():
+    """Testa a exportação sob demanda dos produtos em CSV, JSON Lines e gzip"""
+    print("\n=== TESTE: Exportação ===")
+    
+    try:
+        total = len(DAOFactory.get_produto_dao().selecionar_todos())
+        csv_texto = b''.join(exportar_produtos('csv')).decode('utf-8')
+        jsonl = b''.join(exportar_produtos('jsonl', tamanho_lote=2)).decode('utf-8').splitlines()
+        compactado = gzip.decompress(b''.join(exportar_produtos('csv', compactar=True))).decode('utf-8')
+        if (len(csv_texto.splitlines()) == total + 1 and len(jsonl) == total
+                and compactado == csv_texto and 'categoria_descricao' in json.loads(jsonl[0])):
+            print(f"✅ {total} produtos exportados em CSV, JSON Lines e gzip")
+        else:
+            print("❌ Exportação com conteúdo inesperado")
+    except Exception as e:
+        print(f"❌ Erro no teste de exportação: {e}")
+
+
+def teste_importacao():
+    """Testa a importação de produtos de um CSV em lotes, com erros por linha"""
+    print("\n=== TESTE: Importação ===")
+    
+    categoria = Categoria(id=None, descricao="Categoria Importação")
+    produtos = []
+    try:
+        DAOFactory.get_categoria_dao().incluir(categoria)
+        linhas = ["descricao,preco_unitario,quantidade_estoque,categoria_descricao"]
+        linhas += [f"Importado {i},{i % 50 + 1},{i % 7},{categoria.descricao}" for i in range(1500)]
+        linhas.insert(3, f"Sem preço,abc,1,{categoria.descricao}")
+        linhas.insert(6, "Sem categoria,10,1,Categoria Inexistente")
+        resultado = importar_produtos(io.StringIO("\n".join(linhas)), tamanho_lote=1000)
+        
+        produto_dao = DAOFactory.get_produto_dao()
+        produtos = produto_dao.selecionar_por_categoria(categoria.id)
+        if resultado.importadas == 1500 and [e.linha for e in resultado.erros] == [4, 7] and len(produtos) == 1500:
+            print(f"✅ {resultado.importadas} produtos importados; erros nas linhas 4 e 7")
+        else:
+            print(f"❌ Importação inesperada: {resultado.como_dict()}")
+        
+        # os lotes grandes são indexados por bloco, com o gatilho suspenso durante a inclusão
+        if len(produto_dao.buscar_por_descricao("Importado 1499")) >= 1 and produto_dao.executar_select(
+                COMANDOS['gatilho_sql'], ('produto_busca_ai',)):
+            print("✅ Produtos importados indexados na busca textual")
+        else:
+            print("❌ Produtos importados ausentes da busca textual")
+        
+        # um lote pequeno vindo de um gerador não suspende o gatilho (decide pelo tamanho lido)
+        COMANDOS.zerar_estatisticas()
+        avulso = Produto(id=None, descricao="Importado Avulso", preco_unitario=1.0,
+                         quantidade_estoque=1, categoria=categoria)
+        produto_dao.incluir_lote(p for p in [avulso])
+        produtos.append(avulso)
+        suspensoes = COMANDOS.stats()['por_comando'].get('gatilho.suspender', {}).get('executions', 0)
+        pendentes = produto_dao.executar_select("SELECT COUNT(*) FROM gatilho_suspenso")[0][0]
+        if suspensoes == 0 and pendentes == 0 and produto_dao.buscar_por_descricao("Importado Avulso"):
+            print("✅ Lote pequeno indexado pelo gatilho; nenhum gatilho suspenso após a importação")
+        else:
+            print(f"❌ Suspensão de gatilho inesperada: {suspensoes} suspensões, {pendentes} pendentes")
+        
+        # uma falha no meio de um lote grande desfaz a inclusão e a suspensão do gatilho
+        total_antes = len(produto_dao.selecionar_todos())
+        inexistente = Categoria(id=999999, descricao="")
+        try:
+            produto_dao.incluir_lote(Produto(id=None, descricao=f"Importado Falho {i}", preco_unitario=1.0,
+                                             quantidade_estoque=1, categoria=inexistente if i == 1100 else categoria)
+                                     for i in range(1200))
+            print("❌ Lote com categoria inexistente aceito")
+        except sqlite3.IntegrityError:
+            pendentes = produto_dao.executar_select("SELECT COUNT(*) FROM gatilho_suspenso")[0][0]
+            if len(produto_dao.selecionar_todos()) == total_antes and pendentes == 0:
+                print("✅ Lote grande com erro desfeito, sem gatilho suspenso")
+            else:
+                print(f"❌ Lote grande com erro não foi desfeito ({pendentes} gatilhos suspensos)")
+        
+        # arquivo ilegível: ValueError com a linha, tratado pela view e pelo comando como erro do usuário
+        cabecalho = "descricao,preco_unitario,quantidade_estoque,categoria_descricao\n"
+        malformado = io.StringIO(f"{cabecalho}Produto,1,1,{categoria.descricao}\n{'x' * 200000},1,1,X\n")
+        compactado = gzip.compress((cabecalho + "".join(
+            f"Produto {i},1,1,{categoria.descricao}\n" for i in range(100000))).encode('utf-8'))
+        mensagens = []
+        for arquivo in (malformado, abrir_csv(io.BytesIO(compactado[:len(compactado) // 2]))):
+            try:
+                importar_produtos(arquivo, gravar=False)
+            except ValueError as e:
+                mensagens.append(str(e))
+        if len(mensagens) == 2 and mensagens[0].startswith("CSV malformado na linha 3") \
+                and mensagens[1].startswith("Arquivo compactado truncado"):
+            print("✅ CSV malformado e .csv.gz truncado recusados com o número da linha")
+        else:
+            print(f"❌ Arquivos ilegíveis não recusados como ValueError: {mensagens}")
+    except Exception as e:
+        print(f"❌ Erro no teste de importação: {e}")
+    finally:
+        with unidade_de_trabalho():
+            for produto in produtos:
+                DAOFactory.get_produto_dao().excluir(produto)
+        if categoria.id:
+            DAOFactory.get_categoria_dao().excluir(categoria)
+
+
+def teste_fila_escrita():
+    """Testa a fila de escrita: inclusões concorrentes agrupadas em lotes e erros por operação"""
+    print("\n=== TESTE: Fila de Escrita ===")
+    
+    try:
+        DAOFactory.configurar({'FILA_ESCRITA': {'max_espera_ms': 5.0}})
+        categoria_dao = DAOFactory.get_categoria_dao()
+        produto_dao = DAOFactory.get_produto_dao()
+        categorias = [Categoria(id=None, descricao=f"Categoria Fila {i}") for i in range(20)]
+        threads = [threading.Thread(target=categoria_dao.incluir, args=(c,)) for c in categorias]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        stats = get_fila_escrita().stats()
+        if all(c.id for c in categorias) and stats['batches'] < stats['operations']:
+            print(f"✅ {stats['operations']} inclusões efetivadas em {stats['batches']} lotes")
+        else:
+            print(f"❌ Inclusões pela fila não agrupadas: {stats}")
+        
+        # o erro de uma operação chega a quem a enviou, sem desfazer as demais
+        try:
+            produto_dao.incluir(Produto(id=None, descricao="Produto Fila", preco_unitario=1.0,
+                                        quantidade_estoque=1, categoria=Categoria(id=999999, descricao="")))
+            print("❌ Categoria inexistente aceita pela fila")
+        except Exception:
+            print("✅ Erro da operação propagado pela fila")
+        
+        for categoria in categorias:
+            categoria_dao.excluir(categoria)
+    except Exception as e:
+        print(f"❌ Erro no teste da fila de escrita: {e}")
+    finally:
+        DAOFactory.configurar()
+
+
+def teste_perfil_banco():
+    """Testa a aplicação e a inspeção do perfil de desempenho (PRAGMAs) das conexões"""
+    print("\n=== TESTE: Perfil do Banco ===")
+    
+    try:
+        try:
+            DAOFactory.configurar({'PROFILE': {'base': 'balanced', 'synchronous': 'SEMPRE'}})
+            print("❌ Perfil inválido aceito")
+        except ValueError:
+            print("✅ Perfil inválido recusado")
+        
+        DAOFactory.configurar({'PROFILE': {'base': 'durable', 'cache_size': -4096}})
+        pragmas = get_database_connection().pragmas()['escrita']
+        if pragmas['synchronous'] == 'FULL' and pragmas['cache_size'] == -4096 and pragmas['foreign_keys'] == 1:
+            print("✅ Perfil aplicado às conexões do pool")
+        else:
+            print(f"❌ PRAGMAs inesperados: {pragmas}")
+    except Exception as e:
+        print(f"❌ Erro no teste do perfil do banco: {e}")
+    finally:
+        DAOFactory.configurar({'OPTIONS': {'max_connections': 5}})
+
+
+def teste_backends():
+    """Testa os backends em memória (dicionários e SQLite compartilhado) pelos services"""
+    print("\n=== TESTE: Backends dos DAOs ===")
+    
+    try:
+        for engine in ('memoria', 'sqlite_memoria'):
+            DAOFactory.configurar({'ENGINE': engine, 'NAME': 'teste_backends'})
+            if DAOFactory.get_categoria_dao() is not DAOFactory.get_categoria_dao():
+                print(f"❌ Backend {engine}: DAO não é compartilhado")
+            categoria_service = CategoriaService()
+            produto_service = ProdutoService()
+            categoria_service.criar_categoria("Informática")
+            categoria = categoria_service.listar_todas()[0]
+            produto_service.criar_produto("Notebook Básico", 2500.0, 3, categoria.id)
+            try:
+                produto_service.criar_produto("Mouse", 50.0, 1, categoria.id + 1000)
+                print(f"❌ Backend {engine}: categoria inexistente aceita")
+            except ValueError:
+                pass
+            encontrados = produto_service.buscar_por_descricao("note basi")
+            if len(encontrados) == 1 and produto_service.calcular_valor_total_estoque() == 7500.0:
+                print(f"✅ Backend {engine} funcionando")
+            else:
+                print(f"❌ Backend {engine}: resultados inesperados")
+    except Exception as e:
+        print(f"❌ Erro no teste dos backends: {e}")
+    finally:
+        # volta ao banco em arquivo
+        DAOFactory.configurar()
+
+
 def main():
     """Executa todos os testes"""
     print("🚀 INICIANDO TESTES DO PADRÃO DAO")
@@ -283,10 +1277,31 @@ def main():
     
     # Executar testes
     teste_conexao_singleton()
+    teste_pool_conexoes()
     teste_categoria_dao()
     teste_categoria_service()
     teste_produto_dao()
+    teste_produto_linha()
+    teste_inclusao_em_lote()
+    teste_iteracao()
+    teste_paginacao()
+    teste_cache_dao()
+    teste_mapa_identidade()
+    teste_unidade_de_trabalho()
+    teste_busca_textual()
+    teste_dao_assincrono()
+    teste_instrumentacao()
     teste_produto_service()
+    teste_escritas_service()
+    teste_relatorios_estoque()
+    teste_planos_consulta()
+    teste_analise_estoque()
+    teste_exportacao()
+    teste_importacao()
+    teste_fila_escrita()
+    teste_leitura_separada()
+    teste_perfil_banco()
+    teste_backends()
     
     print("\n" + "=" * 50)
     print("✅ TESTES CONCLUÍDOS!")
@@ -296,6 +1311,7 @@ def main():
     print("• Factory para criação de DAOs")
     print("• Camada de Serviços com regras de negócio")
     print("• Singleton para gerenciamento de conexões")
+    print("• Pool de conexões compartilhado pelos DAOs")
     print("• Prepared statements para segurança")
     print("• Tratamento de exceções")
     print("• Validações de dados")